@@ -0,0 +1,450 @@
+# Standard library imports
+import heapq
+import itertools
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
+
+# Local imports
+from .metrics import metrics
+
+BUTTONS = ("left", "right")
+
+@dataclass(frozen=True)
+class Move:
+    """
+    Move the cursor to a screen point.
+
+    Attributes:
+        x (int): Target x coordinate, in screen points.
+        y (int): Target y coordinate, in screen points.
+    """
+    x: int
+    y: int
+
+@dataclass(frozen=True)
+class Click:
+    """
+    Move the cursor to a screen point and click.
+
+    Attributes:
+        x (int): Target x coordinate, in screen points.
+        y (int): Target y coordinate, in screen points.
+        button (str): "left" or "right".
+        hold (float): Seconds between press and release.
+    """
+    x: int
+    y: int
+    button: str = "left"
+    hold: float = 0.1
+
+@dataclass(frozen=True)
+class KeyPress:
+    """
+    Press and release a key.
+
+    Attributes:
+        key (str): The key, e.g. "q" or "space". Its meaning is backend specific.
+        hold (float): Seconds between press and release.
+    """
+    key: str
+    hold: float = 0.05
+
+Command = Union[Move, Click, KeyPress]
+
+class Backend:
+    """
+    Injects input events into the operating system.
+
+    Every method is called from the actuator thread only, so backends do not need to
+    be thread-safe and may hold thread-affine handles.
+
+    Methods:
+        move(x: int, y: int):
+            Moves the cursor.
+        press(x: int, y: int, button: str) / release(x: int, y: int, button: str):
+            Presses or releases a mouse button at a point.
+        key_down(key: str) / key_up(key: str):
+            Presses or releases a key.
+        close():
+            Releases any resources held by the backend.
+    """
+    def move(self, x: int, y: int):
+        raise NotImplementedError
+
+    def press(self, x: int, y: int, button: str):
+        raise NotImplementedError
+
+    def release(self, x: int, y: int, button: str):
+        raise NotImplementedError
+
+    def key_down(self, key: str):
+        raise NotImplementedError
+
+    def key_up(self, key: str):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class NullBackend(Backend):
+    """
+    Discards all input, e.g. for benchmarking the decision loop without side effects.
+    """
+    def move(self, x: int, y: int):
+        pass
+
+    def press(self, x: int, y: int, button: str):
+        pass
+
+    def release(self, x: int, y: int, button: str):
+        pass
+
+    def key_down(self, key: str):
+        pass
+
+    def key_up(self, key: str):
+        pass
+
+class RecordingBackend(Backend):
+    def __init__(self, verbose: bool = False):
+        """
+        Records injected input instead of performing it, for tests and dry runs.
+
+        Attributes:
+            events (List[Tuple[float, str, tuple]]): `(time.monotonic(), event, args)` of
+                every event, in order, e.g. `(12.5, "press", (100, 200, "right"))`.
+            verbose (bool): Also print each event.
+        """
+        self.verbose = verbose
+        self.events: List[Tuple[float, str, tuple]] = []
+
+    def _record(self, event: str, *args):
+        self.events.append((time.monotonic(), event, args))
+        if self.verbose:
+            print(f"Input: {event}{args}")
+
+    def move(self, x: int, y: int):
+        self._record("move", x, y)
+
+    def press(self, x: int, y: int, button: str):
+        self._record("press", x, y, button)
+
+    def release(self, x: int, y: int, button: str):
+        self._record("release", x, y, button)
+
+    def key_down(self, key: str):
+        self._record("key_down", key)
+
+    def key_up(self, key: str):
+        self._record("key_up", key)
+
+class QuartzBackend(Backend):
+    # Virtual key codes (Carbon kVK_*) of the keys used by the game
+    KEY_CODES = {
+        "a": 0, "s": 1, "d": 2, "f": 3, "q": 12, "w": 13, "e": 14, "r": 15, "b": 11,
+        "1": 18, "2": 19, "3": 20, "4": 21, "5": 23, "6": 22, "7": 26,
+        "space": 49, "tab": 48, "escape": 53,
+    }
+
+    def __init__(self):
+        """
+        Posts mouse and keyboard events through Quartz event services on macOS.
+
+        Note:
+            Key names are mapped to virtual key codes of the US ANSI layout in `KEY_CODES`.
+        """
+        import Quartz
+        self.Q = Quartz
+
+    def _post_mouse(self, event_type, x: int, y: int, button):
+        event = self.Q.CGEventCreateMouseEvent(None, event_type, self.Q.CGPoint(x=x, y=y), button)
+        self.Q.CGEventPost(self.Q.kCGHIDEventTap, event)
+
+    def move(self, x: int, y: int):
+        self._post_mouse(self.Q.kCGEventMouseMoved, x, y, self.Q.kCGMouseButtonLeft)
+
+    def press(self, x: int, y: int, button: str):
+        if button == "right":
+            self._post_mouse(self.Q.kCGEventRightMouseDown, x, y, self.Q.kCGMouseButtonRight)
+        else:
+            self._post_mouse(self.Q.kCGEventLeftMouseDown, x, y, self.Q.kCGMouseButtonLeft)
+
+    def release(self, x: int, y: int, button: str):
+        if button == "right":
+            self._post_mouse(self.Q.kCGEventRightMouseUp, x, y, self.Q.kCGMouseButtonRight)
+        else:
+            self._post_mouse(self.Q.kCGEventLeftMouseUp, x, y, self.Q.kCGMouseButtonLeft)
+
+    def _post_key(self, key: str, down: bool):
+        event = self.Q.CGEventCreateKeyboardEvent(None, self.KEY_CODES[key], down)
+        self.Q.CGEventPost(self.Q.kCGHIDEventTap, event)
+
+    def key_down(self, key: str):
+        self._post_key(key, True)
+
+    def key_up(self, key: str):
+        self._post_key(key, False)
+
+class XTestBackend(Backend):
+    def __init__(self, display: Optional[str] = None):
+        """
+        Injects input through the X11 XTEST extension on Linux.
+
+        Attributes:
+            display (Optional[str]): The X display, e.g. ":0". Defaults to $DISPLAY.
+
+        Note:
+            Requires python-xlib, which is imported lazily. The display connection is
+            opened on the first event, so it belongs to the actuator thread.
+        """
+        self.display_name = display
+        self.display = None
+
+    def _display(self):
+        if self.display is None:
+            from Xlib import display
+            self.display = display.Display(self.display_name)
+        return self.display
+
+    def _fake(self, event_type: str, detail: int, **kwargs):
+        from Xlib import X
+        from Xlib.ext import xtest
+        xtest.fake_input(self._display(), getattr(X, event_type), detail, **kwargs)
+        self._display().sync()
+
+    def move(self, x: int, y: int):
+        self._fake("MotionNotify", 0, x=x, y=y)
+
+    def press(self, x: int, y: int, button: str):
+        self.move(x, y)
+        self._fake("ButtonPress", 3 if button == "right" else 1)
+
+    def release(self, x: int, y: int, button: str):
+        self._fake("ButtonRelease", 3 if button == "right" else 1)
+
+    def _keycode(self, key: str) -> int:
+        from Xlib import XK
+        return self._display().keysym_to_keycode(XK.string_to_keysym(key))
+
+    def key_down(self, key: str):
+        self._fake("KeyPress", self._keycode(key))
+
+    def key_up(self, key: str):
+        self._fake("KeyRelease", self._keycode(key))
+
+    def close(self):
+        if self.display is not None:
+            self.display.close()
+            self.display = None
+
+class UInputBackend(Backend):
+    def __init__(self, size: Tuple[int, int] = (1920, 1080)):
+        """
+        Injects input through a virtual absolute pointer and keyboard with Linux uinput.
+
+        Works under Wayland and on the console, unlike XTEST, but needs write access to
+        /dev/uinput.
+
+        Attributes:
+            size (Tuple[int, int]): The (width, height) of the screen, in points. Absolute
+                positions are reported on this range. Defaults to (1920, 1080).
+
+        Note:
+            Requires python-evdev, which is imported lazily.
+        """
+        from evdev import AbsInfo, UInput, ecodes
+        self.ecodes = ecodes
+        keys = [code for name, code in ecodes.ecodes.items() if name.startswith("KEY_")]
+        self.device = UInput(
+            {
+                ecodes.EV_KEY: [ecodes.BTN_LEFT, ecodes.BTN_RIGHT, *keys],
+                ecodes.EV_ABS: [
+                    (ecodes.ABS_X, AbsInfo(0, 0, size[0] - 1, 0, 0, 0)),
+                    (ecodes.ABS_Y, AbsInfo(0, 0, size[1] - 1, 0, 0, 0)),
+                ],
+            },
+            name="lol-claude-actuator",
+        )
+
+    def _emit(self, events):
+        for event_type, code, value in events:
+            self.device.write(event_type, code, value)
+        self.device.syn()
+
+    def move(self, x: int, y: int):
+        e = self.ecodes
+        self._emit([(e.EV_ABS, e.ABS_X, x), (e.EV_ABS, e.ABS_Y, y)])
+
+    def _button(self, button: str) -> int:
+        return self.ecodes.BTN_RIGHT if button == "right" else self.ecodes.BTN_LEFT
+
+    def press(self, x: int, y: int, button: str):
+        e = self.ecodes
+        self._emit([(e.EV_ABS, e.ABS_X, x), (e.EV_ABS, e.ABS_Y, y), (e.EV_KEY, self._button(button), 1)])
+
+    def release(self, x: int, y: int, button: str):
+        self._emit([(self.ecodes.EV_KEY, self._button(button), 0)])
+
+    def _key(self, key: str) -> int:
+        return self.ecodes.ecodes[f"KEY_{key.upper()}"]
+
+    def key_down(self, key: str):
+        self._emit([(self.ecodes.EV_KEY, self._key(key), 1)])
+
+    def key_up(self, key: str):
+        self._emit([(self.ecodes.EV_KEY, self._key(key), 0)])
+
+    def close(self):
+        self.device.close()
+
+def make_backend(kind: str = "auto", **kwargs) -> Backend:
+    """
+    Construct an input backend by name.
+
+    Args:
+        kind (str): One of "auto", "quartz", "xtest", "uinput", "null" or "recording".
+            "auto" picks Quartz on macOS and XTEST elsewhere.
+        **kwargs: Passed to the backend's constructor.
+
+    Returns:
+        Backend: The input backend.
+
+    Raises:
+        ValueError: If the backend kind is unknown.
+    """
+    if kind == "auto":
+        kind = "quartz" if sys.platform == "darwin" else "xtest"
+    backends = {
+        "quartz": QuartzBackend,
+        "xtest": XTestBackend,
+        "uinput": UInputBackend,
+        "null": NullBackend,
+        "recording": RecordingBackend,
+    }
+    if kind not in backends:
+        raise ValueError(f"Unknown input backend '{kind}'. Expected one of: auto, {', '.join(backends)}")
+    return backends[kind](**kwargs)
+
+class Actuator:
+    def __init__(self, backend: Backend):
+        """
+        Injects input on a dedicated thread, from a queue of scheduled commands.
+
+        `submit()` only schedules a command and returns immediately, so neither the
+        asyncio loop nor the pipeline's actuation stage ever blocks on input injection.
+        A click is split into a press at its scheduled time and a release `hold` seconds
+        later, and events from overlapping commands are interleaved in time order.
+
+        Attributes:
+            backend (Backend): Performs the input events.
+            injected (int): The number of events performed.
+            errors (int): The number of events which raised.
+
+        Methods:
+            submit(command: Command, at: Optional[float] = None) -> float:
+                Schedules a command at a `time.monotonic()` time, defaulting to now.
+                Returns the time the command completes.
+            cancel():
+                Drops every pending event, releasing any held button or key.
+            wait(timeout: Optional[float] = None) -> bool:
+                Blocks until no events are pending.
+            close():
+                Performs pending events and stops the thread.
+        """
+        self.backend = backend
+        self.injected = 0
+        self.errors = 0
+        self._events: List[Tuple[float, int, str, tuple]] = []
+        self._order = itertools.count()
+        self._held: Dict[Tuple[str, str], Tuple[str, tuple]] = {}
+        self._busy = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="actuator", daemon=True)
+        self._thread.start()
+
+    def _schedule(self, at: float, event: str, *args):
+        heapq.heappush(self._events, (at, next(self._order), event, args))
+
+    def submit(self, command: Command, at: Optional[float] = None) -> float:
+        at = time.monotonic() if at is None else at
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("The actuator is closed.")
+            if isinstance(command, Move):
+                self._schedule(at, "move", command.x, command.y)
+                done = at
+            elif isinstance(command, Click):
+                if command.button not in BUTTONS:
+                    raise ValueError(f"Unknown mouse button '{command.button}'. Expected one of: {', '.join(BUTTONS)}")
+                self._schedule(at, "move", command.x, command.y)
+                self._schedule(at, "press", command.x, command.y, command.button)
+                done = at + command.hold
+                self._schedule(done, "release", command.x, command.y, command.button)
+            elif isinstance(command, KeyPress):
+                self._schedule(at, "key_down", command.key)
+                done = at + command.hold
+                self._schedule(done, "key_up", command.key)
+            else:
+                raise TypeError(f"Unsupported command {command!r}")
+            self._cond.notify()
+        return done
+
+    def cancel(self):
+        with self._cond:
+            self._events = []
+            # Never leave a button or key held down
+            for event, args in self._held.values():
+                self._schedule(0.0, event, *args)
+            self._cond.notify()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._events and not self._busy, timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed and not self._events:
+                        return
+                    if self._events:
+                        delay = self._events[0][0] - time.monotonic()
+                        if delay <= 0:
+                            break
+                        self._cond.wait(delay)
+                    else:
+                        self._cond.wait()
+                at, _, event, args = heapq.heappop(self._events)
+                self._busy = True
+                # Track held buttons and keys so cancel() can release them
+                if event in ("press", "key_down"):
+                    self._held[(event, args[-1])] = ("release" if event == "press" else "key_up", args)
+                elif event in ("release", "key_up"):
+                    self._held.pop(("press" if event == "release" else "key_down", args[-1]), None)
+            try:
+                getattr(self.backend, event)(*args)
+                self.injected += 1
+                metrics.observe("inject_lag", max(0.0, time.monotonic() - at))
+            except Exception as e:
+                self.errors += 1
+                print(f"Actuator error in {event}{args}: {e}")
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        self.backend.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,533 @@
+# Standard library imports
+import math
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+# Third-party imports
+import numpy as np
+from PIL import Image, ImageDraw
+
+# Local imports
+from .display import DisplayGeometry
+from .metrics import metrics
+from .pipeline import Frame
+from .recorder import SessionReader
+from .regions import region_monitor
+
+# Frame rate of the capture thread when none is given, as an unpaced thread would keep
+# a core busy grabbing frames faster than they are consumed
+BUFFERED_FPS = 30.0
+
+class CaptureSource:
+    """
+    Base class for frame sources feeding the decision loop.
+
+    Subclasses implement `_grab()`. `grab()` paces calls to `fps` (when set) and
+    stamps each frame with its capture time, so every source can be benchmarked at
+    a controlled frame rate.
+
+    Attributes:
+        fps (Optional[float]): Maximum frame rate. None captures as fast as possible.
+
+    Methods:
+        grab() -> Optional[Frame]:
+            Returns the next frame, or None when the source is exhausted.
+        close():
+            Releases any resources held by the source.
+    """
+    def __init__(self, fps: Optional[float] = None):
+        self.fps = fps
+        self._next_at = 0.0
+
+    def _grab(self) -> Optional[Frame]:
+        raise NotImplementedError
+
+    def grab(self) -> Optional[Frame]:
+        if self.fps:
+            now = time.monotonic()
+            if self._next_at > now:
+                time.sleep(self._next_at - now)
+            self._next_at = max(now, self._next_at) + 1 / self.fps
+        frame = self._grab()
+        if frame is not None and not frame.captured_at:
+            frame.captured_at = time.monotonic()
+        return frame
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class MssSource(CaptureSource):
+    def __init__(self, region: str = "full", monitor_index: int = 1, target_width: Optional[int] = None, fps: Optional[float] = None):
+        """
+        Live screen capture using mss.
+
+        The mss instance is created lazily on the first grab, so it belongs to the
+        thread which actually captures (mss handles are not shareable across threads
+        on every platform). The display geometry is set up at the same time.
+
+        Attributes:
+            region (str): Named capture region, see lib/regions.py.
+            monitor_index (int): Index into `sct.monitors`. 1 is the primary monitor.
+            target_width (Optional[int]): See `DisplayGeometry.target_width`.
+            geometry (Optional[DisplayGeometry]): The display geometry.
+        """
+        super().__init__(fps)
+        self.region = region
+        self.monitor_index = monitor_index
+        self.target_width = target_width
+        self.sct = None
+        self.geometry: Optional[DisplayGeometry] = None
+
+    def _open(self):
+        if self.sct is None:
+            from mss import mss
+            self.sct = mss()
+        if self.geometry is None:
+            self.geometry = DisplayGeometry(self.sct.monitors[self.monitor_index], target_width=self.target_width)
+
+    def _grab(self) -> Frame:
+        self._open()
+
+        # Capture only the configured region of the monitor
+        monitor = region_monitor(self.region, self.sct.monitors[self.monitor_index])
+        with metrics.time("capture") as capture:
+            screenshot = self.sct.grab(monitor)
+        captured_at = time.monotonic()
+
+        # Convert to PIL Image, downscaled from backing pixels to the output size
+        with metrics.time("convert") as convert:
+            img = Image.frombytes('RGB', screenshot.size, screenshot.rgb)
+            img = self.geometry.downscale(img, monitor)
+        return Frame(
+            image=img,
+            monitor=monitor,
+            captured_at=captured_at,
+            timings={"capture": capture.elapsed, "convert": convert.elapsed},
+        )
+
+    def close(self):
+        if self.sct is not None:
+            self.sct.close()
+            self.sct = None
+
+@dataclass
+class RawFrame:
+    """
+    A handle on a frame held in a `FrameRing` slot.
+
+    Attributes:
+        ring (FrameRing): The ring holding the frame.
+        slot (int): The slot index.
+        generation (int): The ring generation the slot was written in. The handle is
+            stale once the slot has been rewritten.
+        captured_at (float): `time.monotonic()` timestamp of the capture.
+        monitor (Dict[str, int]): The monitor dict the frame was captured from.
+        postprocess (Optional[Callable[[Image.Image], Image.Image]]): Applied to the
+            converted image, e.g. the Retina downscale.
+    """
+    ring: "FrameRing"
+    slot: int
+    generation: int
+    captured_at: float
+    monitor: Dict[str, int]
+    postprocess: Optional[Callable[[Image.Image], Image.Image]] = None
+
+    def to_image(self) -> Image.Image:
+        """
+        Convert the BGRA frame to an RGB image, copying it out of the ring.
+
+        Returns:
+            Image.Image: The image. If the slot was rewritten before it could be read, the
+            newest frame is converted instead, and `captured_at` is updated to match.
+        """
+        raw = self
+        while True:
+            with self.ring.reading(raw) as bgra:
+                if bgra is not None:
+                    # One C pass from BGRA to RGB, straight from the ring's memory
+                    img = Image.frombuffer('RGB', (bgra.shape[1], bgra.shape[0]), bgra, 'raw', 'BGRX', 0, 1)
+                    break
+            raw = self.ring.latest()
+        self.captured_at = raw.captured_at
+        return self.postprocess(img) if self.postprocess is not None else img
+
+    def preview(self, width: int = 256) -> Optional[Image.Image]:
+        """
+        Sample a small RGB preview of the frame, without converting the whole frame.
+
+        Every n-th pixel of every n-th row is copied out of the ring, which is enough
+        for fingerprints and hashes deciding whether the frame is worth converting.
+
+        Args:
+            width (int, optional): The approximate width of the preview. Defaults to 256.
+
+        Returns:
+            Optional[Image.Image]: The preview, or None if the slot was rewritten.
+        """
+        with self.ring.reading(self) as bgra:
+            if bgra is None:
+                return None
+            step = max(1, bgra.shape[1] // width)
+            sampled = np.ascontiguousarray(bgra[::step, ::step])
+        return Image.frombuffer('RGB', (sampled.shape[1], sampled.shape[0]), sampled, 'raw', 'BGRX', 0, 1)
+
+class FrameRing:
+    def __init__(self, shape: Tuple[int, int], slots: int = 3):
+        """
+        Preallocated BGRA frame buffers, written in turn by one capture thread.
+
+        The writer always fills a slot other than the newest frame and any slot being
+        read, so with three slots it never waits on the readers: one slot holds the
+        newest frame, one may be being converted, and one is written. Readers take
+        a `RawFrame` handle on the newest frame without copying it. A handle stays
+        valid until its slot is rewritten, which `reading()` detects from the slot's
+        generation.
+
+        Attributes:
+            buffers (np.ndarray): The (slots, height, width, 4) uint8 frames.
+            generation (int): The number of frames published.
+
+        Methods:
+            acquire() -> Optional[int]:
+                Returns a slot to write the next frame into, or None if all are busy.
+            publish(slot: int, captured_at: float, monitor: Dict[str, int], postprocess=None) -> RawFrame:
+                Makes the written slot the newest frame.
+            latest() -> Optional[RawFrame]:
+                Returns a handle on the newest frame.
+            wait(after: int, timeout: Optional[float] = None) -> Optional[RawFrame]:
+                Blocks until a frame newer than generation `after` is published.
+            reading(raw: RawFrame):
+                Context manager yielding a view of the frame's slot, or None if it
+                was rewritten. The slot is not written while the view is in use.
+        """
+        if slots < 2:
+            raise ValueError(f"A frame ring needs at least 2 slots, got {slots}.")
+        self.buffers = np.empty((slots, shape[0], shape[1], 4), dtype=np.uint8)
+        self.generation = 0
+        self._generations = [0] * slots
+        self._readers = [0] * slots
+        self._latest: Optional[RawFrame] = None
+        self._cond = threading.Condition()
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.buffers.shape[1], self.buffers.shape[2]
+
+    def acquire(self) -> Optional[int]:
+        with self._cond:
+            newest = self._latest.slot if self._latest is not None else -1
+            for i in range(1, len(self.buffers) + 1):
+                slot = (newest + i) % len(self.buffers)
+                if slot != newest and not self._readers[slot]:
+                    # Invalidate handles on the slot before it is overwritten
+                    self._generations[slot] = 0
+                    return slot
+            return None
+
+    def publish(
+        self,
+        slot: int,
+        captured_at: float,
+        monitor: Dict[str, int],
+        postprocess: Optional[Callable[[Image.Image], Image.Image]] = None,
+    ) -> RawFrame:
+        with self._cond:
+            self.generation += 1
+            self._generations[slot] = self.generation
+            self._latest = RawFrame(self, slot, self.generation, captured_at, monitor, postprocess)
+            self._cond.notify_all()
+            return self._latest
+
+    def latest(self) -> Optional[RawFrame]:
+        with self._cond:
+            return self._latest
+
+    def wait(self, after: int, timeout: Optional[float] = None) -> Optional[RawFrame]:
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.generation > after, timeout):
+                return None
+            return self._latest
+
+    @contextmanager
+    def reading(self, raw: RawFrame) -> Iterator[Optional[np.ndarray]]:
+        with self._cond:
+            if self._generations[raw.slot] != raw.generation:
+                current = False
+            else:
+                current = True
+                self._readers[raw.slot] += 1
+        try:
+            yield self.buffers[raw.slot] if current else None
+        finally:
+            if current:
+                with self._cond:
+                    self._readers[raw.slot] -= 1
+
+class BufferedMssSource(MssSource):
+    def __init__(
+        self,
+        region: str = "full",
+        monitor_index: int = 1,
+        target_width: Optional[int] = None,
+        fps: Optional[float] = None,
+        buffers: int = 3,
+        timeout: float = 2.0,
+    ):
+        """
+        Live screen capture on a dedicated thread, into a ring of reused BGRA buffers.
+
+        The thread copies each grab into a preallocated `FrameRing` slot, with no colour
+        conversion. `grab()` returns the newest frame as a `Frame` holding only a
+        `RawFrame` handle, and `Frame.load()` converts it to RGB and downscales it. So
+        capturing at a high rate costs one memcpy per frame, and frames which are
+        dropped between inference requests are never converted.
+
+        Note:
+            mss allocates a new buffer for every grab and cannot write into the caller's
+            memory, so that one copy remains. The ring keeps everything after it free of
+            allocation.
+
+        Attributes:
+            fps (float): The capture thread's frame rate, which should match the rate frames
+                are consumed at. None uses `BUFFERED_FPS`.
+            buffers (int): The number of ring slots, 2 for double or 3 for triple buffering.
+            timeout (float): Seconds `grab()` waits for a new frame before giving up.
+            ring (Optional[FrameRing]): The frame buffers, allocated on the first grab.
+            dropped (int): Grabs discarded because every slot was being read.
+
+        Methods:
+            latest() -> Optional[Frame]:
+                Returns the newest frame without waiting for a new one.
+        """
+        super().__init__(region, monitor_index, target_width, fps or BUFFERED_FPS)
+        self.buffers = buffers
+        self.timeout = timeout
+        self.ring: Optional[FrameRing] = None
+        self.dropped = 0
+        self._seen: Tuple[Optional[FrameRing], int] = (None, 0)
+        self._error: Optional[BaseException] = None
+        self._started = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _capture(self):
+        self._open()
+        monitor = region_monitor(self.region, self.sct.monitors[self.monitor_index])
+        with metrics.time("capture"):
+            screenshot = self.sct.grab(monitor)
+        captured_at = time.monotonic()
+        width, height = screenshot.size
+        if self.ring is None or self.ring.shape != (height, width):
+            self.ring = FrameRing((height, width), self.buffers)
+            self._started.set()
+        slot = self.ring.acquire()
+        if slot is None:
+            self.dropped += 1
+            return
+        np.copyto(self.ring.buffers[slot], np.frombuffer(screenshot.raw, dtype=np.uint8).reshape(height, width, 4))
+        geometry = self.geometry
+        self.ring.publish(slot, captured_at, monitor, lambda img: geometry.downscale(img, monitor))
+
+    def _run(self):
+        next_at = 0.0
+        try:
+            while not self._stopped.is_set():
+                if self.fps:
+                    now = time.monotonic()
+                    if next_at > now:
+                        time.sleep(next_at - now)
+                    next_at = max(now, next_at) + 1 / self.fps
+                self._capture()
+        except Exception as e:
+            self._error = e
+            self._started.set()
+        finally:
+            if self.sct is not None:
+                self.sct.close()
+                self.sct = None
+
+    def _frame(self, raw: RawFrame) -> Frame:
+        self._seen = (raw.ring, raw.generation)
+        return Frame(monitor=raw.monitor, captured_at=raw.captured_at, raw=raw)
+
+    def grab(self) -> Optional[Frame]:
+        # The capture thread paces itself, so grab() only waits for its next frame
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="capture", daemon=True)
+            self._thread.start()
+        self._started.wait(self.timeout)
+        if self._error is not None:
+            raise self._error
+        ring = self.ring
+        if ring is None:
+            return None
+        seen_ring, generation = self._seen
+        raw = ring.wait(generation if seen_ring is ring else 0, self.timeout)
+        return self._frame(raw) if raw is not None else None
+
+    def latest(self) -> Optional[Frame]:
+        raw = self.ring.latest() if self.ring is not None else None
+        return Frame(monitor=raw.monitor, captured_at=raw.captured_at, raw=raw) if raw is not None else None
+
+    def close(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+class ReplaySource(CaptureSource):
+    def __init__(self, path: Union[str, Path], pattern: str = "*.png", loop: bool = True, fps: Optional[float] = None):
+        """
+        Replays recorded frames from a session recording, a directory of images or a video file.
+
+        Attributes:
+            path (Path): A session recorded by `SessionRecorder`, a directory of images
+                (e.g. ./dataset) or a video file.
+            pattern (str): Glob pattern used to select images from a directory.
+            loop (bool): Restart from the first frame when the recording ends.
+
+        Note:
+            Video files require OpenCV (`opencv-python`), which is imported lazily.
+        """
+        super().__init__(fps)
+        self.path = Path(path)
+        self.loop = loop
+        self.index = 0
+        self.video = None
+        self.recording: Optional[SessionReader] = None
+        self.files: List[Path] = []
+        if SessionReader.is_recording(self.path):
+            self.recording = SessionReader(self.path)
+            if not len(self.recording):
+                raise FileNotFoundError(f"The recording {self.path} contains no frames.")
+        elif self.path.is_dir():
+            self.files = sorted(self.path.glob(pattern))
+            if not self.files:
+                raise FileNotFoundError(f"No frames matching {pattern} in {self.path}.")
+        elif self.path.exists():
+            try:
+                import cv2
+            except ImportError as e:
+                raise ImportError("Replaying video files requires opencv-python.") from e
+            self.video = cv2.VideoCapture(str(self.path))
+        else:
+            raise FileNotFoundError(f"The replay source {self.path} does not exist.")
+
+    def _read_video(self) -> Optional[Image.Image]:
+        import cv2
+        ok, bgr = self.video.read()
+        if not ok and self.loop:
+            self.video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, bgr = self.video.read()
+        if not ok:
+            return None
+        return Image.fromarray(cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB))
+
+    def _grab(self) -> Optional[Frame]:
+        if self.recording is not None:
+            if self.index >= len(self.recording):
+                if not self.loop:
+                    return None
+                self.index = 0
+            img, meta = self.recording[self.index]
+            self.index += 1
+            monitor = meta.get("monitor") or {"left": 0, "top": 0, "width": img.size[0], "height": img.size[1]}
+            return Frame(image=img, monitor=monitor)
+        if self.video is not None:
+            img = self._read_video()
+        else:
+            if self.index >= len(self.files):
+                if not self.loop:
+                    return None
+                self.index = 0
+            with Image.open(self.files[self.index]) as f:
+                img = f.convert('RGB')
+        if img is None:
+            return None
+        self.index += 1
+        monitor = {"left": 0, "top": 0, "width": img.size[0], "height": img.size[1]}
+        return Frame(image=img, monitor=monitor)
+
+    def close(self):
+        if self.video is not None:
+            self.video.release()
+            self.video = None
+
+class SyntheticSource(CaptureSource):
+    def __init__(self, size: Tuple[int, int] = (1280, 720), radius: int = 30, speed: float = 120.0, fps: Optional[float] = None):
+        """
+        Generates synthetic frames of a target moving across a static background.
+
+        The target is a filled circle with an HP bar above it, moving on a Lissajous
+        path. Its true position is exposed, so localisation accuracy can be measured
+        alongside latency.
+
+        Attributes:
+            size (Tuple[int, int]): The (width, height) of generated frames.
+            radius (int): Radius of the target in pixels.
+            speed (float): Approximate target speed in pixels per second.
+            target (Tuple[int, int]): Centre of the target in the most recent frame.
+        """
+        super().__init__(fps)
+        self.size = size
+        self.radius = radius
+        self.speed = speed
+        self.target = (size[0] // 2, size[1] // 2)
+        self._start = time.monotonic()
+        self._background = Image.new('RGB', size, (28, 52, 36))
+        draw = ImageDraw.Draw(self._background)
+        for x in range(0, size[0], 80):
+            draw.line([(x, 0), (x, size[1])], fill=(34, 60, 42))
+        for y in range(0, size[1], 80):
+            draw.line([(0, y), (size[0], y)], fill=(34, 60, 42))
+
+    def target_at(self, t: float) -> Tuple[int, int]:
+        w, h = self.size
+        margin = self.radius * 3
+        ax, ay = (w - 2 * margin) / 2, (h - 2 * margin) / 2
+        # Angular rate giving roughly `speed` pixels per second along the path
+        omega = self.speed / max(ax, ay, 1)
+        return (
+            round(w / 2 + ax * math.sin(omega * t)),
+            round(h / 2 + ay * math.sin(2 * omega * t)),
+        )
+
+    def _grab(self) -> Frame:
+        self.target = x, y = self.target_at(time.monotonic() - self._start)
+        r = self.radius
+        img = self._background.copy()
+        draw = ImageDraw.Draw(img)
+        draw.ellipse([x - r, y - r, x + r, y + r], fill=(70, 120, 220))
+        draw.rectangle([x - r, y - r - 14, x + r, y - r - 8], fill=(20, 20, 20))
+        draw.rectangle([x - r + 1, y - r - 13, x + r // 2, y - r - 9], fill=(200, 60, 50))
+        monitor: Dict[str, int] = {"left": 0, "top": 0, "width": self.size[0], "height": self.size[1]}
+        return Frame(image=img, monitor=monitor, truth=self.target)
+
+def make_source(kind: str, **kwargs) -> CaptureSource:
+    """
+    Construct a capture source by name.
+
+    Args:
+        kind (str): One of "mss", "mss_buffered", "replay" or "synthetic".
+        **kwargs: Passed to the source's constructor.
+
+    Returns:
+        CaptureSource: The capture source.
+
+    Raises:
+        ValueError: If the source kind is unknown.
+    """
+    sources = {"mss": MssSource, "mss_buffered": BufferedMssSource, "replay": ReplaySource, "synthetic": SyntheticSource}
+    if kind not in sources:
+        raise ValueError(f"Unknown capture source '{kind}'. Expected one of: {', '.join(sources)}")
+    return sources[kind](**kwargs)
@@ -0,0 +1,161 @@
+# Standard library imports
+import asyncio
+from typing import Optional, Sequence, Set
+
+# Third-party imports
+import aiohttp
+import httpx
+
+ANTHROPIC_API_URL = "https://api.anthropic.com"
+
+class ModelClient:
+    def __init__(
+        self,
+        limit: int = 32,
+        limit_per_host: int = 16,
+        keepalive_timeout: float = 60.0,
+        connect_timeout: float = 10.0,
+        read_timeout: float = 120.0,
+        dns_cache_ttl: int = 600,
+        drain_timeout: float = 10.0,
+    ):
+        """
+        Process-wide HTTP client owning keep-alive connection pools for all model calls.
+
+        Opening a new session per request costs a DNS lookup plus a TCP and TLS
+        handshake on every frame and every document. This client keeps one aiohttp
+        session (for the async Anthropic API calls) and one httpx client (for the
+        OpenAI and Bedrock SDKs, which accept an `http_client`), so connections are
+        reused across the capture loop, `Scanner.scan` and every backend.
+
+        Attributes:
+            limit (int): Maximum number of open connections.
+            limit_per_host (int): Maximum number of open connections per host.
+            keepalive_timeout (float): Seconds an idle connection is kept open.
+            connect_timeout (float): Timeout for establishing a connection.
+            read_timeout (float): Timeout for a whole request, including streaming.
+            dns_cache_ttl (int): Seconds resolved addresses are cached for.
+            drain_timeout (float): Seconds a response is read in the background after the
+                caller is done with it, see `release_later()`.
+
+        Methods:
+            session() -> aiohttp.ClientSession:
+                The shared aiohttp session for the running event loop.
+            sync_http_client() -> httpx.Client:
+                The shared httpx client for synchronous SDKs.
+            warm_up(connections: int = 1, urls: Sequence[str] = (ANTHROPIC_API_URL,)):
+                Opens connections ahead of the first request.
+            release_later(response: aiohttp.ClientResponse):
+                Reads the rest of a response in the background, returning its connection
+                to the pool.
+            drained():
+                Waits for responses being read in the background.
+            close():
+                Closes the pools.
+
+        Note:
+            A connection only goes back to the pool once its response has been read to
+            the end. A stream whose answer arrived early with a bounded tail (see
+            `stream_message()`) is handed to `release_later()`. The short tail is read
+            there, so the next request reuses the connection instead of opening a new
+            one. Tails which take longer than `drain_timeout` close their connection.
+        """
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.drain_timeout = drain_timeout
+        self._draining: Set[asyncio.Task] = set()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._sync: Optional[httpx.Client] = None
+
+    def session(self) -> aiohttp.ClientSession:
+        """
+        Return the shared aiohttp session, creating it on first use.
+
+        aiohttp sessions are bound to an event loop, so a new session is created if the
+        previous one was closed or belongs to another loop (e.g. between test cases).
+        """
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_cache_ttl,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.read_timeout, connect=self.connect_timeout),
+            )
+            self._loop = loop
+        return self._session
+
+    def sync_http_client(self) -> httpx.Client:
+        if self._sync is None:
+            self._sync = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=self.limit,
+                    max_keepalive_connections=self.limit_per_host,
+                    keepalive_expiry=self.keepalive_timeout,
+                ),
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+            )
+        return self._sync
+
+    async def warm_up(self, connections: int = 1, urls: Sequence[str] = (ANTHROPIC_API_URL,)):
+        """
+        Open connections ahead of the first request.
+
+        Issues concurrent HEAD requests so DNS is resolved and the TCP and TLS handshakes
+        are done before the first frame is sent. Responses are discarded and failures
+        are only reported, as warm-up is an optimisation.
+
+        Args:
+            connections (int, optional): Connections to open per URL, e.g. the maximum
+                number of overlapping requests. Defaults to 1.
+            urls (Sequence[str], optional): URLs to connect to. Defaults to the Anthropic API.
+        """
+        session = self.session()
+
+        async def ping(url: str):
+            try:
+                async with session.head(url) as response:
+                    await response.read()
+            except aiohttp.ClientError as e:
+                print(f"Connection warm-up to {url} failed: {e}")
+
+        await asyncio.gather(*(ping(url) for url in urls for _ in range(min(connections, self.limit_per_host))))
+
+    def release_later(self, response: aiohttp.ClientResponse):
+        async def drain():
+            try:
+                await asyncio.wait_for(response.read(), self.drain_timeout)
+            except (asyncio.TimeoutError, aiohttp.ClientError):
+                # Closing the connection is cheaper than waiting any longer
+                response.close()
+            finally:
+                response.release()
+
+        task = asyncio.get_running_loop().create_task(drain())
+        self._draining.add(task)
+        task.add_done_callback(self._draining.discard)
+
+    async def drained(self):
+        if self._draining:
+            await asyncio.gather(*self._draining, return_exceptions=True)
+
+    async def close(self):
+        await self.drained()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        if self._sync is not None:
+            self._sync.close()
+            self._sync = None
+
+# Shared by the capture loop, Scanner.scan and the Anthropic, Bedrock and GPT backends
+model_client = ModelClient()
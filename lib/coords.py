@@ -0,0 +1,305 @@
+# Standard library imports
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Sequence, Tuple, Union
+
+THINKING_TAG = re.compile(r'<(/?)thinking>')
+THINKING_BLOCK = re.compile(r'<thinking>.*?(</thinking>|$)', re.DOTALL)
+
+class CoordsStreamParser:
+    def __init__(self, tags: Sequence[str] = ("x", "y"), starts_in_thinking: bool = True):
+        """
+        Incrementally extracts coordinates from a streamed model response.
+
+        Text is fed in as it arrives. As soon as a complete run of the requested tags,
+        e.g. `<x>230</x> <y>440</y>`, has been seen outside of any `<thinking>` block,
+        the coordinates are returned so the action can be fired and the rest of the
+        stream cancelled. Coordinates mentioned while the model is still thinking are
+        ignored, as the coordinate prompts' own example shows the model doing this.
+
+        Attributes:
+            tags (Sequence[str]): The tags to extract, in order, e.g. ("x1", "y1", "x2", "y2")
+                for rectangles.
+            starts_in_thinking (bool): Whether the response starts inside a `<thinking>`
+                block, as it does for `prompt()` and `prompt_rect()` which end with one.
+            text (str): All text fed so far.
+            result (Optional[Tuple[int, ...]]): The extracted coordinates, once complete.
+
+        Methods:
+            feed(text: str) -> Optional[Tuple[int, ...]]:
+                Adds streamed text, returning the coordinates once they are complete.
+        """
+        self.tags = tuple(tags)
+        self.starts_in_thinking = starts_in_thinking
+        self.text = ""
+        self.result: Optional[Tuple[int, ...]] = None
+        self._pattern = re.compile(r'\s*'.join(rf'<{t}>\s*(-?\d+)\s*</{t}>' for t in self.tags))
+
+    def _outside_thinking(self) -> str:
+        parts = []
+        in_thinking = self.starts_in_thinking
+        pos = 0
+        for match in THINKING_TAG.finditer(self.text):
+            if not in_thinking:
+                parts.append(self.text[pos:match.start()])
+            in_thinking = not match.group(1)
+            pos = match.end()
+        if not in_thinking:
+            parts.append(self.text[pos:])
+        return " ".join(parts)
+
+    def feed(self, text: str) -> Optional[Tuple[int, ...]]:
+        if self.result is not None:
+            return self.result
+        self.text += text
+        # Only search when the closing tag of the last coordinate has just arrived,
+        # allowing for it being split across chunks
+        closing = f"</{self.tags[-1]}>"
+        if closing in self.text[-(len(text) + len(closing)):]:
+            match = self._pattern.search(self._outside_thinking())
+            if match:
+                self.result = tuple(int(v) for v in match.groups())
+        return self.result
+
+class MultiCoordsStreamParser(CoordsStreamParser):
+    def __init__(self, names: Sequence[str], tags: Sequence[str] = ("x", "y"), starts_in_thinking: bool = True):
+        """
+        Incrementally extracts keyed coordinates for several targets from one streamed response.
+
+        Each target is answered in its own block, e.g.
+        `<coords name="blue_buff"><x>230</x><y>440</y></coords>`. Blocks are collected in
+        `results` as soon as they complete, and `feed()` returns the full dict once every
+        target has been answered, so the rest of the stream can be cancelled.
+
+        Attributes:
+            names (Tuple[str, ...]): The target names, as used in the blocks' name attribute.
+            results (Dict[str, Tuple[int, ...]]): Coordinates of the targets answered so far.
+
+        Methods:
+            feed(text: str) -> Optional[Dict[str, Tuple[int, ...]]]:
+                Adds streamed text, returning the coordinates of every target once complete.
+        """
+        super().__init__(tags, starts_in_thinking=starts_in_thinking)
+        self.names = tuple(names)
+        self.results: Dict[str, Tuple[int, ...]] = {}
+        self._pattern = multi_coords_pattern(self.tags)
+
+    def feed(self, text: str) -> Optional[Dict[str, Tuple[int, ...]]]:
+        if self.result is not None:
+            return self.result
+        self.text += text
+        if "</coords>" in self.text[-(len(text) + len("</coords>")):]:
+            for match in self._pattern.finditer(self._outside_thinking()):
+                name = match.group(1)
+                if name in self.names and name not in self.results:
+                    self.results[name] = tuple(int(v) for v in match.groups()[1:])
+            if len(self.results) == len(self.names):
+                self.result = dict(self.results)
+        return self.result
+
+def multi_coords_pattern(tags: Sequence[str]) -> "re.Pattern":
+    return re.compile(
+        r"""<coords\s+name=["']?([\w-]+)["']?\s*>\s*"""
+        + r'\s*'.join(rf'<{t}>\s*(-?\d+)\s*</{t}>' for t in tags)
+        + r'\s*</coords>'
+    )
+
+def parse_multi_coords(text: str, names: Optional[Sequence[str]] = None, tags: Sequence[str] = ("x", "y")) -> Dict[str, Tuple[int, ...]]:
+    """
+    Parse every keyed `<coords name="...">` block of a complete response.
+
+    Args:
+        text (str): The response text, including any prefill.
+        names (Sequence[str], optional): Only keep these targets. Defaults to None, keeping all.
+        tags (Sequence[str], optional): The coordinate tags of each block. Defaults to ("x", "y").
+
+    Returns:
+        Dict[str, Tuple[int, ...]]: The first coordinates given for each target.
+    """
+    results: Dict[str, Tuple[int, ...]] = {}
+    for match in multi_coords_pattern(tags).finditer(THINKING_BLOCK.sub("", text)):
+        name = match.group(1)
+        if (names is None or name in names) and name not in results:
+            results[name] = tuple(int(v) for v in match.groups()[1:])
+    return results
+
+def answer_targets(
+    coords: Optional[Union[Tuple[int, ...], Dict[str, Tuple[int, ...]]]],
+    text: str,
+    names: Sequence[str],
+    tags: Sequence[str] = ("x", "y"),
+    local: bool = False,
+) -> Dict[str, Tuple[int, ...]]:
+    """
+    The coordinates of each target of a multi-target request.
+
+    Args:
+        coords: The streamed result of a `MultiCoordsStreamParser`, or the coordinates
+            of a local result, e.g. a template match or an HP bar.
+        text (str): The response text, parsed when the stream did not complete.
+        names (Sequence[str]): The target names, in order.
+        tags (Sequence[str], optional): The coordinate tags of each block. Defaults to ("x", "y").
+        local (bool, optional): Whether `coords` is a local result for a single point,
+            which is assigned to the first target. Defaults to False.
+
+    Returns:
+        Dict[str, Tuple[int, ...]]: The coordinates of each target found.
+    """
+    if local:
+        return {names[0]: tuple(coords)} if coords else {}
+    if coords:
+        return dict(coords)
+    return parse_multi_coords(text, names, tags)
+
+def to_point(coords: Tuple[int, ...]) -> Tuple[int, int]:
+    """
+    The point to act on for parsed coordinates: the point itself, or a rectangle's centre.
+    """
+    if len(coords) == 4:
+        return (coords[0] + coords[2]) // 2, (coords[1] + coords[3]) // 2
+    return coords[0], coords[1]
+
+coords_prompt = lambda target, thinking: f"""Give me the co-ordinates to click on {target}
+
+Answer with the pixel co-ordinates in the image, in the format:
+<coords>{"<thinking>one or two short sentences locating the target</thinking>" if thinking else ""}<x>230</x><y>440</y></coords>
+
+<x></x> and <y></y> MUST BOTH ONLY CONTAIN SINGLE INTEGER VALUES.
+IF YOU CAN NOT FULFILL THE USERS TASK, RETURN <x>0</x> <y>0</y>"""
+
+coords_rect_prompt = lambda target, thinking: f"""Give me the co-ordinates to draw a rectangle around {target}
+
+Answer with the pixel co-ordinates of the top-left and bottom-right corners in the image, in the format:
+<coords>{"<thinking>one or two short sentences locating the target</thinking>" if thinking else ""}<x1>230</x1><y1>440</y1><x2>300</x2><y2>500</y2></coords>
+
+<x1></x1> and <y1></y1> and <x2></x2> and <y2></y2> MUST ALL ONLY CONTAIN SINGLE INTEGER VALUES.
+IF YOU CAN NOT FULFILL THE USERS TASK, RETURN <x1>0</x1> <y1>0</y1> <x2>0</x2> <y2>0</y2>"""
+
+def multi_coords_prompt(targets: Dict[str, str], rect: bool, thinking: bool) -> str:
+    """
+    Build a prompt locating several named targets in one image.
+
+    Args:
+        targets (Dict[str, str]): Target descriptions keyed by name. Names must be word
+            characters or dashes, e.g. {"blue_buff": "Blue Buff", "enemy": "the enemy champion"}.
+        rect (bool): Ask for rectangles (x1, y1, x2, y2) instead of points.
+        thinking (bool): Allow a short `<thinking>` block before the answers.
+
+    Returns:
+        str: The prompt.
+    """
+    tags = RECT_TAGS if rect else ("x", "y")
+    example = "".join(f"<{t}>{v}</{t}>" for t, v in zip(tags, (230, 440, 300, 500)))
+    lines = "\n".join(f"- {name}: {description}" for name, description in targets.items())
+    zeros = "".join(f"<{t}>0</{t}>" for t in tags)
+    action = "draw a rectangle around" if rect else "click on"
+    return f"""Give me the co-ordinates to {action} each of these targets, keyed by name:
+{lines}
+
+Answer with one block per target, in the listed order, in the format:
+<targets>{"<thinking>one or two short sentences locating the targets</thinking>" if thinking else ""}
+<coords name="{next(iter(targets))}">{example}</coords>
+...
+</targets>
+
+Every value MUST ONLY CONTAIN A SINGLE INTEGER VALUE.
+IF YOU CAN NOT FIND A TARGET, RETURN {zeros} FOR IT."""
+
+@dataclass(frozen=True)
+class RequestProfile:
+    """
+    Request parameters for a coordinate task.
+
+    Low-latency profiles prefill the assistant turn so the model starts writing the
+    answer immediately, stop generating at `</coords>` and cap the output tokens.
+    Without thinking, the prefill already opens the first coordinate tag, so the
+    whole response is only a handful of tokens.
+
+    Attributes:
+        prompt (Callable[[str], str]): Builds the user prompt for a target.
+        max_tokens (int): Output token cap.
+        prefill (str): Start of the assistant turn. The API rejects prefills ending in
+            whitespace.
+        stop_sequences (Tuple[str, ...]): Sequences which end generation.
+        tags (Tuple[str, ...]): The coordinate tags the response contains, in order.
+        starts_in_thinking (bool): Whether the response starts inside a `<thinking>`
+            block, see `CoordsStreamParser`.
+    """
+    prompt: Callable[[str], str]
+    max_tokens: int = 4096
+    prefill: str = ""
+    stop_sequences: Tuple[str, ...] = ()
+    tags: Tuple[str, ...] = ("x", "y")
+    starts_in_thinking: bool = True
+
+    def parser(self, names: Optional[Sequence[str]] = None) -> CoordsStreamParser:
+        """
+        Create a streaming parser for a response to this profile.
+
+        Args:
+            names (Sequence[str], optional): Target names of a multi-target request, see
+                `MULTI_PROFILES`. Defaults to None for a single target.
+
+        Returns:
+            CoordsStreamParser: The parser, a `MultiCoordsStreamParser` when names are given.
+        """
+        if names is not None:
+            return MultiCoordsStreamParser(names, self.tags, starts_in_thinking=self.starts_in_thinking)
+        return CoordsStreamParser(self.tags, starts_in_thinking=self.starts_in_thinking)
+
+RECT_TAGS = ("x1", "y1", "x2", "y2")
+
+PROFILES: Dict[str, RequestProfile] = {
+    # Short reasoning before answering
+    "fast": RequestProfile(
+        prompt=lambda target: coords_prompt(target, True),
+        max_tokens=256,
+        prefill="<coords><thinking>",
+        stop_sequences=("</coords>",),
+        starts_in_thinking=False,
+    ),
+    # Answer only, the prefill opens the first coordinate
+    "instant": RequestProfile(
+        prompt=lambda target: coords_prompt(target, False),
+        max_tokens=24,
+        prefill="<coords><x>",
+        stop_sequences=("</coords>",),
+        starts_in_thinking=False,
+    ),
+    "fast_rect": RequestProfile(
+        prompt=lambda target: coords_rect_prompt(target, True),
+        max_tokens=256,
+        prefill="<coords><thinking>",
+        stop_sequences=("</coords>",),
+        tags=RECT_TAGS,
+        starts_in_thinking=False,
+    ),
+    "instant_rect": RequestProfile(
+        prompt=lambda target: coords_rect_prompt(target, False),
+        max_tokens=48,
+        prefill="<coords><x1>",
+        stop_sequences=("</coords>",),
+        tags=RECT_TAGS,
+        starts_in_thinking=False,
+    ),
+}
+
+# Several named targets per request, sharing one image upload. Prompts take a dict of
+# target descriptions keyed by name, and parsers the names, see `RequestProfile.parser()`
+MULTI_PROFILES: Dict[str, RequestProfile] = {
+    "multi": RequestProfile(
+        prompt=lambda targets: multi_coords_prompt(targets, False, True),
+        max_tokens=512,
+        prefill="<targets><thinking>",
+        stop_sequences=("</targets>",),
+        starts_in_thinking=False,
+    ),
+    "multi_rect": RequestProfile(
+        prompt=lambda targets: multi_coords_prompt(targets, True, True),
+        max_tokens=640,
+        prefill="<targets><thinking>",
+        stop_sequences=("</targets>",),
+        tags=RECT_TAGS,
+        starts_in_thinking=False,
+    ),
+}
@@ -0,0 +1,68 @@
+# Standard library imports
+from typing import Dict, Optional, Tuple
+
+# Third-party imports
+from PIL import Image
+
+class DisplayGeometry:
+    def __init__(self, monitor: Dict[str, int], target_width: Optional[int] = None):
+        """
+        Maps between captured pixels, images sent to the model and screen points.
+
+        On HiDPI (e.g. Retina) displays, mss captures at the backing pixel resolution,
+        a multiple of the point space that mouse events are posted in. Frames are
+        downscaled at capture time to point resolution, or to any smaller target
+        resolution, from whatever size they were captured at, so the scale factor never
+        has to be known. Model coordinates are mapped back to screen points by
+        `regions.to_screen()`, from the size of the image sent.
+
+        Attributes:
+            monitor (Dict[str, int]): The mss monitor dict, in screen points.
+            target_width (Optional[int]): Width the full monitor is scaled to before being
+                sent. None sends frames at point resolution.
+
+        Methods:
+            output_size(captured: Dict[str, int]) -> Tuple[int, int]:
+                The size an image of a captured region is downscaled to.
+            downscale(img: Image.Image, captured: Dict[str, int]) -> Image.Image:
+                Downscales a captured image to its output size.
+        """
+        self.monitor = monitor
+        self.target_width = target_width
+
+    @property
+    def output_scale(self) -> float:
+        """Output pixels per screen point."""
+        if self.target_width is None:
+            return 1.0
+        return min(1.0, self.target_width / self.monitor["width"])
+
+    def output_size(self, captured: Dict[str, int]) -> Tuple[int, int]:
+        return (
+            max(1, round(captured["width"] * self.output_scale)),
+            max(1, round(captured["height"] * self.output_scale)),
+        )
+
+    def downscale(self, img: Image.Image, captured: Dict[str, int]) -> Image.Image:
+        """
+        Downscale a captured image to its output size.
+
+        Integer factors are handled by `Image.reduce()`, a fast box reducer, and any
+        remaining fractional factor by a box-filtered resize.
+
+        Args:
+            img (Image.Image): The captured image, in backing pixels.
+            captured (Dict[str, int]): The partial monitor dict it was captured from.
+
+        Returns:
+            Image.Image: The downscaled image. The input is returned if already small enough.
+        """
+        size = self.output_size(captured)
+        if img.size == size:
+            return img
+        factor = int(min(img.size[0] / size[0], img.size[1] / size[1]))
+        if factor > 1:
+            img = img.reduce(factor)
+        if img.size != size:
+            img = img.resize(size, Image.BOX)
+        return img
@@ -0,0 +1,212 @@
+# Standard library imports
+import base64
+import io
+import math
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Optional, Sequence, Tuple, Union
+
+# Third-party imports
+from PIL import Image
+
+def anthropic_image_tokens(width: int, height: int) -> int:
+    # https://docs.anthropic.com/en/docs/build-with-claude/vision
+    return math.ceil(width * height / 750)
+
+def openai_image_tokens(width: int, height: int) -> int:
+    # High detail: fit within 2048x2048, scale the shortest side down to 768, then
+    # 170 tokens per 512px tile plus a fixed 85
+    scale = min(1.0, 2048 / max(width, height))
+    scale = min(scale, 768 / min(width, height))
+    tiles = math.ceil(width * scale / 512) * math.ceil(height * scale / 512)
+    return 85 + 170 * tiles
+
+@dataclass(frozen=True)
+class Provider:
+    """
+    Image limits of a model provider.
+
+    Attributes:
+        name (str): The provider name.
+        tokens (Callable[[int, int], int]): Estimated input tokens for an image of a given size.
+        max_tokens (int): Images costing more are downscaled by the provider, so they are
+            downscaled here first, keeping coordinates in the sent image's pixel space.
+        max_edge (int): Maximum length of the longest edge.
+        max_bytes (int): Maximum size of the base64 encoded image.
+    """
+    name: str
+    tokens: Callable[[int, int], int]
+    max_tokens: int
+    max_edge: int
+    max_bytes: int
+
+PROVIDERS: Dict[str, Provider] = {
+    "anthropic": Provider("anthropic", anthropic_image_tokens, max_tokens=1600, max_edge=1568, max_bytes=5 * 1024 * 1024),
+    "bedrock": Provider("bedrock", anthropic_image_tokens, max_tokens=1600, max_edge=1568, max_bytes=3750 * 1024),
+    "openai": Provider("openai", openai_image_tokens, max_tokens=1105, max_edge=2048, max_bytes=20 * 1024 * 1024),
+}
+
+# (quality, chroma subsampling) pairs tried in order until the image fits the byte
+# budget. Subsampling 0 is 4:4:4, which keeps small coloured HUD text legible, and
+# 2 is 4:2:0. WebP is always 4:2:0
+QUALITY_LADDER: Tuple[Tuple[int, int], ...] = ((90, 0), (85, 2), (75, 2), (60, 2), (45, 2))
+
+MEDIA_TYPES = {"jpeg": "image/jpeg", "webp": "image/webp"}
+
+@dataclass
+class EncodedImage:
+    """
+    An image encoded for a model request, with the parameters chosen to encode it.
+
+    Attributes:
+        data (bytes): The encoded image.
+        media_type (str): e.g. "image/jpeg".
+        size (Tuple[int, int]): The (width, height) sent. Coordinates returned by the
+            model are in this pixel space.
+        original_size (Tuple[int, int]): The (width, height) before resizing.
+        quality (int): The encoder quality.
+        subsampling (int): The JPEG chroma subsampling, 0 (4:4:4) or 2 (4:2:0).
+        tokens (int): The estimated image input tokens.
+    """
+    data: bytes
+    media_type: str
+    size: Tuple[int, int]
+    original_size: Tuple[int, int]
+    quality: int
+    subsampling: int
+    tokens: int
+
+    @property
+    def scale(self) -> float:
+        return self.size[0] / self.original_size[0]
+
+    def base64(self) -> str:
+        return base64.b64encode(self.data).decode('utf-8')
+
+    def describe(self) -> Dict[str, object]:
+        return {
+            "media_type": self.media_type,
+            "size": list(self.size),
+            "original_size": list(self.original_size),
+            "quality": self.quality,
+            "subsampling": self.subsampling,
+            "bytes": len(self.data),
+            "tokens": self.tokens,
+        }
+
+def load_image(image: Union[str, Path, Image.Image, bytes]) -> Image.Image:
+    """
+    Resolve a path, PIL image or encoded image buffer to an RGB PIL image.
+
+    Transparency is flattened onto a white background.
+
+    Args:
+        image (str | Path | Image.Image | bytes): The image source.
+
+    Returns:
+        Image.Image: The RGB image. RGB PIL images are returned as-is.
+    """
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        image = Image.open(io.BytesIO(image))
+    elif not isinstance(image, Image.Image):
+        image = Image.open(image)
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        # Paste the image on a white background using its alpha channel as mask
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.split()[3])
+        return background
+    if image.mode != 'RGB':
+        return image.convert('RGB')
+    return image
+
+class ImageEncoder:
+    def __init__(
+        self,
+        provider: str = "anthropic",
+        max_tokens: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        format: str = "jpeg",
+        ladder: Sequence[Tuple[int, int]] = QUALITY_LADDER,
+    ):
+        """
+        Encodes images for model requests within an image-token and byte budget.
+
+        The image is downscaled (never upscaled) to the largest size whose estimated
+        token cost, from the provider's formula, fits both `max_tokens` and the provider's
+        own limits. It is then encoded at the first quality and chroma subsampling of
+        `ladder` which fits the byte budget, downscaling further if none does. Smaller
+        budgets trade localisation accuracy for upload and prefill latency.
+
+        Attributes:
+            provider (Provider): The provider's token formula and limits, see `PROVIDERS`.
+            max_tokens (Optional[int]): Image-token budget. None uses the provider limit.
+            max_bytes (Optional[int]): Byte budget for the base64 encoded image. None uses
+                the provider limit.
+            format (str): "jpeg" or "webp".
+            ladder (Sequence[Tuple[int, int]]): (quality, subsampling) pairs, best first.
+
+        Methods:
+            fit(width: int, height: int) -> Tuple[int, int]:
+                The largest size within the token and edge limits.
+            encode(image) -> EncodedImage:
+                Encodes an image within the budget. CPU-bound, run it in an executor
+                from async code.
+
+        Raises:
+            KeyError: If the provider is unknown.
+            ValueError: If the format is not supported.
+        """
+        if format not in MEDIA_TYPES:
+            raise ValueError(f"Unsupported image format '{format}'. Expected one of: {', '.join(MEDIA_TYPES)}")
+        self.provider = PROVIDERS[provider]
+        self.max_tokens = min(max_tokens or self.provider.max_tokens, self.provider.max_tokens)
+        self.max_bytes = min(max_bytes or self.provider.max_bytes, self.provider.max_bytes)
+        self.format = format
+        self.ladder = tuple(ladder)
+
+    def fit(self, width: int, height: int) -> Tuple[int, int]:
+        scale = min(1.0, self.provider.max_edge / max(width, height))
+        size = lambda s: (max(1, int(width * s)), max(1, int(height * s)))
+        if self.provider.tokens(*size(scale)) <= self.max_tokens:
+            return size(scale)
+        # Token cost grows monotonically with the scale, so bisect for the largest fit
+        lo, hi = 0.0, scale
+        for _ in range(20):
+            mid = (lo + hi) / 2
+            if self.provider.tokens(*size(mid)) <= self.max_tokens:
+                lo = mid
+            else:
+                hi = mid
+        return size(lo)
+
+    def _save(self, img: Image.Image, quality: int, subsampling: int) -> bytes:
+        buffer = io.BytesIO()
+        if self.format == "webp":
+            img.save(buffer, "WEBP", quality=quality, method=4)
+        else:
+            img.save(buffer, "JPEG", quality=quality, subsampling=subsampling)
+        return buffer.getvalue()
+
+    def encode(self, image: Union[str, Path, Image.Image, bytes]) -> EncodedImage:
+        img = load_image(image)
+        original_size = img.size
+        size = self.fit(*img.size)
+        while True:
+            resized = img if size == img.size else img.resize(size, Image.BILINEAR, reducing_gap=2.0)
+            for quality, subsampling in self.ladder:
+                data = self._save(resized, quality, subsampling)
+                # base64 expands the payload by 4/3
+                if 4 * math.ceil(len(data) / 3) <= self.max_bytes:
+                    return EncodedImage(
+                        data=data,
+                        media_type=MEDIA_TYPES[self.format],
+                        size=size,
+                        original_size=original_size,
+                        quality=quality,
+                        subsampling=subsampling if self.format == "jpeg" else 2,
+                        tokens=self.provider.tokens(*size),
+                    )
+            if max(size) <= 64:
+                raise ValueError(f"Image cannot be encoded within {self.max_bytes} bytes.")
+            size = (max(1, int(size[0] * 0.8)), max(1, int(size[1] * 0.8)))
@@ -0,0 +1,287 @@
+# Standard library imports
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# Third-party imports
+import numpy as np
+from PIL import Image
+
+def frame_fingerprint(img: Image.Image, size: Tuple[int, int] = (64, 36)) -> np.ndarray:
+    """
+    Compute a cheap fingerprint of a frame for change detection.
+
+    The frame is converted to grayscale and box-downsampled to a small thumbnail,
+    which removes sensor noise, cursor flicker and compression artefacts while
+    keeping the overall layout of the screen.
+
+    Args:
+        img (Image.Image): The captured frame.
+        size (Tuple[int, int], optional): The (width, height) of the thumbnail. Defaults to (64, 36).
+
+    Returns:
+        np.ndarray: A (height, width) float32 array of grayscale intensities in [0, 255].
+    """
+    thumb = img.convert('L').resize(size, Image.BOX)
+    return np.asarray(thumb, dtype=np.float32)
+
+def fingerprint_distance(a: np.ndarray, b: np.ndarray) -> float:
+    """
+    Mean absolute difference between two fingerprints.
+
+    Args:
+        a (np.ndarray): The first fingerprint.
+        b (np.ndarray): The second fingerprint, of the same shape.
+
+    Returns:
+        float: The mean absolute intensity difference, between 0 (identical) and 255.
+    """
+    return float(np.abs(a - b).mean())
+
+class FrameGate:
+    def __init__(self, threshold: float = 4.0, size: Tuple[int, int] = (64, 36)):
+        """
+        Skips model calls when the screen has not meaningfully changed.
+
+        Each frame is fingerprinted and compared with the fingerprint of the last frame
+        which was actually sent to the model. Frames closer than `threshold` are
+        considered unchanged, and the action computed for the last sent frame can be
+        reused instead of making another request.
+
+        Attributes:
+            threshold (float): The mean absolute grayscale difference (0-255) below which
+                a frame is considered unchanged.
+            size (Tuple[int, int]): The fingerprint thumbnail size.
+            last_action (Any): The action computed for the last sent frame, if any.
+            sent (int): The number of frames let through the gate.
+            skipped (int): The number of frames skipped by the gate.
+
+        Methods:
+            fingerprint(img: Image.Image) -> np.ndarray:
+                Fingerprints a frame.
+            changed(fp: np.ndarray) -> bool:
+                Whether a fingerprint differs enough from the last sent frame.
+            accept(fp: np.ndarray, action: Any = None):
+                Records a fingerprint as sent, along with the resulting action.
+        """
+        self.threshold = threshold
+        self.size = size
+        self.last_fingerprint: Optional[np.ndarray] = None
+        self.last_action: Any = None
+        self.sent = 0
+        self.skipped = 0
+
+    def fingerprint(self, img: Image.Image) -> np.ndarray:
+        return frame_fingerprint(img, self.size)
+
+    def changed(self, fp: np.ndarray) -> bool:
+        """
+        Check whether a frame should be sent to the model.
+
+        Args:
+            fp (np.ndarray): The fingerprint of the current frame.
+
+        Returns:
+            bool: True if there is no previously sent frame or the difference is at least
+                  the threshold, False if the frame should be skipped.
+        """
+        if self.last_fingerprint is None or fingerprint_distance(fp, self.last_fingerprint) >= self.threshold:
+            return True
+        self.skipped += 1
+        return False
+
+    def accept(self, fp: np.ndarray, action: Any = None):
+        """
+        Record a frame as sent once the model call for it has succeeded.
+
+        Args:
+            fp (np.ndarray): The fingerprint of the sent frame.
+            action (Any, optional): The action computed from the frame, reused for
+                subsequent unchanged frames. Defaults to None.
+        """
+        self.last_fingerprint = fp
+        self.last_action = action
+        self.sent += 1
+
+def perceptual_hash(img: Image.Image, size: int = 8, box: Optional[Tuple[int, int, int, int]] = None) -> int:
+    """
+    Compute a difference hash (dHash) of a frame or a region of it.
+
+    The image is reduced to a (size + 1) x size grayscale thumbnail and each bit
+    records whether a pixel is brighter than its left neighbour. Near-identical frames
+    hash to values a few bits apart, so similarity is the Hamming distance.
+
+    Args:
+        img (Image.Image): The frame.
+        size (int, optional): The hash has size * size bits. Defaults to 8.
+        box (Tuple[int, int, int, int], optional): (x1, y1, x2, y2) region to hash.
+            Defaults to None, hashing the whole frame.
+
+    Returns:
+        int: The hash.
+    """
+    if box is not None:
+        img = img.crop(box)
+    thumb = np.asarray(img.convert('L').resize((size + 1, size), Image.BOX), dtype=np.int16)
+    bits = thumb[:, 1:] > thumb[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+class ResultCache:
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl: Optional[float] = 5.0,
+        radius: int = 4,
+        hash_size: int = 8,
+        region_size: float = 0.1,
+    ):
+        """
+        LRU cache of model results keyed by (prompt, perceptual hash of the frame).
+
+        A lookup hits when an entry for the same prompt has a hash within `radius` bits
+        of the frame's hash and is younger than `ttl`, so repeated game states are
+        answered without a model call even when they are not consecutive.
+
+        A small target barely changes the hash of the whole frame, so an entry can also
+        hold the hash of the region around the target it answered. The entry then only
+        hits while that region is unchanged too, and a target which has moved misses.
+
+        Attributes:
+            max_entries (int): Entries kept before the least recently used is evicted.
+            ttl (Optional[float]): Seconds an entry stays valid. None never expires.
+            radius (int): Maximum Hamming distance between hashes for a hit.
+            hash_size (int): See `perceptual_hash()`.
+            region_size (float): Width and height of the region hashed around a target,
+                as a fraction of the frame's.
+            hits (int): Lookups answered from the cache.
+            misses (int): Lookups not answered from the cache.
+            evictions (int): Entries evicted to stay within `max_entries`.
+            expirations (int): Entries dropped because they were older than `ttl`.
+
+        Methods:
+            key(img: Image.Image, box=None) -> int:
+                Hashes a frame or a region of it.
+            get(prompt: Hashable, h: int, img: Optional[Image.Image] = None) -> Optional[Any]:
+                The cached result for the nearest hash within the radius, if any.
+            put(prompt: Hashable, h: int, value: Any, img=None, point=None):
+                Caches a result, optionally with the region around its target.
+            stats() -> Dict[str, int]:
+                Hit, miss, eviction and expiration counts and the current size.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.radius = radius
+        self.hash_size = hash_size
+        self.region_size = region_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        # (prompt, hash) -> (stored at, value, target region and its hash)
+        self._entries: "OrderedDict[Tuple[Hashable, int], Tuple[float, Any, Optional[Tuple[Tuple[float, ...], int]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, img: Image.Image, box: Optional[Tuple[int, int, int, int]] = None) -> int:
+        return perceptual_hash(img, self.hash_size, box)
+
+    def _region_hash(self, img: Image.Image, region: Tuple[float, ...]) -> int:
+        # Regions are stored as fractions, so they resolve against frames of any size
+        x1, y1, x2, y2 = region
+        w, h = img.size
+        return self.key(img, (round(x1 * w), round(y1 * h), round(x2 * w), round(y2 * h)))
+
+    def _expired(self, stored_at: float, now: float) -> bool:
+        return self.ttl is not None and now - stored_at > self.ttl
+
+    def get(self, prompt: Hashable, h: int, img: Optional[Image.Image] = None) -> Optional[Any]:
+        """
+        Look up the result for a frame.
+
+        Args:
+            prompt (Hashable): The prompt the result was computed for.
+            h (int): The frame's hash, see `key()`.
+            img (Optional[Image.Image], optional): The frame, checked against the target
+                region of entries which have one. Such entries never hit without it.
+                Defaults to None.
+
+        Returns:
+            Optional[Any]: The cached result, or None on a miss.
+        """
+        now = time.monotonic()
+        with self._lock:
+            best, best_distance = None, self.radius + 1
+            for key, (stored_at, _, target) in list(self._entries.items()):
+                if self._expired(stored_at, now):
+                    del self._entries[key]
+                    self.expirations += 1
+                    continue
+                if key[0] != prompt:
+                    continue
+                distance = hamming(key[1], h)
+                if distance >= best_distance:
+                    continue
+                # The target may have moved without changing the rest of the frame
+                if target is not None and (img is None or hamming(self._region_hash(img, target[0]), target[1]) > self.radius):
+                    continue
+                best, best_distance = key, distance
+                if distance == 0:
+                    break
+            if best is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(best)
+            return self._entries[best][1]
+
+    def put(
+        self,
+        prompt: Hashable,
+        h: int,
+        value: Any,
+        img: Optional[Image.Image] = None,
+        point: Optional[Tuple[float, float]] = None,
+    ):
+        """
+        Cache a result.
+
+        Args:
+            prompt (Hashable): The prompt the result was computed for.
+            h (int): The frame's hash, see `key()`.
+            value (Any): The result.
+            img (Optional[Image.Image], optional): The frame. Defaults to None.
+            point (Optional[Tuple[float, float]], optional): The target the result aims at,
+                as fractions of the frame's width and height. With `img`, the region
+                around it must be unchanged for the entry to hit. Defaults to None.
+        """
+        target = None
+        if img is not None and point is not None:
+            half = self.region_size / 2
+            region = (
+                min(max(point[0] - half, 0.0), 1.0 - self.region_size),
+                min(max(point[1] - half, 0.0), 1.0 - self.region_size),
+            )
+            region += (region[0] + self.region_size, region[1] + self.region_size)
+            target = (region, self._region_hash(img, region))
+        with self._lock:
+            self._entries[(prompt, h)] = (time.monotonic(), value, target)
+            self._entries.move_to_end((prompt, h))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "size": len(self._entries),
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
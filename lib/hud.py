@@ -0,0 +1,380 @@
+# Standard library imports
+import json
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+# Third-party imports
+import numpy as np
+from PIL import Image
+
+Box = Tuple[int, int, int, int]
+
+GLYPHS_FILE = "glyphs.json"
+# File names of glyphs which are not valid in file names
+GLYPH_NAMES = {"/": "slash", "+": "plus", ".": "dot"}
+# Read in place of a glyph which matches no template
+UNKNOWN = "?"
+# "current / maximum" in an HP or mana bar, which also shows regeneration, e.g. "+1.8"
+BAR_VALUES = re.compile(r"(?<![\d?])(\d+) ?/ ?(\d+)(?![\d?])")
+# Digits and unknown glyphs, so a number with an unrecognised digit is not misread
+NUMBER = re.compile(r"[\d?]+")
+
+def text_mask(rgb: np.ndarray, min_level: int = 130) -> np.ndarray:
+    """
+    Mask the HUD's white and gold text.
+
+    Text is bright in every channel, while the HP and mana bars behind it are bright in
+    only one or two, so the darkest channel separates them without colour ranges.
+
+    Args:
+        rgb (np.ndarray): The (H, W, 3) uint8 region.
+        min_level (int, optional): Minimum value of the darkest channel. Defaults to 130.
+
+    Returns:
+        np.ndarray: The (H, W) boolean mask.
+    """
+    return np.minimum(np.minimum(rgb[..., 0], rgb[..., 1]), rgb[..., 2]) >= min_level
+
+def split_glyphs(mask: np.ndarray, min_pixels: int = 3, aspect: float = 0.7) -> List[Box]:
+    """
+    Split a line of text into glyphs at the empty columns between them.
+
+    Small text is often blurred into touching glyphs, so blobs much wider than a digit
+    are cut into equal parts of about a digit's width.
+
+    Args:
+        mask (np.ndarray): The (H, W) boolean text mask.
+        min_pixels (int, optional): Glyphs with fewer set pixels are dropped as noise.
+            Defaults to 3.
+        aspect (float, optional): Width over height of a digit. Defaults to 0.7.
+
+    Returns:
+        List[Box]: The (x1, y1, x2, y2) of each glyph, from left to right, with x2 and
+        y2 exclusive.
+    """
+    columns = np.pad(mask.any(axis=0), 1).astype(np.int8)
+    edges = np.diff(columns)
+    height = mask.any(axis=1).sum()
+    boxes = []
+    for start, end in zip(np.nonzero(edges == 1)[0], np.nonzero(edges == -1)[0]):
+        parts = max(1, round((end - start) / (aspect * height))) if end - start > 1.5 * aspect * height else 1
+        bounds = np.linspace(start, end, parts + 1).round().astype(int)
+        for x1, x2 in zip(bounds[:-1], bounds[1:]):
+            rows = np.nonzero(mask[:, x1:x2].any(axis=1))[0]
+            if len(rows) and mask[:, x1:x2].sum() >= min_pixels:
+                boxes.append((int(x1), int(rows[0]), int(x2), int(rows[-1]) + 1))
+    return boxes
+
+def normalize_glyph(mask: np.ndarray, size: int = 12) -> np.ndarray:
+    """
+    Scale a glyph to a fixed height, keeping its aspect ratio, on a square canvas.
+
+    Args:
+        mask (np.ndarray): The (h, w) boolean glyph, cropped to its box.
+        size (int, optional): The canvas size in pixels. Defaults to 12.
+
+    Returns:
+        np.ndarray: The (size, size) float32 glyph, from 0 to 1, centred horizontally.
+    """
+    h, w = mask.shape
+    width = max(1, min(size, round(w * size / h)))
+    glyph = Image.fromarray(mask.astype(np.uint8) * 255).resize((width, size), Image.BILINEAR)
+    canvas = np.zeros((size, size), dtype=np.float32)
+    left = (size - width) // 2
+    canvas[:, left:left + width] = np.asarray(glyph, dtype=np.float32) / 255
+    return canvas
+
+class GlyphReader:
+    def __init__(self, path: Union[str, Path], size: int = 12, min_level: int = 130, min_score: float = 0.6):
+        """
+        Reads numbers from the HUD by matching glyphs against learned templates.
+
+        Glyphs are separated by the empty columns between them, normalized to a fixed
+        height, and compared with each template by normalized correlation. Templates are
+        averaged from every sample they were learned from, so a few frames of known text
+        are enough to calibrate a new font size.
+
+        Attributes:
+            path (Path): The template directory, e.g. ./dataset/templates/glyphs.
+            size (int): See `normalize_glyph()`.
+            min_level (int): See `text_mask()`.
+            min_score (float): Minimum correlation for a glyph to be recognised.
+            templates (Dict[str, np.ndarray]): The learned templates, by character.
+
+        Methods:
+            learn(image: Image.Image, box: Box, text: str):
+                Learns the glyphs of a region with known text and saves the templates.
+            read(image: Image.Image, box: Box) -> str:
+                Reads the characters in a region, with UNKNOWN for unrecognised glyphs.
+            read_numbers(image: Image.Image, box: Box) -> List[int]:
+                Reads the numbers in a region, e.g. [758, 1278] from "758 / 1278",
+                skipping any number with an unrecognised glyph in it.
+        """
+        self.path = Path(path)
+        self.size = size
+        self.min_level = min_level
+        self.min_score = min_score
+        self.templates: Dict[str, np.ndarray] = {}
+        self.counts: Dict[str, int] = {}
+        if (self.path / GLYPHS_FILE).exists():
+            with open(self.path / GLYPHS_FILE) as f:
+                self.counts = json.load(f)
+        for char in self.counts:
+            with Image.open(self.path / f"{GLYPH_NAMES.get(char, char)}.png") as img:
+                self.templates[char] = np.asarray(img.convert('L'), dtype=np.float32) / 255
+
+    def _glyphs(self, image: Image.Image, box: Box) -> List[Tuple[Box, np.ndarray]]:
+        mask = text_mask(np.asarray(image.crop(box).convert('RGB')), self.min_level)
+        return [(b, normalize_glyph(mask[b[1]:b[3], b[0]:b[2]], self.size)) for b in split_glyphs(mask)]
+
+    def learn(self, image: Image.Image, box: Box, text: str):
+        """
+        Learn glyph templates from a region with known text.
+
+        Args:
+            image (Image.Image): The frame, e.g. one of the images in ./dataset.
+            box (Box): The (x1, y1, x2, y2) of the text, in frame pixels.
+            text (str): The text in the region. Spaces are ignored.
+
+        Raises:
+            ValueError: If the region does not split into one glyph per character.
+        """
+        chars = text.replace(" ", "")
+        glyphs = self._glyphs(image, box)
+        if len(glyphs) != len(chars):
+            raise ValueError(f"Found {len(glyphs)} glyphs in {box}, expected {len(chars)} for '{text}'.")
+        self.path.mkdir(parents=True, exist_ok=True)
+        for char, (_, glyph) in zip(chars, glyphs):
+            n = self.counts.get(char, 0)
+            self.templates[char] = (self.templates.get(char, 0) * n + glyph) / (n + 1)
+            self.counts[char] = n + 1
+            Image.fromarray(np.round(self.templates[char] * 255).astype(np.uint8)).save(
+                self.path / f"{GLYPH_NAMES.get(char, char)}.png"
+            )
+        with open(self.path / GLYPHS_FILE, "w") as f:
+            json.dump(self.counts, f, indent=2)
+
+    def _classify(self, glyph: np.ndarray) -> Optional[str]:
+        g = glyph - glyph.mean()
+        best, best_score = None, self.min_score
+        for char, template in self.templates.items():
+            t = template - template.mean()
+            denominator = np.sqrt((g * g).sum() * (t * t).sum())
+            score = (g * t).sum() / denominator if denominator > 0 else 0.0
+            if score > best_score:
+                best, best_score = char, score
+        return best
+
+    def read(self, image: Image.Image, box: Box) -> str:
+        text, end = "", None
+        for (x1, y1, x2, y2), glyph in self._glyphs(image, box):
+            # Gaps wider than half a glyph's height separate words
+            if end is not None and x1 - end > (y2 - y1) / 2:
+                text += " "
+            end = x2
+            char = self._classify(glyph)
+            # Skipping the glyph would join its neighbours, e.g. "758" and "1278" around
+            # a missed "/", into another number
+            text += char if char is not None else UNKNOWN
+        return text
+
+    def read_numbers(self, image: Image.Image, box: Box) -> List[int]:
+        return [int(n) for n in NUMBER.findall(self.read(image, box)) if n.isdigit()]
+
+@dataclass
+class HUDLayout:
+    """
+    Positions of the HUD elements, calibrated on a frame of a known size.
+
+    The HUD's position and scale depend on the client's resolution and HUD scale
+    setting, so each setup needs its own layout. Boxes are scaled with the frame, so a
+    layout also holds for the same setup captured at another resolution.
+
+    Attributes:
+        reference_size (Tuple[int, int]): The (width, height) of the calibration frame.
+        hp (Box): The HP bar, including its text.
+        mana (Box): The mana bar, including its text.
+        abilities (Dict[str, Box]): The ability and summoner spell icons, by key.
+        gold (Box): The gold count, excluding the coin icon.
+    """
+    reference_size: Tuple[int, int]
+    hp: Box
+    mana: Box
+    abilities: Dict[str, Box] = field(default_factory=dict)
+    gold: Optional[Box] = None
+
+    def scale(self, box: Box, size: Tuple[int, int]) -> Box:
+        sx, sy = size[0] / self.reference_size[0], size[1] / self.reference_size[1]
+        return round(box[0] * sx), round(box[1] * sy), round(box[2] * sx), round(box[3] * sy)
+
+# Layouts calibrated on frames in ./dataset
+HUD_LAYOUTS: Dict[str, HUDLayout] = {
+    # screen.png, a 1024x768 client
+    "screen": HUDLayout(
+        reference_size=(1024, 768),
+        hp=(381, 744, 576, 752),
+        mana=(381, 753, 576, 761),
+        abilities={
+            "Q": (404, 706, 430, 731), "W": (435, 706, 461, 731),
+            "E": (466, 706, 494, 731), "R": (497, 706, 525, 731),
+            "D": (533, 706, 553, 725), "F": (557, 706, 576, 725),
+        },
+        gold=(605, 751, 652, 765),
+    ),
+    # lol.png and lol-kill.png, a 16:9 recording letterboxed to 1440x900
+    "lol": HUDLayout(
+        reference_size=(1440, 900),
+        hp=(512, 817, 822, 829),
+        mana=(512, 832, 822, 844),
+        abilities={
+            "Q": (550, 756, 590, 798), "W": (598, 756, 640, 798),
+            "E": (648, 756, 690, 798), "R": (698, 756, 740, 798),
+            "D": (755, 756, 785, 788), "F": (792, 756, 822, 788),
+        },
+        gold=(903, 826, 965, 848),
+    ),
+}
+
+@dataclass
+class AbilityState:
+    """
+    The state of an ability or summoner spell read from its icon.
+
+    Attributes:
+        ready (bool): Whether the icon is lit, i.e. the ability can be cast.
+        cooldown (Optional[int]): Seconds left, read from the icon, if it is on cooldown.
+            None for abilities which are ready, not learned or out of mana.
+        brightness (float): The icon's 90th percentile brightness, from 0 to 255.
+    """
+    ready: bool
+    cooldown: Optional[int] = None
+    brightness: float = 0.0
+
+@dataclass
+class HUDState:
+    """
+    The player's state read from the HUD.
+
+    Attributes:
+        hp (float): Fraction of the HP bar which is filled, from 0 to 1.
+        mana (float): Fraction of the mana bar which is filled, from 0 to 1.
+        hp_values (Optional[Tuple[int, int]]): The (current, maximum) HP, if they could be read.
+        mana_values (Optional[Tuple[int, int]]): The (current, maximum) mana, if they could be read.
+        gold (Optional[int]): The gold count, if it could be read.
+        abilities (Dict[str, AbilityState]): The state of each ability, by key.
+    """
+    hp: float
+    mana: float
+    hp_values: Optional[Tuple[int, int]] = None
+    mana_values: Optional[Tuple[int, int]] = None
+    gold: Optional[int] = None
+    abilities: Dict[str, AbilityState] = field(default_factory=dict)
+
+    def describe(self) -> str:
+        """
+        Describe the state in a few dozen tokens, to send alongside or instead of the frame.
+
+        Returns:
+            str: e.g. "<hud>hp=929/984 (94%) mana=639/767 (83%) gold=151 Q=ready W=5s E=ready R=unavailable</hud>".
+        """
+        parts = []
+        for name, fill, values in (("hp", self.hp, self.hp_values), ("mana", self.mana, self.mana_values)):
+            exact = f"{values[0]}/{values[1]} " if values else ""
+            parts.append(f"{name}={exact}({fill:.0%})")
+        if self.gold is not None:
+            parts.append(f"gold={self.gold}")
+        for key, ability in self.abilities.items():
+            if ability.ready:
+                parts.append(f"{key}=ready")
+            elif ability.cooldown is not None:
+                parts.append(f"{key}={ability.cooldown}s")
+            else:
+                parts.append(f"{key}=unavailable")
+        return f"<hud>{' '.join(parts)}</hud>"
+
+class HUDReader:
+    def __init__(
+        self,
+        layout: HUDLayout,
+        glyphs: Optional[GlyphReader] = None,
+        min_saturation: int = 100,
+        min_value: int = 50,
+        ready_brightness: float = 160.0,
+    ):
+        """
+        Reads the player's HP, mana, gold and ability cooldowns from fixed HUD regions.
+
+        Every value comes from vectorized statistics of a small region, so a frame takes
+        about a millisecond plus the glyph matching:
+
+        - Bars fill from the left, so the fill is the position of the last column in
+          which most pixels are saturated. The white text drawn over the filled part
+          does not move it.
+        - An ability is ready when its icon is lit. Cooldown, missing mana and unlearned
+          abilities all darken the icon, and a cooldown also shows the seconds left,
+          which are read with `glyphs`.
+        - Gold and the exact HP and mana values are read with `glyphs`.
+
+        Attributes:
+            layout (HUDLayout): The HUD element positions.
+            glyphs (Optional[GlyphReader]): Reads numbers. None skips gold, exact values
+                and cooldown seconds.
+            min_saturation (int): Minimum saturation of a filled bar pixel, from 0 to 255.
+            min_value (int): Minimum brightness of a filled bar pixel, from 0 to 255.
+            ready_brightness (float): Minimum 90th percentile brightness of a lit icon.
+
+        Methods:
+            read(img: Image.Image) -> HUDState:
+                Reads the HUD of a frame.
+        """
+        self.layout = layout
+        self.glyphs = glyphs
+        self.min_saturation = min_saturation
+        self.min_value = min_value
+        self.ready_brightness = ready_brightness
+
+    def bar_fill(self, hsv: np.ndarray) -> float:
+        """
+        Measure how full a bar is.
+
+        Args:
+            hsv (np.ndarray): The (h, w, 3) HSV pixels of the bar.
+
+        Returns:
+            float: The filled fraction of the bar's width, from 0 to 1.
+        """
+        filled = (hsv[..., 1] >= self.min_saturation) & (hsv[..., 2] >= self.min_value)
+        columns = np.flatnonzero(filled.mean(axis=0) >= 0.5)
+        return float(columns[-1] + 1) / filled.shape[1] if len(columns) else 0.0
+
+    def bar_values(self, img: Image.Image, box: Box) -> Optional[Tuple[int, int]]:
+        match = BAR_VALUES.search(self.glyphs.read(img, self.layout.scale(box, img.size)))
+        return (int(match.group(1)), int(match.group(2))) if match else None
+
+    def read(self, img: Image.Image) -> HUDState:
+        layout = self.layout
+
+        def region(box: Box) -> np.ndarray:
+            # Only the small regions are converted, not the whole frame
+            return np.asarray(img.crop(layout.scale(box, img.size)).convert('RGB').convert('HSV'))
+
+        state = HUDState(hp=self.bar_fill(region(layout.hp)), mana=self.bar_fill(region(layout.mana)))
+        for key, box in layout.abilities.items():
+            brightness = float(np.percentile(region(box)[..., 2], 90))
+            ability = AbilityState(ready=brightness >= self.ready_brightness, brightness=brightness)
+            if not ability.ready and self.glyphs is not None:
+                # The seconds are centred, away from the bright edges of the icon art
+                x1, y1, x2, y2 = layout.scale(box, img.size)
+                dx, dy = (x2 - x1) // 6, (y2 - y1) // 6
+                seconds = self.glyphs.read_numbers(img, (x1 + dx, y1 + dy, x2 - dx, y2 - dy))
+                ability.cooldown = seconds[0] if seconds else None
+            state.abilities[key] = ability
+        if self.glyphs is not None:
+            state.hp_values = self.bar_values(img, layout.hp)
+            state.mana_values = self.bar_values(img, layout.mana)
+            if layout.gold is not None:
+                gold = self.glyphs.read_numbers(img, layout.scale(layout.gold, img.size))
+                state.gold = gold[0] if gold else None
+        return state
@@ -1,5 +1,6 @@
 # Standard library imports
 import base64
+import functools
 import json
 import os
 import tempfile
@@ -22,17 +23,18 @@ pillow_heif.register_heif_opener()
 from dotenv import load_dotenv
 load_dotenv()
 
-# LLMs
+# LLMs, sharing one keep-alive connection pool
+from .client import model_client
 from openai import OpenAI
 from anthropic import Anthropic
-gpt_client = OpenAI()
-claude_client = Anthropic(api_key=os.environ["ANTHROPIC_API_KEY"])
+gpt_client = OpenAI(http_client=model_client.sync_http_client())
+claude_client = Anthropic(api_key=os.environ["ANTHROPIC_API_KEY"], http_client=model_client.sync_http_client())
 
 # PDF to Image
 import pdf2image
 
 # Typing
-from typing import List
+from typing import List, Optional
 
 # Async
 import aiohttp
@@ -46,14 +48,21 @@ from anthropic import AnthropicBedrock
 bedrock_client = AnthropicBedrock(
     aws_access_key=os.getenv("AWS_ACCESS_KEY_ID"),
     aws_secret_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-    aws_region=os.getenv("AWS_REGION")
+    aws_region=os.getenv("AWS_REGION"),
+    http_client=model_client.sync_http_client()
 )
 
 from pdf2image import convert_from_path
 
 import xml.etree.ElementTree as ET
 
-async def claude(txt: str, path: str = "", temperature: float = 0.7):
+# Image encoding, sized to each provider's image-token formula and limits
+from .encoder import EncodedImage, ImageEncoder
+CLAUDE_IMAGE_ENCODER = ImageEncoder("anthropic")
+BEDROCK_IMAGE_ENCODER = ImageEncoder("bedrock")
+GPT_IMAGE_ENCODER = ImageEncoder("openai")
+
+async def claude(txt: str, path: str = "", temperature: float = 0.7, cached_prefix: str = "", usage: Optional[dict] = None):
     """
     Sends a request to the Claude AI model with text and optional image input.
 
@@ -65,6 +74,11 @@ async def claude(txt: str, path: str = "", temperature: float = 0.7):
         txt (str): The text prompt to send to Claude.
         path (str, optional): Path to an image or PDF file to include in the request. Defaults to "".
         temperature (float, optional): The sampling temperature for the AI model. Defaults to 0.7.
+        cached_prefix (str, optional): Static text sent before `txt` and marked with a
+            `cache_control` breakpoint, so the API can reuse it across requests. It must be
+            identical between calls to be cached. Defaults to "".
+        usage (dict, optional): If given, updated with the token usage reported by the API,
+            including `cache_creation_input_tokens` and `cache_read_input_tokens`.
 
     Returns:
         str: The response from the Claude AI model.
@@ -82,6 +96,12 @@ async def claude(txt: str, path: str = "", temperature: float = 0.7):
             "text": txt
         }
     ]
+    if cached_prefix:
+        content.insert(0, {
+            "type": "text",
+            "text": cached_prefix,
+            "cache_control": {"type": "ephemeral"}
+        })
     if path:
         if path.endswith(".pdf"):
             # Convert PDF to images
@@ -90,52 +110,55 @@ async def claude(txt: str, path: str = "", temperature: float = 0.7):
             # For single image files
             image_paths = [path]
         for img_path in image_paths:
-            # Process the image
-            processed_img_path = await process_image(img_path, scaling=1)
-            base64_image = await encode_image(processed_img_path)
+            # Encode the image within the provider's image-token and size limits
+            image = await process_image(img_path, CLAUDE_IMAGE_ENCODER)
             content.append({
                 "type": "image",
                 "source": {
                     "type": "base64",
-                    "media_type": "image/jpeg",
-                    "data": base64_image
+                    "media_type": image.media_type,
+                    "data": image.base64()
                 }
             })
 
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.post(
-                "https://api.anthropic.com/v1/messages",
-                headers={
-                    "Content-Type": "application/json",
-                    "X-API-Key": os.environ.get("ANTHROPIC_API_KEY"),
-                    "anthropic-version": "2023-06-01"  # Add the required header
-                },
-                json={
-                    "max_tokens": 4096,
-                    "messages": [{"role": "user", "content": content}],
-                    "model": "claude-3-5-sonnet-20240620",
-                    "temperature": temperature,
-                },
-            ) as response:
-                result = await response.json()
-                if response.status != 200:
-                    error_message = result.get('error', {}).get('message', 'Unknown error occurred')
-                    raise HTTPException(status_code=response.status, detail=f"Anthropic API error: {error_message}")
-                
-                if 'content' not in result or not result['content']:
-                    raise HTTPException(status_code=500, detail="Unexpected response format from Anthropic API")
-                
-                return result["content"][0]["text"]
-        except aiohttp.ClientError as e:
-            raise HTTPException(status_code=500, detail=f"Error communicating with Anthropic API: {str(e)}")
-
-async def bedrock_claude(txt: str, path: str = "", temperature: float = 0.7):
+    session = model_client.session()
+    try:
+        async with session.post(
+            "https://api.anthropic.com/v1/messages",
+            headers={
+                "Content-Type": "application/json",
+                "X-API-Key": os.environ.get("ANTHROPIC_API_KEY"),
+                "anthropic-version": "2023-06-01"  # Add the required header
+            },
+            json={
+                "max_tokens": 4096,
+                "messages": [{"role": "user", "content": content}],
+                "model": "claude-3-5-sonnet-20240620",
+                "temperature": temperature,
+            },
+        ) as response:
+            result = await response.json()
+            if response.status != 200:
+                error_message = result.get('error', {}).get('message', 'Unknown error occurred')
+                raise HTTPException(status_code=response.status, detail=f"Anthropic API error: {error_message}")
+            
+            if 'content' not in result or not result['content']:
+                raise HTTPException(status_code=500, detail="Unexpected response format from Anthropic API")
+
+            if usage is not None:
+                usage.update(result.get("usage", {}))
+            
+            return result["content"][0]["text"]
+    except aiohttp.ClientError as e:
+        raise HTTPException(status_code=500, detail=f"Error communicating with Anthropic API: {str(e)}")
+
+async def bedrock_claude(txt: str, path: str = "", temperature: float = 0.7, cached_prefix: str = "", usage: Optional[dict] = None):
     path = str(path)
+    # The Bedrock model used here does not support prompt caching, the prefix is sent as-is
     content = [
         {
             "type": "text",
-            "text": txt
+            "text": cached_prefix + txt
         }
     ]
     if path:
@@ -146,15 +169,14 @@ async def bedrock_claude(txt: str, path: str = "", temperature: float = 0.7):
             # For single image files
             image_paths = [path]
         for img_path in image_paths:
-            # Process the image
-            processed_img_path = await process_image(img_path, scaling=1)
-            base64_image = await encode_image(processed_img_path)
+            # Encode the image within the provider's image-token and size limits
+            image = await process_image(img_path, BEDROCK_IMAGE_ENCODER)
             content.append({
                 "type": "image",
                 "source": {
                     "type": "base64",
-                    "media_type": "image/jpeg",
-                    "data": base64_image
+                    "media_type": image.media_type,
+                    "data": image.base64()
                 }
             })
 
@@ -169,6 +191,9 @@ async def bedrock_claude(txt: str, path: str = "", temperature: float = 0.7):
         
         if not response.content:
             raise HTTPException(status_code=500, detail="Unexpected response format from Bedrock API")
+
+        if usage is not None and response.usage is not None:
+            usage.update(response.usage.model_dump())
         
         return response.content[0].text
     except Exception as e:
@@ -213,63 +238,25 @@ async def pdf_to_images(pdf_path: str) -> List[str]:
     
     return image_paths
 
-async def process_image(image_path: str, scaling: float = 1, max_size: int = 2000) -> str:
+async def process_image(image_path: str, encoder: Optional[ImageEncoder] = None) -> EncodedImage:
     """
-    Process an image file by resizing it if necessary.
+    Encode an image file for a model request within the encoder's token and byte budget.
 
-    This asynchronous function takes an image file path as input and processes the image
-    by resizing it based on the given scaling factor and maximum size constraints.
+    The image is downscaled and compressed in memory to fit the provider's image-token
+    formula and size limits, see `ImageEncoder`.
 
     Args:
         image_path (str): The file path of the input image.
-        scaling (float, optional): The scaling factor to apply to the image. Defaults to 1.
-        max_size (int, optional): The maximum allowed dimension (width or height) of the image. Defaults to 2000.
+        encoder (ImageEncoder, optional): The encoder to use. Defaults to `CLAUDE_IMAGE_ENCODER`.
 
     Returns:
-        str: The file path of the processed image.
-
-    The function performs the following steps:
-    1. Opens the image file.
-    2. Calculates new dimensions based on the max_size and scaling parameters.
-    3. Resizes the image if necessary, maintaining the aspect ratio.
-    4. Saves the processed image as a JPEG file.
+        EncodedImage: The encoded image, with its size, quality and estimated tokens.
 
     Note:
     - The function uses asyncio to run CPU-bound operations in a separate thread.
-    - The processed image is saved with a "_processed.jpg" suffix added to the original filename.
     """
     loop = asyncio.get_event_loop()
-    with await loop.run_in_executor(None, Image.open, image_path) as img:
-        # Convert RGBA to RGB if necessary
-        if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
-            # Create a white background
-            background = Image.new('RGB', img.size, (255, 255, 255))
-            # Paste the image on the background using alpha channel as mask
-            if img.mode == 'RGBA':
-                background.paste(img, mask=img.split()[3])
-            else:
-                background.paste(img)
-            img = background
-            
-        width, height = img.size
-        
-        # Calculate new dimensions while maintaining aspect ratio
-        if width > max_size or height > max_size:
-            ratio = min(max_size / width, max_size / height)
-            new_size = (int(width * ratio), int(height * ratio))
-        elif scaling != 1:
-            new_size = (int(width * scaling), int(height * scaling))
-        else:
-            new_size = (width, height)
-        
-        # Resize only if necessary
-        if new_size != (width, height):
-            img = await loop.run_in_executor(None, img.resize, new_size, Image.LANCZOS)
-        
-        output_path = f"{image_path}_processed.jpg"
-        await loop.run_in_executor(None, img.save, output_path, "JPEG")
-    
-    return output_path
+    return await loop.run_in_executor(None, (encoder or CLAUDE_IMAGE_ENCODER).encode, image_path)
 
 async def encode_image(image_path: str) -> str:
     """
@@ -299,12 +286,12 @@ async def encode_image(image_path: str) -> str:
     
     return base64.b64encode(image_data).decode('utf-8')
 
-def gpt(txt, path="", temperature=0.7):
+async def gpt(txt, path="", temperature=0.7):
     """
     Send a text prompt to the GPT model and optionally include image data.
 
-    This function sends a text prompt to the GPT model and can include image data
-    if a file path is provided. It supports both PDF and image files.
+    This asynchronous function sends a text prompt to the GPT model and can include
+    image data if a file path is provided. It supports both PDF and image files.
 
     Args:
         txt (str): The text prompt to send to the model.
@@ -324,8 +311,9 @@ def gpt(txt, path="", temperature=0.7):
     5. Returns the model's response.
 
     Note:
-    - The function uses external functions like pdf_to_images, process_image, and encode_image.
-    - It assumes the existence of a gpt_client object for API communication.
+    - The function uses external functions like pdf_to_images and GPT_IMAGE_ENCODER.
+    - It assumes the existence of a gpt_client object for API communication. The
+      synchronous client call runs in a separate thread, so the event loop is not blocked.
     """
     model = "gpt-4o"
     content = [{"type": "text", "text": txt}]
@@ -333,26 +321,27 @@ def gpt(txt, path="", temperature=0.7):
     if path:
         if path.endswith(".pdf"):
             # Convert PDF to images
-            image_paths = pdf_to_images(path)
+            image_paths = await pdf_to_images(path)
         else:
             # For single image files
             image_paths = [path]
         for img_path in image_paths:
             # Process the image
-            processed_img_path = process_image(img_path, scaling=1.0)
-            base64_image = encode_image(processed_img_path)
+            image = await process_image(img_path, GPT_IMAGE_ENCODER)
             content.append({
                 "type": "image_url",
                 "image_url": {
-                    "url": f"data:image/jpeg;base64,{base64_image}"
+                    "url": f"data:{image.media_type};base64,{image.base64()}"
                 }
             })
-    response = gpt_client.chat.completions.create(
+    loop = asyncio.get_event_loop()
+    response = await loop.run_in_executor(None, functools.partial(
+        gpt_client.chat.completions.create,
         messages=[ {"role": "user", "content": content} ],
         model=model,
         temperature=temperature,
         max_tokens=4_096
-    )
+    ))
     msg = response.choices[0].message.content
     return msg
 
@@ -0,0 +1,267 @@
+# Standard library imports
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+# Third-party imports
+import numpy as np
+from PIL import Image
+
+# Local imports
+from .regions import region_monitor
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+TEMPLATES_FILE = "templates.json"
+
+@dataclass
+class Template:
+    """
+    A reference image of a visually stable target, e.g. a UI element or an HP bar frame.
+
+    Attributes:
+        name (str): The target name.
+        image (np.ndarray): The (height, width) grayscale template, as float32.
+        click (Tuple[int, int]): The point to click, relative to the template's top-left
+            corner at its reference resolution.
+        reference_width (int): Width of the frame the template was cut from. Frames of
+            other widths are searched with the template rescaled to match.
+        region (Optional[str]): Named region to restrict the search to, see lib/regions.py.
+    """
+    name: str
+    image: np.ndarray
+    click: Tuple[int, int]
+    reference_width: int
+    region: Optional[str] = None
+
+@dataclass
+class Match:
+    """
+    The best match of a template in a frame.
+
+    Attributes:
+        name (str): The target name.
+        score (float): Normalized cross-correlation, from -1 to 1.
+        box (Tuple[int, int, int, int]): The matched (x1, y1, x2, y2) in frame pixels.
+        point (Tuple[int, int]): The click point in frame pixels.
+        scale (float): The template scale of the match, relative to the frame width.
+    """
+    name: str
+    score: float
+    box: Tuple[int, int, int, int]
+    point: Tuple[int, int]
+    scale: float
+
+class TemplateLibrary:
+    def __init__(self, path: Union[str, Path]):
+        """
+        A directory of reference templates cut from captured frames.
+
+        Each template is stored as `<name>.png`, and `templates.json` holds its click
+        point, reference frame width, search region and the box it was cut from.
+
+        Attributes:
+            path (Path): The library directory, e.g. ./dataset/templates.
+            templates (Dict[str, Template]): The loaded templates, by name.
+
+        Methods:
+            cut(name: str, image: Image.Image, box: Tuple[int, int, int, int], click=None, region=None) -> Template:
+                Cuts a template out of a frame and saves it to the library.
+        """
+        self.path = Path(path)
+        self.templates: Dict[str, Template] = {}
+        self.meta: Dict[str, dict] = {}
+        if (self.path / TEMPLATES_FILE).exists():
+            with open(self.path / TEMPLATES_FILE) as f:
+                self.meta = json.load(f)
+        for name, meta in self.meta.items():
+            with Image.open(self.path / f"{name}.png") as img:
+                image = np.asarray(img.convert('L'), dtype=np.float32)
+            self.templates[name] = Template(
+                name=name,
+                image=image,
+                click=tuple(meta.get("click", (image.shape[1] // 2, image.shape[0] // 2))),
+                reference_width=meta["reference_width"],
+                region=meta.get("region"),
+            )
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.templates
+
+    def __getitem__(self, name: str) -> Template:
+        return self.templates[name]
+
+    def cut(
+        self,
+        name: str,
+        image: Image.Image,
+        box: Tuple[int, int, int, int],
+        click: Optional[Tuple[int, int]] = None,
+        region: Optional[str] = None,
+    ) -> Template:
+        """
+        Cut a template out of a frame and save it to the library.
+
+        Args:
+            name (str): The target name.
+            image (Image.Image): The frame, e.g. one of the images in ./dataset.
+            box (Tuple[int, int, int, int]): The (x1, y1, x2, y2) to cut, in frame pixels.
+            click (Tuple[int, int], optional): The click point relative to the box's top-left
+                corner. Defaults to the centre of the box.
+            region (str, optional): Named region to restrict the search to. Defaults to None.
+
+        Returns:
+            Template: The new template.
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        crop = image.convert('L').crop(box)
+        crop.save(self.path / f"{name}.png")
+        if click is None:
+            click = (crop.size[0] // 2, crop.size[1] // 2)
+        self.meta[name] = {
+            "click": list(click),
+            "reference_width": image.size[0],
+            "region": region,
+            "box": list(box),
+        }
+        with open(self.path / TEMPLATES_FILE, "w") as f:
+            json.dump(self.meta, f, indent=2)
+        self.templates[name] = Template(name, np.asarray(crop, dtype=np.float32), tuple(click), image.size[0], region)
+        return self.templates[name]
+
+def _window_sums(a: np.ndarray, h: int, w: int) -> np.ndarray:
+    # Sum over every h x w window, from an integral image
+    s = np.pad(a, ((1, 0), (1, 0))).cumsum(0).cumsum(1)
+    return s[h:, w:] - s[:-h, w:] - s[h:, :-w] + s[:-h, :-w]
+
+def ncc(frame: np.ndarray, template: np.ndarray) -> np.ndarray:
+    """
+    Normalized cross-correlation of a template at every position in a frame.
+
+    Equivalent to OpenCV's `TM_CCOEFF_NORMED`, which is used when OpenCV is installed.
+    Otherwise the correlation is computed with an FFT and the per-window normalization
+    with integral images, so the cost does not depend on the template size.
+
+    Args:
+        frame (np.ndarray): The (H, W) grayscale frame, as float32.
+        template (np.ndarray): The (h, w) grayscale template, as float32, no larger than the frame.
+
+    Returns:
+        np.ndarray: The (H - h + 1, W - w + 1) scores, from -1 to 1. Flat windows score 0.
+    """
+    if cv2 is not None:
+        return cv2.matchTemplate(frame, template, cv2.TM_CCOEFF_NORMED)
+    H, W = frame.shape
+    h, w = template.shape
+    t = template - template.mean()
+    t_norm = np.sqrt((t * t).sum())
+    # Correlation of the frame with the zero-mean template. Windows which fit inside
+    # the frame never wrap around, so the valid part of the circular result is exact
+    spectrum = np.fft.rfft2(frame) * np.conj(np.fft.rfft2(t, s=(H, W)))
+    numerator = np.fft.irfft2(spectrum, s=(H, W))[:H - h + 1, :W - w + 1]
+    f = frame.astype(np.float64)
+    sums = _window_sums(f, h, w)
+    variance = _window_sums(f * f, h, w) - sums * sums / (h * w)
+    denominator = t_norm * np.sqrt(np.maximum(variance, 0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = np.where(denominator > 1e-6 * max(t_norm, 1), numerator / denominator, 0.0)
+    return scores.astype(np.float32)
+
+class Locator:
+    def __init__(
+        self,
+        library: TemplateLibrary,
+        threshold: float = 0.8,
+        scales: Sequence[float] = (0.9, 1.0, 1.1),
+        downsample: int = 2,
+    ):
+        """
+        Locates known targets with multi-scale template matching, without calling a model.
+
+        The frame and template are converted to grayscale and downsampled by `downsample`
+        before matching, and the template is rescaled by the ratio of the frame width to
+        its reference width, then by each of `scales` to absorb UI scaling differences.
+        The best position is mapped back to full-resolution frame pixels.
+
+        Attributes:
+            library (TemplateLibrary): The reference templates.
+            threshold (float): Minimum correlation for a match to be trusted. Below it,
+                the caller should fall back to the model.
+            scales (Sequence[float]): Template scales to search, relative to the frame width.
+            downsample (int): Factor both images are reduced by before matching.
+
+        Methods:
+            match(img: Image.Image, name: str) -> Optional[Match]:
+                The best match of a target, whatever its score.
+            locate(img: Image.Image, name: str) -> Optional[Match]:
+                The best match of a target, if it scores at least `threshold`.
+        """
+        self.library = library
+        self.threshold = threshold
+        self.scales = tuple(scales)
+        self.downsample = max(1, downsample)
+
+    def match(self, img: Image.Image, name: str) -> Optional[Match]:
+        template = self.library[name]
+        # Scale of the template relative to this frame, before the search scales
+        base = img.size[0] / template.reference_width
+        left, top = 0, 0
+        if template.region is not None:
+            crop = region_monitor(template.region, {"left": 0, "top": 0, "width": img.size[0], "height": img.size[1]})
+            left, top = crop["left"], crop["top"]
+            img = img.crop((left, top, left + crop["width"], top + crop["height"]))
+
+        gray = img.convert('L')
+        if self.downsample > 1:
+            gray = gray.reduce(self.downsample)
+        frame = np.asarray(gray, dtype=np.float32)
+        source = Image.fromarray(template.image)
+
+        best: Optional[Match] = None
+        for scale in self.scales:
+            factor = base * scale / self.downsample
+            w = round(template.image.shape[1] * factor)
+            h = round(template.image.shape[0] * factor)
+            if w < 4 or h < 4 or w > frame.shape[1] or h > frame.shape[0]:
+                continue
+            resized = np.asarray(source.resize((w, h), Image.BILINEAR), dtype=np.float32)
+            scores = ncc(frame, resized)
+            y, x = (int(i) for i in np.unravel_index(int(np.argmax(scores)), scores.shape))
+            score = float(scores[y, x])
+            if best is not None and score <= best.score:
+                continue
+            # Map the downsampled position back to full-resolution frame pixels
+            x1 = left + x * self.downsample
+            y1 = top + y * self.downsample
+            size = base * scale
+            best = Match(
+                name=name,
+                score=score,
+                box=(x1, y1, x1 + round(template.image.shape[1] * size), y1 + round(template.image.shape[0] * size)),
+                point=(x1 + round(template.click[0] * size), y1 + round(template.click[1] * size)),
+                scale=size,
+            )
+        return best
+
+    def locate(self, img: Image.Image, name: str) -> Optional[Match]:
+        """
+        Locate a target if it can be matched confidently.
+
+        Args:
+            img (Image.Image): The frame.
+            name (str): The target name.
+
+        Returns:
+            Optional[Match]: The best match, or None if the target is not in the library
+                             or no match scores at least `threshold`.
+        """
+        if name not in self.library:
+            return None
+        match = self.match(img, name)
+        if match is None or match.score < self.threshold:
+            return None
+        return match
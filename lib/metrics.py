@@ -0,0 +1,198 @@
+# Standard library imports
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+class LatencyHistogram:
+    """
+    HDR-style log-linear latency histogram.
+
+    Values are recorded as integer microseconds into buckets which are linear below
+    256us and logarithmic above, each power of two being split into 128 linear
+    sub-buckets. Memory is constant and every recorded value is kept with under 1%
+    relative error, so high percentiles stay accurate over long runs.
+
+    Attributes:
+        count (int): The number of recorded values.
+        total (float): The sum of recorded values, in seconds.
+        max (float): The largest recorded value, in seconds.
+
+    Methods:
+        record(seconds: float):
+            Records a value. Safe to call from any thread.
+        percentile(p: float) -> float:
+            The value at percentile p (0-100), in seconds.
+    """
+    SUB_BITS = 8
+    HALF = 1 << (SUB_BITS - 1)
+
+    def __init__(self):
+        self.counts: List[int] = []
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def _index(cls, us: int) -> int:
+        shift = max(0, us.bit_length() - cls.SUB_BITS)
+        return shift * cls.HALF + (us >> shift)
+
+    @classmethod
+    def _bounds(cls, index: int):
+        if index < 2 * cls.HALF:
+            return index, index + 1
+        shift = index // cls.HALF - 1
+        lower = (index - shift * cls.HALF) << shift
+        return lower, lower + (1 << shift)
+
+    def record(self, seconds: float):
+        us = max(0, int(seconds * 1e6))
+        index = self._index(us)
+        with self._lock:
+            if index >= len(self.counts):
+                self.counts.extend([0] * (index + 1 - len(self.counts)))
+            self.counts[index] += 1
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+
+    def percentile(self, p: float) -> float:
+        with self._lock:
+            if not self.count:
+                return 0.0
+            target = max(1, round(p / 100 * self.count))
+            seen = 0
+            for index, n in enumerate(self.counts):
+                seen += n
+                if seen >= target:
+                    lower, upper = self._bounds(index)
+                    return min((lower + upper) / 2 / 1e6, self.max)
+        return self.max
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+class _Timer:
+    def __init__(self, metrics: "Metrics", stage: str):
+        self.metrics = metrics
+        self.stage = stage
+        self.elapsed = 0.0
+
+    def __enter__(self):
+        self.start = time.monotonic()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.monotonic() - self.start
+        self.metrics.observe(self.stage, self.elapsed)
+
+class Metrics:
+    def __init__(self):
+        """
+        Registry of per-stage latency histograms for the decision loop.
+
+        Stages used by the loop are: capture, convert, locate, hpbars, hud, encode,
+        upload, ttft, response, coarse, refine, parse, infer, track, actuate, plan,
+        conditions, action_age and inject_lag.
+
+        Methods:
+            observe(stage: str, seconds: float):
+                Records a duration for a stage.
+            time(stage: str):
+                Context manager timing the enclosed block. Its `elapsed` attribute holds
+                the duration once the block exits.
+            snapshot() -> Dict[str, Dict[str, float]]:
+                Count, mean, p50, p95, p99 and max for every stage.
+            report() -> str:
+                A human readable table of the snapshot, in milliseconds.
+            prometheus() -> str:
+                The snapshot in the Prometheus text exposition format.
+            dump_every(interval: float):
+                Coroutine printing the report every `interval` seconds.
+            serve(port: int, host: str = "127.0.0.1"):
+                Exposes `prometheus()` over HTTP on a background thread.
+        """
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def histogram(self, stage: str) -> LatencyHistogram:
+        with self._lock:
+            if stage not in self.histograms:
+                self.histograms[stage] = LatencyHistogram()
+            return self.histograms[stage]
+
+    def observe(self, stage: str, seconds: float):
+        self.histogram(stage).record(seconds)
+
+    def time(self, stage: str) -> _Timer:
+        return _Timer(self, stage)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            histograms = dict(self.histograms)
+        return {stage: h.snapshot() for stage, h in histograms.items()}
+
+    def report(self) -> str:
+        lines = [f"{'stage':<12}{'count':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}  (ms)"]
+        for stage, s in self.snapshot().items():
+            lines.append(
+                f"{stage:<12}{s['count']:>8}"
+                f"{s['p50'] * 1e3:>10.1f}{s['p95'] * 1e3:>10.1f}{s['p99'] * 1e3:>10.1f}{s['max'] * 1e3:>10.1f}"
+            )
+        return "\n".join(lines)
+
+    def prometheus(self) -> str:
+        lines = [
+            "# HELP decision_loop_stage_seconds Latency of each decision loop stage.",
+            "# TYPE decision_loop_stage_seconds summary",
+        ]
+        with self._lock:
+            histograms = dict(self.histograms)
+        for stage, h in histograms.items():
+            for q, p in (("0.5", 50), ("0.95", 95), ("0.99", 99)):
+                lines.append(f'decision_loop_stage_seconds{{stage="{stage}",quantile="{q}"}} {h.percentile(p):.6f}')
+            lines.append(f'decision_loop_stage_seconds_sum{{stage="{stage}"}} {h.total:.6f}')
+            lines.append(f'decision_loop_stage_seconds_count{{stage="{stage}"}} {h.count}')
+        return "\n".join(lines) + "\n"
+
+    async def dump_every(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            print(self.report())
+
+    def serve(self, port: int, host: str = "127.0.0.1"):
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True).start()
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server = None
+
+# Process-wide registry shared by the capture, inference and actuation stages
+metrics = Metrics()
@@ -0,0 +1,158 @@
+# Standard library imports
+import asyncio
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+@dataclass(frozen=True)
+class Point:
+    """
+    A point to draw on the overlay, in screen points.
+
+    Attributes:
+        x (int): The x coordinate.
+        y (int): The y coordinate.
+        key (str): Shapes replace the previous shape with the same key.
+        color (Tuple[int, int, int]): RGB colour.
+    """
+    x: int
+    y: int
+    key: str = "point"
+    color: Tuple[int, int, int] = (255, 0, 0)
+
+@dataclass(frozen=True)
+class Rect:
+    """
+    A rectangle to draw on the overlay, e.g. from `parse_coords_rect()`, in screen points.
+
+    Attributes:
+        x1 (int): Left edge.
+        y1 (int): Top edge.
+        x2 (int): Right edge.
+        y2 (int): Bottom edge.
+        key (str): Shapes replace the previous shape with the same key.
+        color (Tuple[int, int, int]): RGB colour.
+    """
+    x1: int
+    y1: int
+    x2: int
+    y2: int
+    key: str = "rect"
+    color: Tuple[int, int, int] = (0, 255, 0)
+
+Shape = Union[Point, Rect]
+
+class ShapeBuffer:
+    def __init__(self, ttl: Optional[float] = 1.0):
+        """
+        Thread-safe hand-off of shapes from the decision loop to the overlay's Qt thread.
+
+        Producers on any thread call `put()`, which never blocks. The Qt thread calls
+        `collect()` from a timer at the overlay's frame rate, so any number of shapes
+        arriving between two ticks cause a single repaint.
+
+        Attributes:
+            ttl (Optional[float]): Seconds a shape stays visible. None keeps shapes until
+                replaced.
+            received (int): The number of shapes put.
+            repaints (int): The number of ticks which needed a repaint.
+
+        Methods:
+            put(shape: Shape):
+                Queues a shape. Safe to call from any thread.
+            collect(now: Optional[float] = None) -> bool:
+                Applies queued shapes and expires old ones, returning whether the visible
+                shapes changed. Called from the Qt thread only.
+            shapes() -> List[Shape]:
+                The visible shapes.
+        """
+        self.ttl = ttl
+        self.received = 0
+        self.repaints = 0
+        self._pending: "queue.SimpleQueue[Tuple[float, Shape]]" = queue.SimpleQueue()
+        self._visible: Dict[str, Tuple[float, Shape]] = {}
+
+    def put(self, shape: Shape):
+        self._pending.put((time.monotonic(), shape))
+
+    def collect(self, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        changed = False
+        while True:
+            try:
+                added_at, shape = self._pending.get_nowait()
+            except queue.Empty:
+                break
+            self.received += 1
+            self._visible[shape.key] = (added_at, shape)
+            changed = True
+        if self.ttl is not None:
+            expired = [key for key, (added_at, _) in self._visible.items() if now - added_at > self.ttl]
+            for key in expired:
+                del self._visible[key]
+            changed = changed or bool(expired)
+        if changed:
+            self.repaints += 1
+        return changed
+
+    def shapes(self) -> List[Shape]:
+        return [shape for _, shape in self._visible.values()]
+
+class BackgroundLoop:
+    def __init__(self, main: Callable[[], Awaitable]):
+        """
+        Runs an asyncio program on a background thread.
+
+        Qt must own the main thread on macOS, so when the overlay is shown the decision
+        loop runs here instead of under `asyncio.run()` on the main thread.
+
+        Attributes:
+            main (Callable[[], Awaitable]): Coroutine function to run.
+            done (threading.Event): Set once `main` has returned, raised or been cancelled.
+            exception (Optional[BaseException]): The exception `main` raised, if any.
+
+        Methods:
+            start():
+                Starts the thread.
+            stop(timeout: Optional[float] = None):
+                Cancels `main` from any thread and waits for the thread to finish.
+        """
+        self.main = main
+        self.done = threading.Event()
+        self.exception: Optional[BaseException] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="asyncio", daemon=True)
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._task = self._loop.create_task(self.main())
+            self._ready.set()
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        except BaseException as e:
+            self.exception = e
+        finally:
+            self._ready.set()
+            self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+            self._loop.close()
+            self.done.set()
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._ready.wait()
+        if not self.done.is_set() and self._task is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._task.cancel)
+            except RuntimeError:
+                # The loop closed in the meantime
+                pass
+        self._thread.join(timeout)
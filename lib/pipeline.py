@@ -0,0 +1,298 @@
+# Standard library imports
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Local imports
+from .metrics import metrics
+
+@dataclass
+class Frame:
+    """
+    A captured frame travelling through the pipeline.
+
+    Attributes:
+        image (Any): The captured image, usually a PIL image. None until `load()` for
+            frames captured into a raw buffer.
+        monitor (Dict[str, int]): The mss monitor dict the image was captured from,
+            used to map model coordinates back to the screen.
+        seq (int): Monotonic capture sequence number.
+        captured_at (float): `time.monotonic()` timestamp of the capture.
+        timings (Dict[str, float]): Duration in seconds of each stage the frame went through.
+        truth (Optional[Tuple[int, int]]): Ground truth target position in image
+            coordinates, when the source knows it (e.g. synthetic frames). Used to
+            measure localisation accuracy.
+        raw (Any): A handle on the raw capture buffer, e.g. a `RawFrame`, which
+            `load()` converts into `image` only when the frame is used.
+
+    Methods:
+        load() -> Any:
+            Returns the image, converting the raw buffer on first use. Safe to call
+            from several threads, the buffer is converted once.
+        preview(width: int = 256) -> Any:
+            Returns a small preview for change detection, without converting the raw
+            buffer when it can be sampled directly.
+    """
+    image: Any = None
+    monitor: Dict[str, int] = field(default_factory=dict)
+    seq: int = 0
+    captured_at: float = 0.0
+    timings: Dict[str, float] = field(default_factory=dict)
+    truth: Optional[Tuple[int, int]] = None
+    raw: Any = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
+
+    def load(self) -> Any:
+        # Inference and plan conditions may load the same frame from different threads
+        with self._lock:
+            raw, self.raw = self.raw, None
+            if self.image is None and raw is not None:
+                with metrics.time("convert") as convert:
+                    self.image = raw.to_image()
+                self.timings["convert"] = convert.elapsed
+                # The buffer may have been recycled, in which case a newer frame was converted
+                self.captured_at = raw.captured_at
+        return self.image
+
+    def preview(self, width: int = 256) -> Any:
+        raw = self.raw
+        if self.image is None and raw is not None:
+            preview = raw.preview(width)
+            if preview is not None:
+                return preview
+        # Frames which are already converted are fingerprinted as they are
+        return self.load()
+
+@dataclass
+class Action:
+    """
+    An action computed from a frame, stamped with the frame's capture time.
+
+    Attributes:
+        value (Any): The action returned by the inference stage, e.g. screen coordinates.
+        captured_at (float): `time.monotonic()` timestamp of the frame it was computed from.
+        seq (int): Sequence number of the frame it was computed from.
+        weight (float): Confidence weight in (0, 1], reduced for stale actions when the
+            pipeline is configured to down-weight rather than drop them.
+    """
+    value: Any
+    captured_at: float
+    seq: int = 0
+    weight: float = 1.0
+
+    @property
+    def age(self) -> float:
+        """Seconds elapsed since the source frame was captured."""
+        return time.monotonic() - self.captured_at
+
+class LatestQueue(asyncio.Queue):
+    """
+    A bounded asyncio queue which drops its oldest items instead of blocking.
+
+    Producers never wait: when the queue is full the stalest item is discarded to
+    make room, so consumers always receive the freshest items available. Discarded
+    items count as done, so `join()` waits only for the items actually consumed.
+
+    Attributes:
+        dropped (int): The number of items discarded to make room for newer ones.
+    """
+    def __init__(self, maxsize: int = 1):
+        super().__init__(maxsize=maxsize)
+        self.dropped = 0
+
+    def put_latest(self, item: Any):
+        while self.full():
+            self.get_nowait()
+            self.task_done()
+            self.dropped += 1
+        self.put_nowait(item)
+
+class Pipeline:
+    def __init__(
+        self,
+        capture: Callable[[], Optional[Frame]],
+        infer: Callable[[Frame], Awaitable[Any]],
+        actuate: Callable[[Action], None],
+        max_in_flight: int = 2,
+        max_action_age: Optional[float] = None,
+        stale_policy: str = "drop",
+        capture_interval: float = 0.0,
+        frame_queue_size: int = 1,
+        action_queue_size: int = 1,
+    ):
+        """
+        Runs capture, inference and actuation as concurrent stages.
+
+        The stages are connected by bounded, drop-stale queues. Capture keeps producing
+        frames while requests are in flight, up to `max_in_flight` inference workers
+        always take the freshest frame available, and actuation consumes actions as
+        soon as they are produced. Throughput is therefore bounded by the model API
+        rather than by the sum of all stage latencies.
+
+        Every frame is stamped with its capture time and every action carries the age
+        of the frame it was computed from. Actions older than `max_action_age` when they
+        reach the actuator are dropped or down-weighted, and counted in `stats`.
+
+        Attributes:
+            capture (Callable[[], Optional[Frame]]): Grabs a frame. It is blocking and runs
+                on a dedicated thread, so the capture backend always sees the same thread.
+                Returning None ends the stream, e.g. when a replayed recording runs
+                out: the frames already captured are still inferred and actuated, and
+                then `run()` returns.
+            infer (Callable[[Frame], Awaitable[Any]]): Computes an action for a frame.
+                Returning None produces no action. Returning an `Action`, e.g. one reused
+                from an earlier frame, keeps its capture time and age.
+            actuate (Callable[[Action], None]): Performs an action. It is blocking and runs
+                on its own dedicated thread.
+            max_in_flight (int): The maximum number of overlapping inference requests.
+            max_action_age (Optional[float]): Deadline in seconds between capturing a frame
+                and actuating the action computed from it. None disables the guard.
+            stale_policy (str): "drop" discards stale actions. "weight" passes actions
+                up to twice the deadline through with a weight decaying linearly from 1
+                to 0, and drops anything older.
+            capture_interval (float): Seconds to wait between captures.
+            frames (LatestQueue): Queue of captured frames awaiting inference.
+            actions (LatestQueue): Queue of actions awaiting actuation.
+            stats (Dict[str, int]): Per-run counters.
+
+        Methods:
+            run():
+                Runs all stages until cancelled or the capture stream ends.
+        """
+        self.capture = capture
+        self.infer = infer
+        self.actuate = actuate
+        self.max_in_flight = max_in_flight
+        if stale_policy not in ("drop", "weight"):
+            raise ValueError(f"Unknown stale policy '{stale_policy}'. Expected 'drop' or 'weight'.")
+        self.max_action_age = max_action_age
+        self.stale_policy = stale_policy
+        self.capture_interval = capture_interval
+        self.frames = LatestQueue(frame_queue_size)
+        self.actions = LatestQueue(action_queue_size)
+        self.stats = {
+            "captured": 0,
+            "inferred": 0,
+            "actuated": 0,
+            "stale_dropped": 0,
+            "stale_weighted": 0,
+            "errors": 0,
+        }
+
+    async def _capture_stage(self, executor: ThreadPoolExecutor):
+        loop = asyncio.get_running_loop()
+        while True:
+            frame = await loop.run_in_executor(executor, self.capture)
+            if frame is None:
+                return
+            if not frame.captured_at:
+                frame.captured_at = time.monotonic()
+            frame.seq = self.stats["captured"]
+            self.stats["captured"] += 1
+            self.frames.put_latest(frame)
+            await asyncio.sleep(self.capture_interval)
+
+    async def _inference_worker(self):
+        while True:
+            frame = await self.frames.get()
+            try:
+                await self._infer(frame)
+            finally:
+                self.frames.task_done()
+
+    async def _infer(self, frame: Frame):
+        start = time.monotonic()
+        try:
+            action = await self.infer(frame)
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"Error: {e}")
+            return
+        frame.timings["infer"] = time.monotonic() - start
+        metrics.observe("infer", frame.timings["infer"])
+        self.stats["inferred"] += 1
+        if isinstance(action, Action):
+            self.actions.put_latest(action)
+        elif action is not None:
+            self.actions.put_latest(Action(action, captured_at=frame.captured_at, seq=frame.seq))
+
+    async def _actuation_stage(self, executor: ThreadPoolExecutor):
+        loop = asyncio.get_running_loop()
+        while True:
+            action = await self.actions.get()
+            try:
+                metrics.observe("action_age", action.age)
+                if not self._check_age(action):
+                    continue
+                with metrics.time("actuate"):
+                    await loop.run_in_executor(executor, self.actuate, action)
+                self.stats["actuated"] += 1
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"Actuation error: {e}")
+            finally:
+                self.actions.task_done()
+
+    def _check_age(self, action: Action) -> bool:
+        """
+        Apply the staleness guard to an action about to be actuated.
+
+        Args:
+            action (Action): The action to check. Its weight is updated in place when
+                the pipeline down-weights stale actions.
+
+        Returns:
+            bool: True if the action should still be actuated.
+        """
+        if self.max_action_age is None:
+            return True
+        age = action.age
+        if age <= self.max_action_age:
+            return True
+        if self.stale_policy == "weight" and age < 2 * self.max_action_age:
+            action.weight = 2 - age / self.max_action_age
+            self.stats["stale_weighted"] += 1
+            return True
+        self.stats["stale_dropped"] += 1
+        return False
+
+    async def _drain(self):
+        # Actions are queued before their frame is done, so frames are joined first
+        await self.frames.join()
+        await self.actions.join()
+
+    @staticmethod
+    async def _until_done(task: asyncio.Task, others: List[asyncio.Task]):
+        done, _ = await asyncio.wait([task, *others], return_when=asyncio.FIRST_COMPLETED)
+        for finished in done:
+            finished.result()
+
+    async def run(self):
+        """
+        Run all pipeline stages until cancelled or the capture stream ends.
+
+        When `capture` returns None, the frames and actions already queued are finished
+        before returning, so a replayed recording is processed to its last frame.
+
+        Note:
+            The first stage to raise an unexpected exception cancels the others and the
+            exception is propagated.
+        """
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="capture") as capture_executor, \
+             ThreadPoolExecutor(max_workers=1, thread_name_prefix="actuate") as actuate_executor:
+            capture = asyncio.create_task(self._capture_stage(capture_executor))
+            stages = [asyncio.create_task(self._actuation_stage(actuate_executor))]
+            stages += [asyncio.create_task(self._inference_worker()) for _ in range(self.max_in_flight)]
+            tasks = [capture, *stages]
+            try:
+                # The other stages never return, so they only finish by raising
+                await self._until_done(capture, stages)
+                tasks.append(asyncio.create_task(self._drain()))
+                await self._until_done(tasks[-1], stages)
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,331 @@
+# Standard library imports
+import dataclasses
+import operator
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Local imports
+from .actuator import Actuator, Click, Command, KeyPress, Move
+from .coords import RequestProfile
+from .metrics import metrics
+from .pipeline import Frame
+
+# Keys a plan may press: abilities, summoner spells, recall and items
+PLAN_KEYS = frozenset("qwerdfb1234567") | {"space"}
+MAX_WAIT = 2.0
+
+COMMAND_LINE = re.compile(
+    r"^(?:(?P<verb>click|right|move)\s+(?P<x>-?\d+)\s+(?P<y>-?\d+)"
+    r"|key\s+(?P<key>\w+)"
+    r"|wait\s+(?P<wait>\d+(?:\.\d+)?))"
+    r"(?:\s+if\s+(?P<conditions>.+))?$"
+)
+CONDITION = re.compile(r"^(\w+)(?::([\w-]+))?\s*(?:(<=|>=|<|>|=)\s*(-?\d+(?:\.\d+)?))?$")
+COMPARISONS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge, "=": operator.eq}
+
+@dataclass(frozen=True)
+class Condition:
+    """
+    A check on the live frame which must hold for a plan step to run.
+
+    Attributes:
+        name (str): What is checked, e.g. "hp", "ready" or "visible".
+        arg (Optional[str]): The checked item, e.g. "Q" in "ready:Q".
+        op (Optional[str]): Comparison with `value`, e.g. ">" in "hp>0.3". None checks
+            that the measured value is truthy.
+        value (float): The threshold compared with.
+    """
+    name: str
+    arg: Optional[str] = None
+    op: Optional[str] = None
+    value: float = 0.0
+
+    def holds(self, measured: Any) -> bool:
+        if measured is None:
+            return False
+        if self.op is None:
+            return bool(measured)
+        return COMPARISONS[self.op](float(measured), self.value)
+
+    def __str__(self) -> str:
+        text = self.name + (f":{self.arg}" if self.arg else "")
+        return text + (f"{self.op}{self.value:g}" if self.op else "")
+
+@dataclass(frozen=True)
+class Step:
+    """
+    One step of an action plan.
+
+    Attributes:
+        command (Optional[Command]): The input to perform, or None for a wait.
+        wait (float): Seconds to wait, for wait steps.
+        conditions (Tuple[Condition, ...]): Checks on a fresh frame which must all hold
+            before the step runs.
+        text (str): The line the step was parsed from.
+    """
+    command: Optional[Command] = None
+    wait: float = 0.0
+    conditions: Tuple[Condition, ...] = ()
+    text: str = ""
+
+@dataclass
+class Plan:
+    """
+    A sequence of timed inputs returned by the model for one frame.
+
+    Attributes:
+        steps (List[Step]): The steps, in order.
+        rejected (List[str]): Lines which could not be parsed or are not allowed.
+    """
+    steps: List[Step] = field(default_factory=list)
+    rejected: List[str] = field(default_factory=list)
+
+    def map(self, point: Callable[[int, int], Tuple[int, int]]) -> "Plan":
+        """
+        Map every coordinate of the plan, e.g. from image pixels to screen points.
+
+        Args:
+            point (Callable[[int, int], Tuple[int, int]]): Maps an (x, y) point.
+
+        Returns:
+            Plan: A copy of the plan with mapped coordinates.
+        """
+        steps = []
+        for step in self.steps:
+            if isinstance(step.command, (Move, Click)):
+                x, y = point(step.command.x, step.command.y)
+                step = dataclasses.replace(step, command=dataclasses.replace(step.command, x=x, y=y))
+            steps.append(step)
+        return Plan(steps, list(self.rejected))
+
+    def describe(self) -> str:
+        return "; ".join(step.text for step in self.steps)
+
+def parse_condition(text: str) -> Optional[Condition]:
+    match = CONDITION.match(text.strip())
+    if match is None:
+        return None
+    name, arg, op, value = match.groups()
+    return Condition(name.lower(), arg, op, float(value) if value is not None else 0.0)
+
+def parse_plan(text: str, max_steps: int = 8) -> Plan:
+    """
+    Parse a plan from a complete response.
+
+    Each line inside `<plan>` is one step, optionally followed by conditions, e.g.
+    `right 640 410 if visible:blue_buff, hp>0.3`. The closing tag may be missing, as
+    it is the request's stop sequence.
+
+    Args:
+        text (str): The response text, including any prefill.
+        max_steps (int, optional): Steps beyond this are rejected. Defaults to 8.
+
+    Returns:
+        Plan: The parsed plan. Unknown commands, keys and conditions are rejected line
+        by line rather than failing the whole plan.
+    """
+    start = text.find("<plan>")
+    body = text[start + len("<plan>"):] if start >= 0 else text
+    body = body.split("</plan>")[0]
+    plan = Plan()
+    for line in body.splitlines():
+        line = line.strip().lstrip("-* ").strip()
+        if not line:
+            continue
+        match = COMMAND_LINE.match(line.lower())
+        conditions = []
+        if match and match.group("conditions"):
+            conditions = [parse_condition(c) for c in re.split(r",|\band\b", match.group("conditions"))]
+        if match is None or None in conditions or len(plan.steps) >= max_steps:
+            plan.rejected.append(line)
+            continue
+        verb, key = match.group("verb"), match.group("key")
+        if verb is not None:
+            x, y = int(match.group("x")), int(match.group("y"))
+            command = Move(x, y) if verb == "move" else Click(x, y, "right" if verb == "right" else "left")
+            step = Step(command=command)
+        elif key is not None:
+            if key not in PLAN_KEYS:
+                plan.rejected.append(line)
+                continue
+            step = Step(command=KeyPress(key))
+        else:
+            step = Step(wait=min(float(match.group("wait")), MAX_WAIT))
+        # Ability keys are matched case-insensitively, the HUD names them in upper case
+        conditions = [dataclasses.replace(c, arg=c.arg.upper()) if c.name == "ready" and c.arg else c for c in conditions]
+        plan.steps.append(dataclasses.replace(step, conditions=tuple(conditions), text=line))
+    return plan
+
+plan_prompt = lambda goal: f"""Plan the next few seconds of input to: {goal}
+
+Answer with one step per line, in the format:
+<plan>
+right 640 410 if visible:blue_buff
+key q if ready:Q
+wait 0.3
+click 655 420 if hp>0.3, enemy
+</plan>
+
+Steps are:
+- click X Y / right X Y: left or right click at pixel co-ordinates in the image
+- move X Y: move the cursor
+- key K: press one of {", ".join(sorted(PLAN_KEYS))}
+- wait S: wait up to {MAX_WAIT:g} seconds
+
+Any step may end with "if" and comma separated conditions, checked on the live screen
+just before the step. The rest of the plan is abandoned when one fails:
+- hp>F, hp<F, mana>F, mana<F: the player's HP or mana fraction, from 0 to 1
+- ready:K: ability K can be cast
+- visible:NAME: the template NAME is on screen, e.g. blue_buff
+- enemy, ally, neutral: a unit HP bar of that kind is on screen
+
+Use at most 8 steps. X AND Y MUST BE SINGLE INTEGER VALUES.
+IF THERE IS NOTHING USEFUL TO DO, RETURN AN EMPTY PLAN."""
+
+# The plan is parsed once complete, so no coordinate tags are streamed
+PLAN_PROFILE = RequestProfile(
+    prompt=plan_prompt,
+    max_tokens=200,
+    prefill="<plan>",
+    stop_sequences=("</plan>",),
+    tags=(),
+    starts_in_thinking=False,
+)
+
+class FrameConditions:
+    def __init__(self, hud: Optional[Any] = None, locator: Optional[Any] = None, detector: Optional[Any] = None):
+        """
+        Checks plan conditions on a frame with the local perception modules.
+
+        Each module is only run when a condition needs it, and at most once per frame.
+        Conditions which cannot be measured, because their module is missing or the
+        value could not be read, fail, so a plan never runs on a guess.
+
+        Attributes:
+            hud (Optional[HUDReader]): Measures "hp", "mana", "gold" and "ready".
+            locator (Optional[Locator]): Measures "visible".
+            detector (Optional[HPBarDetector]): Measures "enemy", "ally" and "neutral",
+                as the number of bars of that kind.
+
+        Methods:
+            check(img: Image.Image, conditions: Sequence[Condition]) -> Optional[Condition]:
+                Returns the first condition which does not hold, or None if all hold.
+        """
+        self.hud = hud
+        self.locator = locator
+        self.detector = detector
+
+    def _measure(self, img, condition: Condition, memo: Dict[str, Any]) -> Any:
+        name = condition.name
+        if name in ("hp", "mana", "gold", "ready") and self.hud is not None:
+            if "hud" not in memo:
+                memo["hud"] = self.hud.read(img)
+            if name == "ready":
+                ability = memo["hud"].abilities.get(condition.arg)
+                return ability.ready if ability is not None else None
+            return getattr(memo["hud"], name)
+        if name == "visible" and self.locator is not None:
+            return self.locator.locate(img, condition.arg) is not None
+        if name in ("enemy", "ally", "neutral") and self.detector is not None:
+            if "bars" not in memo:
+                memo["bars"] = self.detector.detect(img)
+            return sum(bar.kind == name for bar in memo["bars"])
+        return None
+
+    def check(self, img, conditions) -> Optional[Condition]:
+        memo: Dict[str, Any] = {}
+        for condition in conditions:
+            if not condition.holds(self._measure(img, condition, memo)):
+                return condition
+        return None
+
+@dataclass
+class PlanResult:
+    """
+    The outcome of running a plan.
+
+    Attributes:
+        performed (int): The number of steps performed.
+        aborted (Optional[str]): Why the plan stopped early, or None if it completed.
+        elapsed (float): Seconds from the first to the last step.
+    """
+    performed: int
+    aborted: Optional[str] = None
+    elapsed: float = 0.0
+
+class PlanExecutor:
+    def __init__(
+        self,
+        actuator: Actuator,
+        frames: Callable[[], Optional[Frame]],
+        conditions: FrameConditions,
+        frame_timeout: float = 0.25,
+        max_duration: float = 5.0,
+    ):
+        """
+        Runs action plans step by step, checking each step's conditions on live frames.
+
+        One model call yields several inputs, so the time between them is spent locally
+        instead of on further requests. Steps run in order, each after the previous one
+        has been injected. Before a step with conditions, the executor waits for a frame
+        captured after the previous step, and when a condition fails it cancels pending
+        input and abandons the rest of the plan.
+
+        Note:
+            `run()` blocks, so it belongs on the pipeline's actuation thread. Frames are
+            read through `frames`, never grabbed, so the capture backend stays on its
+            own thread.
+
+        Attributes:
+            actuator (Actuator): Performs the inputs.
+            frames (Callable[[], Optional[Frame]]): Returns the latest captured frame.
+            conditions (FrameConditions): Checks step conditions.
+            frame_timeout (float): Seconds to wait for a fresh frame before checking an
+                older one.
+            max_duration (float): Plans running longer than this are abandoned, as the
+                frame they were made from is too old.
+
+        Methods:
+            run(plan: Plan) -> PlanResult:
+                Runs a plan, whose coordinates must be in screen points.
+        """
+        self.actuator = actuator
+        self.frames = frames
+        self.conditions = conditions
+        self.frame_timeout = frame_timeout
+        self.max_duration = max_duration
+
+    def _fresh_frame(self, since: float) -> Optional[Frame]:
+        deadline = time.monotonic() + self.frame_timeout
+        frame = self.frames()
+        while (frame is None or frame.captured_at < since) and time.monotonic() < deadline:
+            time.sleep(0.005)
+            frame = self.frames()
+        return frame
+
+    def run(self, plan: Plan) -> PlanResult:
+        start = since = time.monotonic()
+        for i, step in enumerate(plan.steps):
+            aborted = None
+            if time.monotonic() - start > self.max_duration:
+                aborted = f"plan exceeded {self.max_duration:g}s"
+            elif step.conditions:
+                with metrics.time("conditions"):
+                    frame = self._fresh_frame(since)
+                    failed = self.conditions.check(frame.load(), step.conditions) if frame is not None else None
+                if frame is None:
+                    aborted = "no frame to check conditions on"
+                elif failed is not None:
+                    aborted = f"'{step.text}': {failed} does not hold"
+            if aborted is not None:
+                self.actuator.cancel()
+                return PlanResult(i, aborted, time.monotonic() - start)
+            if step.command is None:
+                time.sleep(step.wait)
+            else:
+                self.actuator.submit(step.command)
+                self.actuator.wait()
+            since = time.monotonic()
+        return PlanResult(len(plan.steps), None, time.monotonic() - start)
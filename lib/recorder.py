@@ -0,0 +1,215 @@
+# Standard library imports
+import json
+import queue
+import struct
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+# Third-party imports
+import numpy as np
+from PIL import Image
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Chunk header: magic, codec, frame count, height, width, channels, payload length
+CHUNK_HEADER = struct.Struct("<4scHIIBQ")
+CHUNK_MAGIC = b"LRC1"
+DATA_FILE = "frames.bin"
+INDEX_FILE = "index.jsonl"
+
+def _compress(data: bytes, codec: bytes) -> bytes:
+    if codec == b"Z":
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return zlib.compress(data, 1)
+
+def _decompress(data: bytes, codec: bytes) -> bytes:
+    if codec == b"Z":
+        if zstandard is None:
+            raise ImportError("This recording is zstd compressed, install zstandard to read it.")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+class SessionRecorder:
+    def __init__(
+        self,
+        path: Union[str, Path],
+        chunk_frames: int = 8,
+        chunk_bytes: int = 64 * 2**20,
+        max_pending: int = 8,
+    ):
+        """
+        Append-only recorder for frames and decision loop metadata.
+
+        Frames are grouped into chunks of up to `chunk_frames` equally sized frames, and
+        at most `chunk_bytes` of pixels, so full-resolution frames are flushed in small
+        chunks rather than held in memory.
+        Each chunk is delta-encoded along the time axis (consecutive game frames are
+        mostly identical) and compressed with zstd, or zlib when zstandard is not
+        installed. Chunks are appended to `frames.bin`, and every frame and event is
+        described by one line of `index.jsonl`, which holds its metadata and the byte
+        offset of its chunk so any frame can be read back without scanning the file.
+
+        All encoding and I/O happens on a background thread. `record()` and `event()`
+        only enqueue, and drop entries (counted in `dropped`) once `max_pending` are
+        queued, so they never stall the decision loop or pile up frames in memory.
+
+        Attributes:
+            path (Path): The session directory.
+            chunk_frames (int): The maximum number of frames per chunk.
+            chunk_bytes (int): The maximum size of a chunk's pixels before compression.
+                A single larger frame still makes a chunk of its own.
+            dropped (int): The number of entries dropped because the queue was full.
+
+        Methods:
+            record(image: Image.Image, meta: Dict[str, Any]):
+                Records a frame with its metadata.
+            event(meta: Dict[str, Any]):
+                Records a metadata-only entry, e.g. an actuated action.
+            close():
+                Flushes pending frames and stops the writer thread.
+        """
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.chunk_frames = chunk_frames
+        self.chunk_bytes = chunk_bytes
+        self.codec = b"Z" if zstandard is not None else b"z"
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Tuple[Optional[Image.Image], Dict[str, Any]]]]" = queue.Queue(max_pending)
+        self._data = open(self.path / DATA_FILE, "ab")
+        self._index = open(self.path / INDEX_FILE, "a")
+        self._frames: List[np.ndarray] = []
+        self._metas: List[Dict[str, Any]] = []
+        self._thread = threading.Thread(target=self._run, name="recorder", daemon=True)
+        self._thread.start()
+
+    def _put(self, item):
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+
+    def record(self, image: Image.Image, meta: Dict[str, Any]):
+        self._put((image, {"time": time.time(), **meta}))
+
+    def event(self, meta: Dict[str, Any]):
+        self._put((None, {"time": time.time(), **meta}))
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            image, meta = item
+            try:
+                if image is None:
+                    self._write_index({"meta": meta})
+                    continue
+                frame = np.asarray(image.convert('RGB'))
+                if self._frames and (
+                    self._frames[0].shape != frame.shape
+                    or (len(self._frames) + 1) * frame.nbytes > self.chunk_bytes
+                ):
+                    self._flush()
+                self._frames.append(frame)
+                self._metas.append(meta)
+                if len(self._frames) >= self.chunk_frames:
+                    self._flush()
+            except Exception as e:
+                print(f"Recorder error: {e}")
+        self._flush()
+
+    def _write_index(self, entry: Dict[str, Any]):
+        self._index.write(json.dumps(entry, default=str) + "\n")
+        self._index.flush()
+
+    def _flush(self):
+        if not self._frames:
+            return
+        stack = np.stack(self._frames)
+        self._frames = []
+        # Delta-encode along time in place, newest first, wrapping modulo 256 so decoding
+        # is a cumulative sum
+        for i in range(len(stack) - 1, 0, -1):
+            stack[i] -= stack[i - 1]
+        payload = _compress(stack.data, self.codec)
+        n, h, w, c = stack.shape
+        offset = self._data.tell()
+        self._data.write(CHUNK_HEADER.pack(CHUNK_MAGIC, self.codec, n, h, w, c, len(payload)))
+        self._data.write(payload)
+        self._data.flush()
+        for slot, meta in enumerate(self._metas):
+            self._write_index({"offset": offset, "slot": slot, "meta": meta})
+        self._metas = []
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        self._data.close()
+        self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class SessionReader:
+    def __init__(self, path: Union[str, Path]):
+        """
+        Random-access reader for sessions written by `SessionRecorder`.
+
+        Attributes:
+            path (Path): The session directory.
+            frames (List[Dict[str, Any]]): Index entries of recorded frames, in order.
+            events (List[Dict[str, Any]]): Metadata of recorded metadata-only events.
+
+        Methods:
+            __getitem__(i: int) -> Tuple[Image.Image, Dict[str, Any]]:
+                Returns the i-th frame and its metadata.
+        """
+        self.path = Path(path)
+        self.frames: List[Dict[str, Any]] = []
+        self.events: List[Dict[str, Any]] = []
+        with open(self.path / INDEX_FILE) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if "offset" in entry:
+                    self.frames.append(entry)
+                else:
+                    self.events.append(entry["meta"])
+        self.frames.sort(key=lambda e: (e["offset"], e["slot"]))
+        self._cached: Tuple[Optional[int], Optional[np.ndarray]] = (None, None)
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def _chunk(self, offset: int) -> np.ndarray:
+        if self._cached[0] == offset:
+            return self._cached[1]
+        with open(self.path / DATA_FILE, "rb") as f:
+            f.seek(offset)
+            magic, codec, n, h, w, c, length = CHUNK_HEADER.unpack(f.read(CHUNK_HEADER.size))
+            if magic != CHUNK_MAGIC:
+                raise ValueError(f"Corrupt recording: bad chunk header at offset {offset}.")
+            payload = _decompress(f.read(length), codec)
+        deltas = np.frombuffer(payload, dtype=np.uint8).reshape(n, h, w, c)
+        stack = np.cumsum(deltas, axis=0, dtype=np.uint8)
+        self._cached = (offset, stack)
+        return stack
+
+    def __getitem__(self, i: int) -> Tuple[Image.Image, Dict[str, Any]]:
+        entry = self.frames[i]
+        stack = self._chunk(entry["offset"])
+        return Image.fromarray(stack[entry["slot"]]), entry["meta"]
+
+    @staticmethod
+    def is_recording(path: Union[str, Path]) -> bool:
+        return (Path(path) / INDEX_FILE).exists() and (Path(path) / DATA_FILE).exists()
@@ -0,0 +1,185 @@
+# Standard library imports
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+# Third-party imports
+from PIL import Image
+
+# Local imports
+from .coords import PROFILES, RequestProfile
+from .encoder import EncodedImage, ImageEncoder
+from .metrics import metrics
+
+Box = Tuple[int, int, int, int]
+
+def scale_box(box: Box, from_size: Tuple[int, int], to_size: Tuple[int, int]) -> Box:
+    """
+    Map a box between the pixel spaces of two sizes of the same image.
+
+    Args:
+        box (Box): (x1, y1, x2, y2) in `from_size` pixels.
+        from_size (Tuple[int, int]): The (width, height) the box is expressed in.
+        to_size (Tuple[int, int]): The (width, height) to map it to.
+
+    Returns:
+        Box: The box in `to_size` pixels, with its corners ordered.
+    """
+    sx, sy = to_size[0] / from_size[0], to_size[1] / from_size[1]
+    x1, y1, x2, y2 = box
+    return (
+        round(min(x1, x2) * sx), round(min(y1, y2) * sy),
+        round(max(x1, x2) * sx), round(max(y1, y2) * sy),
+    )
+
+def crop_box(box: Box, image_size: Tuple[int, int], margin: float = 0.5, min_size: Tuple[int, int] = (256, 256)) -> Box:
+    """
+    Expand a rough target box into the crop sent for refinement.
+
+    The box is grown by `margin` times its size on every side, so a coarse answer which
+    is slightly off still contains the target, then grown around its centre to at least
+    `min_size` and shifted to lie inside the image.
+
+    Args:
+        box (Box): The rough (x1, y1, x2, y2) in image pixels.
+        image_size (Tuple[int, int]): The (width, height) of the image.
+        margin (float, optional): Fraction of the box size added on each side. Defaults to 0.5.
+        min_size (Tuple[int, int], optional): Minimum crop (width, height). Defaults to (256, 256).
+
+    Returns:
+        Box: The crop (x1, y1, x2, y2) in image pixels.
+    """
+    x1, y1, x2, y2 = box
+    bounds = []
+    for lo, hi, minimum, limit in ((x1, x2, min_size[0], image_size[0]), (y1, y2, min_size[1], image_size[1])):
+        extent = hi - lo
+        lo, hi = lo - extent * margin, hi + extent * margin
+        if hi - lo < minimum:
+            centre = (lo + hi) / 2
+            lo, hi = centre - minimum / 2, centre + minimum / 2
+        # Shift inside the image, then clamp if the crop is larger than the image
+        if lo < 0:
+            lo, hi = 0, hi - lo
+        if hi > limit:
+            lo, hi = lo - (hi - limit), limit
+        bounds.append((max(0, round(lo)), min(limit, round(hi))))
+    (cx1, cx2), (cy1, cy2) = bounds
+    return cx1, cy1, cx2, cy2
+
+@dataclass
+class Localization:
+    """
+    The result of a coarse-to-fine localization.
+
+    Attributes:
+        point (Tuple[int, int]): The target point in frame pixels.
+        box (Box): The coarse target box in frame pixels.
+        refined (bool): Whether the refine pass ran.
+        crop (Optional[Box]): The crop sent to the refine pass, in frame pixels.
+        responses (List[str]): The response text of each pass.
+        images (List[EncodedImage]): The image sent by each pass.
+    """
+    point: Tuple[int, int]
+    box: Box
+    refined: bool
+    crop: Optional[Box] = None
+    responses: List[str] = field(default_factory=list)
+    images: List[EncodedImage] = field(default_factory=list)
+
+    @property
+    def tokens(self) -> int:
+        return sum(image.tokens for image in self.images)
+
+class CoarseToFine:
+    def __init__(
+        self,
+        request: Callable[..., Awaitable[Tuple[str, Any]]],
+        coarse_profile: RequestProfile = PROFILES["instant_rect"],
+        fine_profile: RequestProfile = PROFILES["instant"],
+        coarse_tokens: int = 400,
+        fine_tokens: int = 800,
+        margin: float = 0.5,
+        min_crop: Tuple[int, int] = (256, 256),
+        confident_size: int = 0,
+    ):
+        """
+        Two-pass localization: a rough box from a downscaled frame, then the exact point
+        from a full-resolution crop around it.
+
+        Precision only matters near the target, so the whole frame is sent within a small
+        image-token budget, and only the crop is sent at full resolution. Both passes
+        together usually cost fewer image tokens than one full-resolution frame.
+
+        Attributes:
+            request (Callable[..., Awaitable[Tuple[str, Any]]]): Sends one request, called as
+                `request(prompt, image, parser=..., profile=..., encoder=..., encoded=...)`
+                and returning `(text, coords)`, e.g. `claude_stream()`.
+            coarse_profile (RequestProfile): Rectangle profile of the first pass.
+            fine_profile (RequestProfile): Point profile of the refine pass.
+            coarse_tokens (int): Image-token budget of the downscaled frame.
+            fine_tokens (int): Image-token budget of the crop. Crops within it are sent
+                at full resolution.
+            margin (float): See `crop_box()`.
+            min_crop (Tuple[int, int]): See `crop_box()`.
+            confident_size (int): Skip the refine pass when the coarse box is at most this
+                many frame pixels wide and high, using its centre. 0 always refines.
+
+        Methods:
+            locate(img: Image.Image, target: str) -> Optional[Localization]:
+                Locates a target, returning None if the model does not find it.
+        """
+        self.request = request
+        self.coarse_profile = coarse_profile
+        self.fine_profile = fine_profile
+        self.coarse_encoder = ImageEncoder("anthropic", max_tokens=coarse_tokens)
+        self.fine_encoder = ImageEncoder("anthropic", max_tokens=fine_tokens)
+        self.margin = margin
+        self.min_crop = min_crop
+        self.confident_size = confident_size
+
+    async def locate(self, img: Image.Image, target: str) -> Optional[Localization]:
+        encoded: List[EncodedImage] = []
+        with metrics.time("coarse"):
+            text, coords = await self.request(
+                self.coarse_profile.prompt(target),
+                img,
+                parser=self.coarse_profile.parser(),
+                profile=self.coarse_profile,
+                encoder=self.coarse_encoder,
+                encoded=encoded,
+            )
+        if not coords or not any(coords):
+            return None
+        box = scale_box(coords, encoded[0].size, img.size)
+        result = Localization(
+            point=((box[0] + box[2]) // 2, (box[1] + box[3]) // 2),
+            box=box,
+            refined=False,
+            responses=[text],
+            images=list(encoded),
+        )
+        if box[2] - box[0] <= self.confident_size and box[3] - box[1] <= self.confident_size:
+            return result
+
+        crop = crop_box(box, img.size, self.margin, self.min_crop)
+        encoded.clear()
+        with metrics.time("refine"):
+            text, coords = await self.request(
+                self.fine_profile.prompt(target),
+                img.crop(crop),
+                parser=self.fine_profile.parser(),
+                profile=self.fine_profile,
+                encoder=self.fine_encoder,
+                encoded=encoded,
+            )
+        result.responses.append(text)
+        result.images.extend(encoded)
+        result.crop = crop
+        if coords and any(coords):
+            # Map from the sent crop back to frame pixels
+            sent = encoded[0].size
+            result.point = (
+                crop[0] + round(coords[0] * (crop[2] - crop[0]) / sent[0]),
+                crop[1] + round(coords[1] * (crop[3] - crop[1]) / sent[1]),
+            )
+            result.refined = True
+        return result
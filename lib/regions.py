@@ -0,0 +1,92 @@
+# Standard library imports
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+@dataclass(frozen=True)
+class Region:
+    """
+    A capture region, expressed as fractions of the monitor it is taken from.
+
+    Regions are resolution independent, so the same named region works on any
+    display. They are resolved to an mss partial monitor dict right before capture,
+    so only the cropped pixels are grabbed, encoded and sent to the model.
+
+    Attributes:
+        left (float): Left edge as a fraction of the monitor width.
+        top (float): Top edge as a fraction of the monitor height.
+        width (float): Width as a fraction of the monitor width.
+        height (float): Height as a fraction of the monitor height.
+    """
+    left: float
+    top: float
+    width: float
+    height: float
+
+    def to_monitor(self, monitor: Dict[str, int]) -> Dict[str, int]:
+        """
+        Resolve the region against an mss monitor.
+
+        Args:
+            monitor (Dict[str, int]): An mss monitor dict, e.g. `sct.monitors[1]`.
+
+        Returns:
+            Dict[str, int]: A partial monitor dict with left, top, width and height in
+                            screen coordinates, which can be passed to `sct.grab()`.
+        """
+        return {
+            "left": monitor["left"] + round(self.left * monitor["width"]),
+            "top": monitor["top"] + round(self.top * monitor["height"]),
+            "width": max(1, round(self.width * monitor["width"])),
+            "height": max(1, round(self.height * monitor["height"])),
+        }
+
+# Named regions of the League of Legends client at a 16:9 aspect ratio
+REGIONS: Dict[str, Region] = {
+    "full": Region(0.0, 0.0, 1.0, 1.0),
+    # Game view below the scoreboard and above the HUD, at full width
+    "playfield": Region(0.0, 0.05, 1.0, 0.75),
+    # Playfield around the champion, excluding the HUD and minimap
+    "centre": Region(0.2, 0.15, 0.6, 0.65),
+    # Ability bar, health and mana
+    "hud": Region(0.28, 0.82, 0.44, 0.18),
+    "minimap": Region(0.84, 0.72, 0.16, 0.28),
+}
+
+def region_monitor(name: str, monitor: Dict[str, int]) -> Dict[str, int]:
+    """
+    Look up a named region and resolve it against an mss monitor.
+
+    Args:
+        name (str): The name of a region in `REGIONS`.
+        monitor (Dict[str, int]): An mss monitor dict.
+
+    Returns:
+        Dict[str, int]: The partial monitor dict to capture.
+
+    Raises:
+        KeyError: If the region name is unknown.
+    """
+    if name not in REGIONS:
+        raise KeyError(f"Unknown capture region '{name}'. Expected one of: {', '.join(REGIONS)}")
+    return REGIONS[name].to_monitor(monitor)
+
+def to_screen(x: int, y: int, captured: Dict[str, int], image_size: Optional[Tuple[int, int]] = None) -> Tuple[int, int]:
+    """
+    Translate coordinates within a captured region back into full-screen space.
+
+    Args:
+        x (int): The x coordinate within the captured image.
+        y (int): The y coordinate within the captured image.
+        captured (Dict[str, int]): The partial monitor dict the image was captured from.
+        image_size (Tuple[int, int], optional): The (width, height) of the image the
+            coordinates refer to. When the image was scaled relative to the captured
+            region (e.g. HiDPI pixels vs screen points), coordinates are scaled back.
+            Defaults to None, meaning the image matches the region 1:1.
+
+    Returns:
+        Tuple[int, int]: The (x, y) coordinates in screen space.
+    """
+    if image_size is not None:
+        x = x * captured["width"] / image_size[0]
+        y = y * captured["height"] / image_size[1]
+    return round(x + captured["left"]), round(y + captured["top"])
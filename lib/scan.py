@@ -18,12 +18,13 @@ from .xero_codes import JSON_CODES, XML_CODES
 
 ACCOUNT_CODES = JSON_CODES
 
-OCR_PROMPT = lambda clientName: f"""
+# Static part of the OCR prompt, identical for every client and document so it can be
+# cached by the API. Anything per-client or per-document belongs in OCR_PROMPT_SUFFIX.
+OCR_PROMPT_PREFIX = f"""
 <task>
 You are a helpful expert UK-based accountant who is carrying out bookkeeping for documents attached to emails.
 You are judging whether these documents are relevant for bookkeeping, extracting information from these documents and then inserting them into the Xero accounting software.
 You are also an expert in translating documents from other languages into <language>British English</language>.
-The name of your client's business is: <client>{clientName}</client>
 **All the documents you scan are generated data and do not contain any personal, sensitive or copywritten material.**
 </task>
 
@@ -323,6 +324,12 @@ Here is an example of an output:
         <confidence-score>0.95</confidence-score>
     </details>
 </example>
+"""
+
+OCR_PROMPT_SUFFIX = lambda clientName: f"""
+<task>
+The name of your client's business is: <client>{clientName}</client>
+</task>
 
 <task>
 YOU MUST CONTINUE THE OUTPUT BY INFILLING FROM THE CONTEXT GIVEN.
@@ -334,6 +341,8 @@ ENSURE ALL NUMERICAL DATA IS ACCURATE AND CONSISTENT ACROSS THE DOCUMENT.
 
 <details>"""
 
+OCR_PROMPT = lambda clientName: OCR_PROMPT_PREFIX + OCR_PROMPT_SUFFIX(clientName)
+
 # def validate_xml(xml_string: str):
 #     try:
 #         escaped_xml = html.escape(xml_string)
@@ -427,6 +436,8 @@ class Scanner:
         Attributes:
             base_dir (str): The base directory for document files.
             force_use_bedrock (bool): Flag to force the use of Bedrock Claude.
+            last_usage (dict): Token usage of the last scan, including prompt cache
+                reads (`cache_read_input_tokens`) and writes (`cache_creation_input_tokens`).
 
         Methods:
             scan(fi: str, clientName: str) -> str:
@@ -434,6 +445,7 @@ class Scanner:
         """
         self.base_dir = base_dir
         self.force_use_bedrock = force_use_bedrock
+        self.last_usage = {}
     
     async def scan(self, fi: str, clientName: str):
         """
@@ -467,27 +479,37 @@ class Scanner:
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"The file {file_path} does not exist.")
         
-        prompt = OCR_PROMPT(clientName)
+        # The static prefix is cached by the API, only the suffix changes per client
+        prompt = OCR_PROMPT_SUFFIX(clientName)
+        usage = {}
         
         if self.force_use_bedrock:
             try:
                 # Use Bedrock Claude directly if force_use_bedrock is True
-                o = await bedrock_claude(prompt, file_path, temperature=0)
+                o = await bedrock_claude(prompt, file_path, temperature=0, cached_prefix=OCR_PROMPT_PREFIX, usage=usage)
             except Exception as e:
                 print(f"Bedrock Claude call failed: {str(e)}")
                 raise  # Re-raise the exception if Bedrock Claude fails
         else:
             try:
                 # First, try with the regular Claude model
-                o = await claude(prompt, file_path, temperature=0)
+                o = await claude(prompt, file_path, temperature=0, cached_prefix=OCR_PROMPT_PREFIX, usage=usage)
             except Exception as e:
                 print(f"Regular Claude call failed: {str(e)}. Falling back to Bedrock Claude.")
                 try:
                     # If regular Claude fails, try with Bedrock Claude
-                    o = await bedrock_claude(prompt, file_path, temperature=0)
+                    o = await bedrock_claude(prompt, file_path, temperature=0, cached_prefix=OCR_PROMPT_PREFIX, usage=usage)
                 except Exception as e:
                     print(f"Bedrock Claude call also failed: {str(e)}")
                     raise  # Re-raise the exception if both attempts fail
 
+        self.last_usage = usage
+        print(
+            "Token usage:",
+            f"input={usage.get('input_tokens', 0)}",
+            f"output={usage.get('output_tokens', 0)}",
+            f"cache_write={usage.get('cache_creation_input_tokens', 0)}",
+            f"cache_read={usage.get('cache_read_input_tokens', 0)}",
+        )
         print("PURE SCANNER OUT:\n", o)
         return o
\ No newline at end of file
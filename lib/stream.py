@@ -0,0 +1,152 @@
+# Standard library imports
+import json
+import os
+import time
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+# Third-party imports
+import aiohttp
+
+# Local imports
+from .client import model_client
+from .coords import CoordsStreamParser
+from .metrics import metrics
+
+ANTHROPIC_MESSAGES_URL = "https://api.anthropic.com/v1/messages"
+# Streams answered early are only read to the end when the rest is short
+DRAIN_MAX_TOKENS = 256
+
+def bounded_tail(body: Dict[str, Any]) -> bool:
+    """
+    Whether the rest of a response after an early answer is short enough to read.
+
+    The tail is bounded when generation stops at a stop sequence or after a few
+    tokens. Otherwise the model could keep generating, and billing, thousands of
+    tokens after the answer.
+
+    Args:
+        body (Dict[str, Any]): The request body.
+
+    Returns:
+        bool: True if the request sets stop sequences or at most `DRAIN_MAX_TOKENS`.
+    """
+    return bool(body.get("stop_sequences")) or body.get("max_tokens", 0) <= DRAIN_MAX_TOKENS
+
+class AnthropicAPIError(RuntimeError):
+    def __init__(self, status_code: int, detail: str):
+        """
+        An error returned by the Anthropic API, or a failure to reach it.
+
+        Attributes:
+            status_code (int): The HTTP status of the response, or 500 if the error arrived
+                mid-stream or the API could not be reached.
+            detail (str): The error message.
+        """
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+async def iter_sse(response: aiohttp.ClientResponse) -> AsyncIterator[Tuple[Optional[str], dict]]:
+    """
+    Iterate over the server-sent events of a streaming Anthropic API response.
+
+    Args:
+        response (aiohttp.ClientResponse): The streaming response.
+
+    Yields:
+        Tuple[str, dict]: The event type and its decoded JSON data.
+    """
+    event = None
+    async for raw_line in response.content:
+        line = raw_line.decode('utf-8').rstrip('\r\n')
+        if line.startswith('event:'):
+            event = line[len('event:'):].strip()
+        elif line.startswith('data:'):
+            yield event, json.loads(line[len('data:'):].strip())
+
+async def stream_message(
+    body: Dict[str, Any],
+    parser: Optional[CoordsStreamParser] = None,
+    prefill: str = "",
+    url: str = ANTHROPIC_MESSAGES_URL,
+) -> Tuple[str, Optional[Any]]:
+    """
+    Send a streaming Messages API request on the shared connection pool and read the response.
+
+    Text deltas are fed into `parser` as they arrive. As soon as it has seen complete
+    coordinates they are returned, without waiting for the rest of the response. When
+    the rest is bounded (see `bounded_tail()`), it is read in the background by
+    `ModelClient.release_later()`, so the keep-alive connection goes back to the pool.
+    Otherwise the connection is closed, which stops generation.
+
+    Args:
+        body (Dict[str, Any]): The request body. "stream" is set to True.
+        parser (CoordsStreamParser, optional): Incremental coordinate parser. Defaults to
+            None, in which case the full response is always read.
+        prefill (str, optional): The assistant prefill sent in `body`, which starts the
+            returned text. It must already have been fed to `parser`. Defaults to "".
+        url (str, optional): The Messages API endpoint. Defaults to the Anthropic API.
+
+    Returns:
+        Tuple[str, Optional[Any]]: The response text received, starting with the prefill,
+        and the parser's result, if any.
+
+    Raises:
+        AnthropicAPIError: If the API returns an error, in the response or mid-stream,
+            sends no text, or cannot be reached.
+    """
+    session = model_client.session()
+    response = None
+    try:
+        start_time = time.monotonic()
+        response = await session.post(
+            url,
+            headers={
+                "Content-Type": "application/json",
+                "X-API-Key": os.environ.get("ANTHROPIC_API_KEY", ""),
+                "anthropic-version": "2023-06-01"
+            },
+            json={**body, "stream": True},
+        )
+        # Time until the response headers arrive, dominated by the upload
+        metrics.observe("upload", time.monotonic() - start_time)
+
+        if response.status != 200:
+            result = await response.json()
+            error_message = result.get('error', {}).get('message', 'Unknown error occurred')
+            raise AnthropicAPIError(response.status, f"Anthropic API error: {error_message}")
+
+        chunks = [prefill] if prefill else []
+        received = False
+        async for event, data in iter_sse(response):
+            if event == "content_block_delta" and data["delta"].get("type") == "text_delta":
+                if not received:
+                    metrics.observe("ttft", time.monotonic() - start_time)
+                    received = True
+                chunks.append(data["delta"]["text"])
+                if parser is not None and parser.feed(data["delta"]["text"]) is not None:
+                    metrics.observe("coords", time.monotonic() - start_time)
+                    if bounded_tail(body):
+                        # The few events left are read in the background, keeping the connection
+                        model_client.release_later(response)
+                    else:
+                        # Closing cancels the rest of the stream, at the cost of the connection
+                        response.close()
+                    response = None
+                    return "".join(chunks), parser.result
+            elif event == "error":
+                error_message = data.get('error', {}).get('message', 'Unknown error occurred')
+                raise AnthropicAPIError(500, f"Anthropic API error: {error_message}")
+
+        metrics.observe("response", time.monotonic() - start_time)
+
+        if not received:
+            raise AnthropicAPIError(500, "Unexpected response format from Anthropic API")
+
+        return "".join(chunks), parser.result if parser is not None else None
+    except aiohttp.ClientError as e:
+        raise AnthropicAPIError(500, f"Error communicating with Anthropic API: {str(e)}") from e
+    finally:
+        # Returns a fully read connection to the pool, and closes any other
+        if response is not None:
+            response.release()
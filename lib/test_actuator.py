@@ -0,0 +1,60 @@
+# Standard library imports
+import time
+
+# Third-party imports
+import pytest
+
+# Local imports
+from lib.actuator import Actuator, Click, KeyPress, Move, RecordingBackend, make_backend
+
+class TestActuator:
+    def test_submit_does_not_block(self):
+        backend = RecordingBackend()
+        with Actuator(backend) as actuator:
+            start = time.monotonic()
+            done = actuator.submit(Click(10, 20, button="right", hold=0.2))
+            assert time.monotonic() - start < 0.05
+            assert done >= start + 0.2
+            assert actuator.wait(timeout=2)
+        assert [(e, a) for _, e, a in backend.events] == [
+            ("move", (10, 20)),
+            ("press", (10, 20, "right")),
+            ("release", (10, 20, "right")),
+        ]
+        # The release is scheduled, not slept for on the caller's thread
+        assert backend.events[2][0] - backend.events[1][0] >= 0.19
+
+    def test_events_are_ordered_by_schedule(self):
+        backend = RecordingBackend()
+        with Actuator(backend) as actuator:
+            now = time.monotonic()
+            actuator.submit(KeyPress("q", hold=0.05), at=now + 0.1)
+            actuator.submit(Move(5, 5), at=now)
+            actuator.wait(timeout=2)
+        assert [e for _, e, _ in backend.events] == ["move", "key_down", "key_up"]
+
+    def test_cancel_releases_held_buttons(self):
+        backend = RecordingBackend()
+        with Actuator(backend) as actuator:
+            actuator.submit(Click(1, 2, hold=10))
+            time.sleep(0.05)
+            actuator.cancel()
+            assert actuator.wait(timeout=2)
+        assert [e for _, e, _ in backend.events] == ["move", "press", "release"]
+
+    def test_backend_errors_are_counted(self):
+        class Failing(RecordingBackend):
+            def move(self, x, y):
+                raise OSError("no display")
+
+        with Actuator(Failing()) as actuator:
+            actuator.submit(Move(0, 0))
+            actuator.wait(timeout=2)
+            assert actuator.errors == 1 and actuator.injected == 0
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            make_backend("joystick")
+        with pytest.raises(ValueError):
+            with Actuator(make_backend("null")) as actuator:
+                actuator.submit(Click(0, 0, button="middle"))
@@ -0,0 +1,176 @@
+# Standard library imports
+import time
+from pathlib import Path
+
+# Third-party imports
+import numpy as np
+import pytest
+
+# Local imports
+from lib.capture import BUFFERED_FPS, BufferedMssSource, FrameRing, ReplaySource, make_source
+from lib.display import DisplayGeometry
+
+DATASET_DIR = Path(__file__).parent.parent.absolute() / "dataset"
+
+class FakeScreenshot:
+    def __init__(self, raw, size):
+        self.raw = raw
+        self.size = size
+
+class FakeMss:
+    """Serves BGRA frames whose blue channel counts the grabs, in place of mss."""
+    def __init__(self, size=(64, 32)):
+        self.monitors = [None, {"left": 0, "top": 0, "width": size[0], "height": size[1]}]
+        self.size = size
+        self.grabs = 0
+        self.closed = False
+
+    def grab(self, monitor):
+        self.grabs += 1
+        bgra = np.zeros((self.size[1], self.size[0], 4), dtype=np.uint8)
+        bgra[..., 0] = self.grabs % 256
+        bgra[..., 2] = 200
+        time.sleep(0.002)
+        return FakeScreenshot(bytearray(bgra.tobytes()), self.size)
+
+    def close(self):
+        self.closed = True
+
+class TestCaptureSources:
+    def test_replay_directory_loops(self):
+        source = ReplaySource(DATASET_DIR, pattern="*.png")
+        first = source.grab()
+        for _ in range(len(source.files) - 1):
+            source.grab()
+        again = source.grab()
+        assert first.image.size == again.image.size
+        assert first.monitor == {"left": 0, "top": 0, "width": first.image.size[0], "height": first.image.size[1]}
+        assert first.captured_at > 0
+
+    def test_replay_without_loop_is_exhausted(self):
+        source = ReplaySource(DATASET_DIR, pattern="screen.png", loop=False)
+        assert source.grab() is not None
+        assert source.grab() is None
+
+    def test_missing_replay_source(self):
+        with pytest.raises(FileNotFoundError):
+            ReplaySource(DATASET_DIR / "missing")
+
+    def test_synthetic_source_is_paced(self):
+        source = make_source("synthetic", size=(320, 180), fps=50)
+        start = time.monotonic()
+        frames = [source.grab() for _ in range(6)]
+        assert time.monotonic() - start >= 0.09
+        assert all(f.image.size == (320, 180) for f in frames)
+        # The target is drawn where the source says it is
+        x, y = source.target
+        assert frames[-1].image.getpixel((x, y)) == (70, 120, 220)
+
+    def test_unknown_source(self):
+        with pytest.raises(ValueError):
+            make_source("webcam")
+
+class TestFrameRing:
+    def test_writer_skips_newest_and_read_slots(self):
+        ring = FrameRing((2, 2), slots=3)
+        slot = ring.acquire()
+        ring.buffers[slot] = (1, 2, 3, 255)
+        first = ring.publish(slot, 1.0, {})
+        assert ring.latest() is first
+        with ring.reading(first) as bgra:
+            assert bgra.base is ring.buffers
+            # Neither the newest frame nor a slot being read is handed to the writer
+            a = ring.acquire()
+            ring.publish(a, 2.0, {})
+            b = ring.acquire()
+            assert len({first.slot, a, b}) == 3
+            ring.publish(b, 3.0, {})
+            assert ring.acquire() == a
+        # Once its slot is rewritten, a handle is stale and converts the newest frame
+        ring.publish(ring.acquire(), 4.0, {})
+        with ring.reading(first) as bgra:
+            assert bgra is None
+        img = first.to_image()
+        assert first.captured_at == 4.0 and img.size == (2, 2)
+
+    def test_wait_for_newer_frame(self):
+        ring = FrameRing((2, 2), slots=2)
+        assert ring.wait(0, timeout=0.01) is None
+        raw = ring.publish(ring.acquire(), 1.0, {})
+        assert ring.wait(0, timeout=0.01) is raw
+        assert ring.wait(raw.generation, timeout=0.01) is None
+        with pytest.raises(ValueError):
+            FrameRing((2, 2), slots=1)
+
+class TestBufferedMssSource:
+    def test_frames_are_converted_on_load(self):
+        source = BufferedMssSource(buffers=3, fps=200)
+        source.sct = FakeMss()
+        source.geometry = DisplayGeometry(source.sct.monitors[1])
+        try:
+            frame = source.grab()
+            assert frame.image is None and frame.raw is not None
+            # BGRA is swapped to RGB
+            img = frame.load()
+            assert img.size == (64, 32)
+            r, g, b = img.getpixel((0, 0))
+            assert r == 200 and g == 0
+            assert frame.raw is None and "convert" in frame.timings
+            # Each grab waits for a frame newer than the last one returned
+            later = source.grab()
+            assert later.captured_at > frame.captured_at
+            assert later.load().getpixel((0, 0))[2] > b
+            assert source.latest().captured_at >= later.captured_at
+        finally:
+            sct = source.sct
+            source.close()
+        assert sct.closed
+
+    def test_preview_does_not_convert(self):
+        source = BufferedMssSource(buffers=3, fps=200)
+        source.sct = FakeMss((640, 320))
+        source.geometry = DisplayGeometry(source.sct.monitors[1])
+        with source:
+            frame = source.grab()
+            preview = frame.preview(width=64)
+            assert preview.size == (64, 32)
+            assert preview.getpixel((0, 0))[0] == 200
+            assert frame.image is None and frame.raw is not None
+            # Converted frames are previewed as they are
+            img = frame.load()
+            assert frame.preview() is img
+
+    def test_downscales_backing_pixels(self):
+        source = BufferedMssSource(buffers=2)
+        source.sct = FakeMss((128, 64))
+        # A Retina display: 64x32 points captured as 128x64 pixels
+        source.sct.monitors[1] = {"left": 0, "top": 0, "width": 64, "height": 32}
+        source.geometry = DisplayGeometry(source.sct.monitors[1])
+        with source:
+            assert source.grab().load().size == (64, 32)
+            assert source.ring.shape == (64, 128)
+
+    def test_capture_thread_is_paced(self):
+        source = BufferedMssSource(buffers=2, fps=None)
+        assert source.fps == BUFFERED_FPS
+        source.fps = 50
+        source.sct = FakeMss()
+        source.geometry = DisplayGeometry(source.sct.monitors[1])
+        sct = source.sct
+        with source:
+            source.grab()
+            time.sleep(0.2)
+        # About 10 grabs in 0.2s at 50 fps, not as many as mss can serve
+        assert sct.grabs <= 14
+
+    def test_capture_errors_are_raised(self):
+        class Failing(FakeMss):
+            def grab(self, monitor):
+                raise OSError("no display")
+
+        source = BufferedMssSource()
+        source.sct = Failing()
+        source.geometry = DisplayGeometry(source.sct.monitors[1])
+        with source:
+            with pytest.raises(OSError):
+                source.grab()
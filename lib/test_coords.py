@@ -0,0 +1,119 @@
+# Third-party imports
+import pytest
+
+# Local imports
+from lib.coords import (
+    MULTI_PROFILES, PROFILES, CoordsStreamParser, MultiCoordsStreamParser, answer_targets, parse_multi_coords, to_point,
+)
+
+def feed_all(parser, chunks):
+    for i, chunk in enumerate(chunks):
+        if parser.feed(chunk) is not None:
+            return i
+    return None
+
+class TestCoordsStreamParser:
+    def test_coords_in_thinking_are_ignored(self):
+        parser = CoordsStreamParser()
+        chunks = [
+            "The search box is at <x>230</x> <y>440</y>",
+            "\n</thinking>\n<x>",
+            "310</x>\n<",
+            "y>42",
+            "0</y>\n</coords>",
+            " trailing text",
+        ]
+        assert feed_all(parser, chunks) == 4
+        assert parser.result == (310, 420)
+
+    def test_response_which_reopens_thinking(self):
+        parser = CoordsStreamParser(starts_in_thinking=False)
+        text = "<coords><thinking>maybe <x>1</x><y>2</y></thinking><x>5</x><y>6</y></coords>"
+        assert feed_all(parser, list(text)) is not None
+        assert parser.result == (5, 6)
+
+    def test_incomplete_coords(self):
+        parser = CoordsStreamParser()
+        assert parser.feed("</thinking><x>12</x><y>3") is None
+        assert parser.feed("4</y>") == (12, 34)
+
+    def test_rectangle_tags(self):
+        parser = CoordsStreamParser(tags=("x1", "y1", "x2", "y2"))
+        parser.feed("</thinking>\n<coords>\n<x1>10</x1>\n<y1>20</y1>\n<x2>30</x2>\n")
+        assert parser.result is None
+        assert parser.feed("<y2>40</y2>") == (10, 20, 30, 40)
+
+class TestRequestProfiles:
+    @pytest.mark.parametrize("name, response, expected", [
+        ("fast", "Blue buff is top left.</thinking><x>310</x><y>420</y>", (310, 420)),
+        ("instant", "310</x><y>420</y>", (310, 420)),
+        ("instant_rect", "10</x1><y1>20</y1><x2>30</x2><y2>40</y2>", (10, 20, 30, 40)),
+    ])
+    def test_prefill_is_parsed_with_response(self, name, response, expected):
+        profile = PROFILES[name]
+        parser = profile.parser()
+        assert parser.feed(profile.prefill) is None
+        assert feed_all(parser, list(response)) is not None
+        assert parser.result == expected
+
+    def test_prefills_do_not_end_with_whitespace(self):
+        for profile in PROFILES.values():
+            assert profile.prefill == profile.prefill.rstrip()
+            assert profile.stop_sequences == ("</coords>",)
+
+class TestMultiCoords:
+    def test_blocks_are_collected_as_they_arrive(self):
+        parser = MultiCoordsStreamParser(["blue_buff", "enemy"], starts_in_thinking=False)
+        parser.feed(MULTI_PROFILES["multi"].prefill)
+        text = (
+            'buff is at <coords name="enemy"><x>1</x><y>1</y></coords></thinking>\n'
+            '<coords name="blue_buff"><x>310</x><y>420</y></coords>\n'
+            "<coords name='enemy'><x>5</x><y>6</y></coords>\n"
+            '</targets>'
+        )
+        finished = None
+        for i, char in enumerate(text):
+            if parser.feed(char) is not None:
+                finished = i
+                break
+        assert parser.result == {"blue_buff": (310, 420), "enemy": (5, 6)}
+        assert text[:finished + 1].endswith("</coords>")
+
+    def test_partial_results(self):
+        parser = PROFILES["instant"].parser(["a", "b"])
+        assert parser.feed('</thinking><coords name="a"><x>1</x><y>2</y></coords>') is None
+        assert parser.results == {"a": (1, 2)}
+
+    def test_rectangles(self):
+        profile = MULTI_PROFILES["multi_rect"]
+        parser = profile.parser(["wave"])
+        parser.feed(profile.prefill)
+        assert parser.feed('ok</thinking><coords name="wave"><x1>1</x1><y1>2</y1><x2>3</x2><y2>4</y2></coords>') == {"wave": (1, 2, 3, 4)}
+        assert to_point(parser.result["wave"]) == (2, 3)
+
+    def test_parse_complete_response(self):
+        text = '<targets><thinking><coords name="a"><x>0</x><y>0</y></coords></thinking><coords name="a"><x>7</x><y>8</y></coords><coords name="z"><x>1</x><y>1</y></coords></targets>'
+        assert parse_multi_coords(text) == {"a": (7, 8), "z": (1, 1)}
+        assert parse_multi_coords(text, names=["a"]) == {"a": (7, 8)}
+
+    def test_answer_targets(self):
+        names = ["blue_buff", "enemy"]
+        streamed = {"blue_buff": (310, 420), "enemy": (5, 6)}
+        assert answer_targets(streamed, "", names) == streamed
+        # An incomplete stream is parsed from the full text
+        text = '<coords name="enemy"><x>5</x><y>6</y></coords>'
+        assert answer_targets(None, text, names) == {"enemy": (5, 6)}
+        assert answer_targets({}, "", names) == {}
+
+    def test_local_result_with_multi_profile(self):
+        # An HP bar click or template match is a single point tuple, not a dict per target
+        names = ["blue_buff", "champion", "minions"]
+        targets = answer_targets((340, 166), "HP bar enemy at (300, 120) (50%)", names, local=True)
+        assert targets == {"blue_buff": (340, 166)}
+        assert to_point(targets.get(names[0])) == (340, 166)
+        assert answer_targets(None, "", names, local=True) == {}
+
+    def test_prompt_lists_targets(self):
+        text = MULTI_PROFILES["multi"].prompt({"blue_buff": "Blue Buff", "enemy": "the enemy"})
+        assert "- blue_buff: Blue Buff" in text and "- enemy: the enemy" in text
+        assert '<coords name="blue_buff"><x>230</x><y>440</y></coords>' in text
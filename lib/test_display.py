@@ -0,0 +1,41 @@
+# Third-party imports
+from PIL import Image
+
+# Local imports
+from lib.display import DisplayGeometry
+from lib.regions import region_monitor, to_screen
+
+# A Retina display: 1512x982 points captured as 3024x1964 pixels
+MONITOR = {"left": 0, "top": 0, "width": 1512, "height": 982}
+
+class TestDisplayGeometry:
+    def test_downscales_to_points(self):
+        geometry = DisplayGeometry(MONITOR)
+        img = Image.new('RGB', (3024, 1964), (10, 20, 30))
+        assert geometry.downscale(img, MONITOR).size == (1512, 982)
+        # Frames already at point resolution are returned as they are
+        small = Image.new('RGB', (1512, 982))
+        assert geometry.downscale(small, MONITOR) is small
+
+    def test_downscales_to_target_width(self):
+        geometry = DisplayGeometry(MONITOR, target_width=1024)
+        assert geometry.output_scale == 1024 / 1512
+        img = Image.new('RGB', (3024, 1964), (10, 20, 30))
+        out = geometry.downscale(img, MONITOR)
+        assert out.size == (1024, 665)
+        assert out.getpixel((512, 300)) == (10, 20, 30)
+        # A captured region keeps the same scale as the full monitor
+        captured = region_monitor("playfield", MONITOR)
+        img = Image.new('RGB', (captured["width"] * 2, captured["height"] * 2))
+        assert geometry.downscale(img, captured).size == geometry.output_size(captured) == (1024, 498)
+        # Target widths above the point resolution never upscale
+        assert DisplayGeometry(MONITOR, target_width=4000).output_scale == 1.0
+
+    def test_pixels_map_back_to_points(self):
+        geometry = DisplayGeometry(MONITOR, target_width=1024)
+        captured = region_monitor("playfield", MONITOR)
+        image_size = geometry.output_size(captured)
+        # The corners and centre of the downscaled image land on the captured region
+        assert to_screen(0, 0, captured, image_size) == (0, 49)
+        assert to_screen(image_size[0], image_size[1], captured, image_size) == (1512, 49 + 736)
+        assert to_screen(512, 249, captured, image_size) == (756, 417)
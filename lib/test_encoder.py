@@ -0,0 +1,59 @@
+# Standard library imports
+import io
+from pathlib import Path
+
+# Third-party imports
+import pytest
+from PIL import Image
+
+# Local imports
+from lib.encoder import ImageEncoder, anthropic_image_tokens, load_image, openai_image_tokens
+
+DATASET_DIR = Path(__file__).parent.parent.absolute() / "dataset"
+
+class TestImageEncoder:
+    def test_token_formulas(self):
+        assert anthropic_image_tokens(1092, 1092) == 1590
+        assert anthropic_image_tokens(200, 200) == 54
+        # 2048x4096 is scaled to 768x1536, which is 2x3 tiles
+        assert openai_image_tokens(2048, 4096) == 85 + 170 * 6
+        assert openai_image_tokens(512, 512) == 85 + 170
+
+    def test_small_images_are_not_resized(self):
+        encoded = ImageEncoder().encode(Image.new('RGB', (320, 200), (10, 20, 30)))
+        assert encoded.size == (320, 200)
+        assert encoded.scale == 1.0
+        assert encoded.tokens == anthropic_image_tokens(320, 200)
+
+    def test_fits_token_budget(self):
+        encoder = ImageEncoder("anthropic", max_tokens=400)
+        encoded = encoder.encode(DATASET_DIR / "screen.png")
+        assert encoded.original_size == (1024, 768)
+        assert encoded.tokens <= 400
+        # The aspect ratio is kept and the budget is mostly used
+        assert abs(encoded.size[0] / encoded.size[1] - 1024 / 768) < 0.01
+        assert encoded.tokens > 380
+        with Image.open(io.BytesIO(encoded.data)) as img:
+            assert img.size == encoded.size and img.format == "JPEG"
+
+    def test_provider_limits_apply_without_budget(self):
+        encoded = ImageEncoder("anthropic").encode(Image.new('RGB', (2880, 1800)))
+        assert max(encoded.size) <= 1568 and encoded.tokens <= 1600
+
+    def test_fits_byte_budget(self):
+        with Image.open(DATASET_DIR / "screen.png") as f:
+            img = f.convert('RGB')
+        best = ImageEncoder().encode(img)
+        small = ImageEncoder(max_bytes=len(best.data) // 2).encode(img)
+        assert 4 * -(-len(small.data) // 3) <= len(best.data) // 2
+        assert (small.quality, small.subsampling) != (best.quality, best.subsampling) or small.size < best.size
+
+    def test_webp(self):
+        encoded = ImageEncoder(format="webp").encode(Image.new('RGB', (64, 64)))
+        assert encoded.media_type == "image/webp"
+        with pytest.raises(ValueError):
+            ImageEncoder(format="gif")
+
+    def test_transparency_is_flattened(self):
+        img = load_image(Image.new('RGBA', (8, 8), (0, 0, 0, 0)))
+        assert img.mode == 'RGB' and img.getpixel((0, 0)) == (255, 255, 255)
@@ -0,0 +1,105 @@
+# Standard library imports
+import time
+
+# Third-party imports
+from PIL import Image, ImageDraw
+
+# Local imports
+from lib.fingerprint import FrameGate, ResultCache, frame_fingerprint, fingerprint_distance
+
+def make_frame(box=None, size=(640, 360)):
+    img = Image.new('RGB', size, (40, 80, 40))
+    if box:
+        ImageDraw.Draw(img).rectangle(box, fill=(220, 220, 255))
+    return img
+
+class TestFrameGate:
+    def test_identical_frames_have_zero_distance(self):
+        a = frame_fingerprint(make_frame())
+        b = frame_fingerprint(make_frame())
+        assert fingerprint_distance(a, b) == 0.0
+
+    def test_first_frame_is_always_sent(self):
+        gate = FrameGate()
+        assert gate.changed(gate.fingerprint(make_frame()))
+
+    def test_unchanged_frame_is_skipped_and_action_reused(self):
+        gate = FrameGate(threshold=4.0)
+        fp = gate.fingerprint(make_frame())
+        gate.accept(fp, (100, 200))
+
+        # A single changed pixel is well below the threshold
+        frame = make_frame()
+        frame.putpixel((10, 10), (255, 255, 255))
+        assert not gate.changed(gate.fingerprint(frame))
+        assert gate.last_action == (100, 200)
+        assert gate.sent == 1 and gate.skipped == 1
+
+    def test_large_change_is_sent(self):
+        gate = FrameGate(threshold=4.0)
+        gate.accept(gate.fingerprint(make_frame()), (100, 200))
+        assert gate.changed(gate.fingerprint(make_frame(box=(0, 0, 320, 360))))
+
+class TestResultCache:
+    def test_similar_frames_hit(self):
+        cache = ResultCache(radius=4)
+        h = cache.key(make_frame(box=(100, 100, 200, 200)))
+        cache.put("blue buff", h, (10, 20))
+        frame = make_frame(box=(100, 100, 200, 200))
+        frame.putpixel((5, 5), (255, 255, 255))
+        assert cache.get("blue buff", cache.key(frame)) == (10, 20)
+        assert cache.stats()["hits"] == 1
+
+    def test_different_frame_or_prompt_misses(self):
+        cache = ResultCache(radius=4)
+        cache.put("blue buff", cache.key(make_frame(box=(0, 0, 100, 360))), (10, 20))
+        assert cache.get("blue buff", cache.key(make_frame(box=(540, 0, 640, 360)))) is None
+        assert cache.get("red buff", cache.key(make_frame(box=(0, 0, 100, 360)))) is None
+        assert cache.stats()["misses"] == 2
+
+    def test_moved_target_misses(self):
+        cache = ResultCache(radius=4)
+        # A small target on a large, busy frame
+        background = [(0, 0, 640, 40), (0, 320, 640, 360), (600, 0, 640, 360)]
+        def frame(target):
+            img = make_frame(box=background[0])
+            draw = ImageDraw.Draw(img)
+            for box in background[1:] + [target]:
+                draw.rectangle(box, fill=(220, 220, 255))
+            return img
+
+        before, after = frame((300, 170, 310, 180)), frame((330, 170, 340, 180))
+        # The whole-frame hash alone cannot tell the frames apart
+        assert cache.key(before) == cache.key(after)
+        cache.put("blue buff", cache.key(before), (305, 175), img=before, point=(305 / 640, 175 / 360))
+        assert cache.get("blue buff", cache.key(before), before) == (305, 175)
+        assert cache.get("blue buff", cache.key(after), after) is None
+        # Entries with a target region are only hit when the frame is given
+        assert cache.get("blue buff", cache.key(before)) is None
+        # A target at the edge keeps its whole region inside the frame
+        cache.put("edge", cache.key(before), (0, 0), img=before, point=(0.0, 0.0))
+        assert cache.get("edge", cache.key(before), before) == (0, 0)
+
+    def test_radius(self):
+        cache = ResultCache(radius=2)
+        cache.put("t", 0b0000, "a")
+        assert cache.get("t", 0b0011) == "a"
+        assert cache.get("t", 0b0111) is None
+
+    def test_lru_eviction(self):
+        cache = ResultCache(max_entries=2, radius=0)
+        cache.put("t", 1, "a")
+        cache.put("t", 2, "b")
+        cache.get("t", 1)
+        cache.put("t", 4, "c")
+        assert cache.get("t", 2) is None
+        assert cache.get("t", 1) == "a" and cache.get("t", 4) == "c"
+        assert cache.evictions == 1
+
+    def test_ttl(self, monkeypatch):
+        cache = ResultCache(ttl=1.0)
+        cache.put("t", 1, "a")
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 2.0)
+        assert cache.get("t", 1) is None
+        assert cache.stats() == {"hits": 0, "misses": 1, "evictions": 0, "expirations": 1, "size": 0}
@@ -0,0 +1,101 @@
+# Standard library imports
+import time
+from pathlib import Path
+
+# Third-party imports
+import numpy as np
+from PIL import Image, ImageDraw
+
+# Local imports
+from lib.hpbars import HPBarDetector, candidates_prompt, connected_runs, horizontal_runs
+
+DATASET_DIR = Path(__file__).parent.parent.absolute() / "dataset"
+
+def draw_bar(draw, x, y, fill, color, width=80, height=6, ticks=False):
+    # Dark outline and empty part, then the coloured fill from the left
+    draw.rectangle([x - 2, y - 2, x + width - 1, y + height + 1], fill=(10, 10, 12))
+    draw.rectangle([x, y, x + round(width * fill) - 1, y + height - 1], fill=color)
+    if ticks:
+        for tx in range(x + 10, x + round(width * fill), 10):
+            draw.line([(tx, y), (tx, y + height - 1)], fill=(10, 10, 12))
+
+class TestHPBarDetector:
+    def test_runs_and_components(self):
+        labels = np.array([
+            [1, 1, 0, 1, 0, 2, 2],
+            [0, 1, 1, 1, 0, 0, 0],
+            [0, 0, 0, 0, 0, 1, 1],
+        ], dtype=np.uint8)
+        rows, starts, ends, kinds = horizontal_runs(labels)
+        assert rows.tolist() == [0, 0, 0, 1, 2]
+        assert list(zip(starts.tolist(), ends.tolist())) == [(0, 2), (3, 4), (5, 7), (1, 4), (5, 7)]
+        assert kinds.tolist() == [1, 1, 2, 1, 1]
+        components = connected_runs(rows, starts, ends, labels.shape[1])
+        assert components.tolist() == [0, 0, 2, 0, 4]
+        # A one pixel gap in a run of the same label is joined
+        rows, starts, ends, kinds = horizontal_runs(labels, gap=1)
+        assert list(zip(rows.tolist(), starts.tolist(), ends.tolist())) == [(0, 0, 4), (0, 5, 7), (1, 1, 4), (2, 5, 7)]
+
+    def test_synthetic_bars(self):
+        img = Image.new('RGB', (640, 360), (40, 70, 50))
+        draw = ImageDraw.Draw(img)
+        draw_bar(draw, 100, 50, 1.0, (90, 160, 230))
+        draw_bar(draw, 300, 120, 0.5, (200, 70, 50), ticks=True)
+        draw_bar(draw, 400, 300, 0.25, (205, 150, 95))
+        # Saturated shapes which are not HP bars: a blob, and a bar shape with no outline
+        draw.rectangle([50, 200, 150, 260], fill=(200, 70, 50))
+        draw.rectangle([480, 20, 620, 65], fill=(170, 180, 170))
+        draw.rectangle([500, 40, 600, 45], fill=(90, 160, 230))
+        bars = HPBarDetector().detect(img)
+        assert [(bar.kind, bar.box) for bar in bars] == [
+            ("ally", (100, 50, 180, 56)),
+            ("enemy", (300, 120, 340, 126)),
+            ("neutral", (400, 300, 420, 306)),
+        ]
+        assert [round(bar.fill, 2) for bar in bars] == [1.0, 0.5, 0.25]
+        assert bars[1].point == (340, 166)
+
+    def test_region_offsets_boxes(self):
+        img = Image.new('RGB', (640, 360), (40, 70, 50))
+        draw_bar(ImageDraw.Draw(img), 300, 120, 0.5, (200, 70, 50))
+        draw_bar(ImageDraw.Draw(img), 300, 5, 0.5, (200, 70, 50))
+        bars = HPBarDetector(region="playfield").detect(img)
+        assert [bar.box for bar in bars] == [(300, 120, 340, 126)]
+
+    def test_dataset_frame(self):
+        with Image.open(DATASET_DIR / "lol.png_processed.jpg") as img:
+            bars = HPBarDetector(region="playfield").detect(img)
+        kinds = {bar.box[:2]: bar.kind for bar in bars}
+        # Gilarette and zoxyswh are allies, Ryze Bot is an enemy
+        assert kinds[(473, 194)] == "ally" and kinds[(395, 551)] == "ally"
+        assert kinds[(656, 221)] == "enemy"
+        ryze = next(bar for bar in bars if bar.box[:2] == (656, 221))
+        assert 0.5 < ryze.fill < 0.8
+
+    def test_retina_frame(self):
+        with Image.open(DATASET_DIR / "lol.png_processed.jpg") as img:
+            img = img.convert('RGB')
+        detector = HPBarDetector(region="playfield")
+        bars = detector.detect(img)
+        # The same frame in backing pixels is searched at the calibrated resolution
+        retina = img.resize((img.width * 2, img.height * 2))
+        elapsed = []
+        for _ in range(3):
+            start = time.perf_counter()
+            retina_bars = detector.detect(retina)
+            elapsed.append(time.perf_counter() - start)
+        assert [bar.kind for bar in retina_bars] == [bar.kind for bar in bars]
+        assert [round(bar.fill, 2) for bar in retina_bars] == [round(bar.fill, 2) for bar in bars]
+        # Bars are placed in backing pixels, within the resampling of the two frames
+        for bar, retina_bar in zip(bars, retina_bars):
+            assert max(abs(2 * a - b) for a, b in zip(bar.box[:2], retina_bar.box[:2])) <= 4
+            assert max(abs(2 * a - b) for a, b in zip(bar.point, retina_bar.point)) <= 12
+        # About 20ms on a 2880x1800 frame, rather than several times that at full resolution
+        assert min(elapsed) < 0.05
+
+    def test_candidates_prompt(self):
+        img = Image.new('RGB', (640, 360), (40, 70, 50))
+        draw_bar(ImageDraw.Draw(img), 300, 120, 0.5, (200, 70, 50))
+        text = candidates_prompt(HPBarDetector().detect(img), img.size)
+        assert "640x360" in text
+        assert "1. enemy hp=50% bar=(300, 120) click=(340, 166)" in text
@@ -0,0 +1,108 @@
+# Standard library imports
+from pathlib import Path
+
+# Third-party imports
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+# Local imports
+from lib.hud import (
+    HUD_LAYOUTS, UNKNOWN, AbilityState, GlyphReader, HUDLayout, HUDReader, HUDState, split_glyphs,
+)
+
+DATASET_DIR = Path(__file__).parent.parent.absolute() / "dataset"
+GLYPHS_DIR = DATASET_DIR / "templates" / "glyphs"
+
+def render_text(text: str, size: int, offset, canvas=(240, 60), scale: float = 1.0) -> Image.Image:
+    # HUD-like light text over a dark green bar, rendered and then scaled as a frame
+    img = Image.new('RGB', canvas, (30, 60, 30))
+    ImageDraw.Draw(img).text(offset, text, fill=(235, 235, 225), font=ImageFont.load_default(size=size))
+    return img.resize((round(canvas[0] * scale), round(canvas[1] * scale)), Image.BILINEAR)
+
+class TestHUDReader:
+    def test_split_glyphs(self):
+        mask = np.zeros((8, 30), dtype=bool)
+        mask[1:7, 2:6] = True
+        # Two touching glyphs, split by width
+        mask[1:7, 10:19] = True
+        # A speck below the minimum size
+        mask[3, 25] = True
+        assert split_glyphs(mask) == [(2, 1, 6, 7), (10, 1, 14, 7), (14, 1, 19, 7)]
+
+    def test_bar_fill_ignores_text(self):
+        img = Image.new('RGB', (200, 100), (20, 20, 20))
+        pixels = np.asarray(img).copy()
+        # 60% of the bar is filled, with white text over the middle of the fill
+        pixels[50:60, 20:80] = (40, 180, 60)
+        pixels[52:58, 40:60] = (240, 240, 240)
+        layout = HUDLayout(reference_size=(200, 100), hp=(20, 50, 120, 60), mana=(20, 60, 120, 70))
+        state = HUDReader(layout).read(Image.fromarray(pixels))
+        assert state.hp == 0.6
+        assert state.mana == 0.0
+
+    def test_reads_dataset_hud(self):
+        reader = HUDReader(HUD_LAYOUTS["lol"], GlyphReader(GLYPHS_DIR))
+        state = reader.read(Image.open(DATASET_DIR / "lol-kill.png_processed.jpg"))
+        assert state.hp_values == (929, 984)
+        assert state.mana_values == (639, 767)
+        assert state.gold == 151
+        assert abs(state.hp - 929 / 984) < 0.05
+        assert {key: (a.ready, a.cooldown) for key, a in state.abilities.items()} == {
+            "Q": (True, None), "W": (False, 5), "E": (True, None),
+            "R": (False, None), "D": (True, None), "F": (True, None),
+        }
+
+        state = reader.read(Image.open(DATASET_DIR / "lol.png_processed.jpg"))
+        assert state.hp_values == (120, 663)
+        assert state.mana_values == (508, 508)
+        assert state.gold == 448
+        assert abs(state.mana - 1.0) < 0.05
+
+    def test_layout_scales_with_frame(self):
+        reader = HUDReader(HUD_LAYOUTS["lol"], GlyphReader(GLYPHS_DIR))
+        img = Image.open(DATASET_DIR / "lol-kill.png_processed.jpg")
+        state = reader.read(img.resize((img.width * 2, img.height * 2)))
+        assert state.hp_values == (929, 984)
+        assert state.gold == 151
+
+    def test_reads_unseen_offsets_and_scales(self, tmp_path):
+        glyphs = GlyphReader(tmp_path)
+        glyphs.learn(render_text("0123456789 /", 18, (2, 2)), (0, 0, 240, 60), "0123456789 /")
+        # Other digits, at other positions, scaled like another resolution or HUD scale
+        for scale in (1.25, 1.5, 2.0):
+            for offset in ((3, 3), (37, 11), (61, 23)):
+                img = render_text("8052/3691 47", 18, offset, scale=scale)
+                assert glyphs.read_numbers(img, (0, 0) + img.size) == [8052, 3691, 47], (scale, offset)
+        # Templates are reloaded from disk
+        img = render_text("8052/3691", 18, (37, 11), scale=1.25)
+        assert GlyphReader(tmp_path).read(img, (0, 0) + img.size) == "8052/3691"
+
+    def test_rejects_text_without_numbers(self, tmp_path):
+        glyphs = GlyphReader(tmp_path)
+        glyphs.learn(render_text("0123456789 /", 18, (2, 2)), (0, 0, 240, 60), "0123456789 /")
+        layout = HUDLayout(reference_size=(240, 60), hp=(0, 0, 240, 60), mana=(0, 0, 240, 30))
+        reader = HUDReader(layout, glyphs)
+        # Glyphs unlike any template are not read as digits
+        for text in ("HP MANA", "- = _ ~"):
+            img = render_text(text, 18, (20, 8))
+            assert set(glyphs.read(img, (0, 0) + img.size)) <= {UNKNOWN, " "}, text
+            assert glyphs.read_numbers(img, (0, 0) + img.size) == []
+            assert reader.bar_values(img, layout.hp) is None
+        # Nor are numbers joined or cut short around an unrecognised glyph
+        img = render_text("8052#3691", 18, (41, 17))
+        assert glyphs.read(img, (0, 0) + img.size) == "8052?3691"
+        assert glyphs.read_numbers(img, (0, 0) + img.size) == []
+        img = render_text("805%/3691", 18, (41, 17))
+        assert glyphs.read_numbers(img, (0, 0) + img.size) == [3691]
+        assert reader.bar_values(img, layout.hp) is None
+        # Nor is a bar without any text
+        img = render_text("", 18, (0, 0))
+        assert glyphs.read(img, (0, 0) + img.size) == ""
+        assert reader.read(img).hp_values is None
+
+    def test_describe(self):
+        state = HUDState(
+            hp=0.944, mana=0.83, hp_values=(929, 984), gold=151,
+            abilities={"Q": AbilityState(True), "W": AbilityState(False, 5), "R": AbilityState(False)},
+        )
+        assert state.describe() == "<hud>hp=929/984 (94%) mana=(83%) gold=151 Q=ready W=5s R=unavailable</hud>"
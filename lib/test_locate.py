@@ -0,0 +1,62 @@
+# Standard library imports
+from pathlib import Path
+
+# Third-party imports
+import numpy as np
+from PIL import Image
+
+# Local imports
+from lib.locate import Locator, TemplateLibrary, ncc
+
+DATASET_DIR = Path(__file__).parent.parent.absolute() / "dataset"
+
+class TestLocator:
+    def test_ncc_peaks_at_template_position(self):
+        rng = np.random.default_rng(0)
+        frame = rng.uniform(0, 255, (120, 160)).astype(np.float32)
+        template = frame[40:60, 70:100].copy()
+        scores = ncc(frame, template)
+        assert scores.shape == (101, 131)
+        y, x = np.unravel_index(np.argmax(scores), scores.shape)
+        assert (y, x) == (40, 70)
+        assert scores[y, x] > 0.999
+
+    def test_flat_windows_score_zero(self):
+        frame = np.full((50, 50), 100, dtype=np.float32)
+        template = np.arange(100, dtype=np.float32).reshape(10, 10)
+        assert np.all(ncc(frame, template) == 0)
+
+    def test_locates_dataset_template(self):
+        locator = Locator(TemplateLibrary(DATASET_DIR / "templates"))
+        with Image.open(DATASET_DIR / "screen.png") as f:
+            img = f.convert('RGB')
+        match = locator.locate(img, "blue_buff")
+        assert match is not None and match.score >= locator.threshold
+        assert match.box == (340, 168, 490, 208)
+        assert match.point == (415, 238)
+
+    def test_locates_at_other_resolutions(self):
+        locator = Locator(TemplateLibrary(DATASET_DIR / "templates"))
+        with Image.open(DATASET_DIR / "screen.png") as f:
+            img = f.convert('RGB').resize((1536, 1152))
+        match = locator.locate(img, "blue_buff")
+        assert match is not None
+        assert abs(match.point[0] - 622) <= 4 and abs(match.point[1] - 357) <= 4
+
+    def test_low_confidence_falls_back(self):
+        locator = Locator(TemplateLibrary(DATASET_DIR / "templates"))
+        with Image.open(DATASET_DIR / "out.png") as f:
+            img = f.convert('RGB')
+        assert locator.locate(img, "blue_buff") is None
+        assert locator.locate(img, "unknown") is None
+
+    def test_cut_round_trips(self, tmp_path):
+        img = Image.new('RGB', (200, 100), (30, 30, 30))
+        img.paste((200, 50, 50), (60, 20, 100, 40))
+        library = TemplateLibrary(tmp_path)
+        library.cut("marker", img, (50, 10, 110, 50), click=(10, 5))
+        reloaded = TemplateLibrary(tmp_path)
+        assert reloaded["marker"].click == (10, 5)
+        assert reloaded["marker"].reference_width == 200
+        match = Locator(reloaded, downsample=1, scales=(1.0,)).locate(img, "marker")
+        assert match.box == (50, 10, 110, 50) and match.point == (60, 15)
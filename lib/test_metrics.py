@@ -0,0 +1,49 @@
+# Standard library imports
+import random
+import urllib.request
+
+# Third-party imports
+import pytest
+
+# Local imports
+from lib.metrics import LatencyHistogram, Metrics
+
+class TestLatencyHistogram:
+    def test_percentiles_within_one_percent(self):
+        rng = random.Random(0)
+        values = sorted(rng.lognormvariate(-1, 1) for _ in range(10_000))
+        histogram = LatencyHistogram()
+        for v in values:
+            histogram.record(v)
+
+        for p in (50, 95, 99):
+            exact = values[round(p / 100 * len(values)) - 1]
+            assert histogram.percentile(p) == pytest.approx(exact, rel=0.01)
+        assert histogram.max == values[-1]
+
+    def test_empty_histogram(self):
+        assert LatencyHistogram().percentile(99) == 0.0
+
+class TestMetrics:
+    def test_timer_and_report(self):
+        metrics = Metrics()
+        with metrics.time("parse") as timer:
+            pass
+        metrics.observe("capture", 0.012)
+        assert timer.elapsed >= 0
+        snapshot = metrics.snapshot()
+        assert snapshot["capture"]["count"] == 1
+        assert snapshot["capture"]["p50"] == pytest.approx(0.012, rel=0.01)
+        assert "capture" in metrics.report()
+
+    def test_prometheus_endpoint(self):
+        metrics = Metrics()
+        metrics.observe("ttft", 0.5)
+        metrics.serve(0)
+        try:
+            port = metrics._server.server_address[1]
+            body = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics").read().decode()
+        finally:
+            metrics.close()
+        assert 'decision_loop_stage_seconds{stage="ttft",quantile="0.99"} 0.5' in body
+        assert 'decision_loop_stage_seconds_count{stage="ttft"} 1' in body
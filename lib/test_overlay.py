@@ -0,0 +1,69 @@
+# Standard library imports
+import asyncio
+import threading
+import time
+
+# Local imports
+from lib.overlay import BackgroundLoop, Point, Rect, ShapeBuffer
+
+class TestShapeBuffer:
+    def test_shapes_between_ticks_coalesce(self):
+        shapes = ShapeBuffer(ttl=None)
+        for i in range(100):
+            shapes.put(Point(i, i))
+        shapes.put(Rect(0, 0, 10, 10))
+        assert shapes.collect()
+        # Later points replace earlier ones with the same key
+        assert shapes.shapes() == [Point(99, 99), Rect(0, 0, 10, 10)]
+        assert not shapes.collect()
+        assert shapes.received == 101 and shapes.repaints == 1
+
+    def test_shapes_expire(self):
+        shapes = ShapeBuffer(ttl=0.5)
+        shapes.put(Point(1, 2))
+        assert shapes.collect()
+        assert not shapes.collect(now=time.monotonic() + 0.1)
+        assert shapes.collect(now=time.monotonic() + 1.0)
+        assert shapes.shapes() == []
+
+    def test_put_from_other_threads(self):
+        shapes = ShapeBuffer(ttl=None)
+        threads = [threading.Thread(target=lambda k=k: [shapes.put(Point(i, 0, key=str(k))) for i in range(50)]) for k in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        shapes.collect()
+        assert shapes.received == 200
+        assert sorted(s.key for s in shapes.shapes()) == ["0", "1", "2", "3"]
+
+class TestBackgroundLoop:
+    def test_runs_to_completion(self):
+        result = []
+
+        async def main():
+            await asyncio.sleep(0.01)
+            result.append(threading.current_thread().name)
+
+        loop = BackgroundLoop(main)
+        loop.start()
+        assert loop.done.wait(2)
+        assert result == ["asyncio"] and loop.exception is None
+
+    def test_stop_cancels(self):
+        async def main():
+            await asyncio.sleep(60)
+
+        loop = BackgroundLoop(main)
+        loop.start()
+        loop.stop(timeout=2)
+        assert loop.done.is_set() and loop.exception is None
+
+    def test_exception_is_kept(self):
+        async def main():
+            raise ValueError("boom")
+
+        loop = BackgroundLoop(main)
+        loop.start()
+        loop.stop(timeout=2)
+        assert isinstance(loop.exception, ValueError)
@@ -0,0 +1,154 @@
+# Standard library imports
+import asyncio
+import threading
+import time
+
+# Third-party imports
+import pytest
+
+# Local imports
+from lib.pipeline import Action, Frame, LatestQueue, Pipeline
+
+class TestPipeline:
+    def test_latest_queue_drops_oldest(self):
+        queue = LatestQueue(maxsize=2)
+        for i in range(5):
+            queue.put_latest(i)
+        assert queue.dropped == 3
+        assert [queue.get_nowait(), queue.get_nowait()] == [3, 4]
+
+    @pytest.mark.asyncio
+    async def test_requests_overlap_and_use_fresh_frames(self):
+        in_flight = 0
+        max_seen = 0
+        inferred_seqs = []
+        actuated = []
+
+        def capture():
+            time.sleep(0.005)
+            return Frame(image=None)
+
+        async def infer(frame):
+            nonlocal in_flight, max_seen
+            in_flight += 1
+            max_seen = max(max_seen, in_flight)
+            inferred_seqs.append(frame.seq)
+            await asyncio.sleep(0.1)
+            in_flight -= 1
+            return frame.seq
+
+        pipeline = Pipeline(capture, infer, actuated.append, max_in_flight=3)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(pipeline.run(), timeout=0.5)
+
+        assert max_seen == 3
+        assert actuated
+        # Frames captured while requests were in flight were dropped, not queued
+        assert pipeline.frames.dropped > 0
+        assert inferred_seqs == sorted(inferred_seqs)
+
+    @pytest.mark.asyncio
+    async def test_stale_actions_are_dropped(self):
+        actuated = []
+
+        def capture():
+            time.sleep(0.01)
+            return Frame(image=None)
+
+        async def infer(frame):
+            await asyncio.sleep(0.1)
+            return frame.seq
+
+        pipeline = Pipeline(capture, infer, actuated.append, max_in_flight=1, max_action_age=0.05)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(pipeline.run(), timeout=0.35)
+
+        assert not actuated
+        assert pipeline.stats["stale_dropped"] > 0
+
+    @pytest.mark.asyncio
+    async def test_reused_actions_keep_their_age(self):
+        actuated = []
+        reused = None
+
+        def capture():
+            time.sleep(0.01)
+            return Frame(image=None)
+
+        async def infer(frame):
+            nonlocal reused
+            await asyncio.sleep(0.02)
+            # The first frame's action is returned again for every later frame
+            if reused is None:
+                reused = Action("click", captured_at=frame.captured_at, seq=frame.seq)
+            return reused
+
+        pipeline = Pipeline(capture, infer, actuated.append, max_in_flight=1, max_action_age=0.1)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(pipeline.run(), timeout=0.4)
+
+        assert actuated and all(action is reused for action in actuated)
+        assert all(action.seq == 0 for action in actuated)
+        # Once the first frame is too old the reused action is dropped, not refreshed
+        assert pipeline.stats["stale_dropped"] > 0
+
+    @pytest.mark.asyncio
+    async def test_run_ends_with_the_capture_stream(self):
+        frames = iter([Frame(image=None) for _ in range(5)])
+        actuated = []
+
+        async def infer(frame):
+            await asyncio.sleep(0.02)
+            return frame.seq
+
+        # Like an exhausted ReplaySource, capture returns None after the last frame
+        pipeline = Pipeline(lambda: next(frames, None), infer, actuated.append, max_in_flight=1)
+        await asyncio.wait_for(pipeline.run(), timeout=1.0)
+
+        assert pipeline.stats["captured"] == 5
+        # The frames still queued when the stream ended were inferred and actuated
+        assert actuated[-1].value == 4
+        assert pipeline.stats["actuated"] == pipeline.stats["inferred"] == len(actuated)
+
+    @pytest.mark.asyncio
+    async def test_run_ends_when_an_action_fails_at_the_end(self):
+        frames = iter([Frame(image=None)])
+
+        async def infer(frame):
+            return frame.seq
+
+        def actuate(action):
+            raise RuntimeError("mouse unavailable")
+
+        pipeline = Pipeline(lambda: next(frames, None), infer, actuate)
+        await asyncio.wait_for(pipeline.run(), timeout=1.0)
+        assert pipeline.stats["errors"] == 1
+
+    def test_stale_actions_are_down_weighted(self):
+        pipeline = Pipeline(None, None, None, max_action_age=1.0, stale_policy="weight")
+        action = Action(None, captured_at=time.monotonic() - 1.5)
+        assert pipeline._check_age(action)
+        assert 0.4 < action.weight < 0.6
+        assert not pipeline._check_age(Action(None, captured_at=time.monotonic() - 2.5))
+        assert pipeline.stats == {**pipeline.stats, "stale_weighted": 1, "stale_dropped": 1}
+
+    def test_frame_is_loaded_once_across_threads(self):
+        class SlowRaw:
+            captured_at = 1.0
+            conversions = 0
+
+            def to_image(self):
+                SlowRaw.conversions += 1
+                time.sleep(0.02)
+                return "image"
+
+        frame = Frame(raw=SlowRaw())
+        images = []
+        threads = [threading.Thread(target=lambda: images.append(frame.load())) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert images == ["image"] * 4
+        assert SlowRaw.conversions == 1
+        assert frame.raw is None and frame.captured_at == 1.0
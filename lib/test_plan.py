@@ -0,0 +1,92 @@
+# Standard library imports
+import time
+from pathlib import Path
+
+# Third-party imports
+from PIL import Image
+
+# Local imports
+from lib.actuator import Actuator, Click, KeyPress, Move, RecordingBackend
+from lib.hud import HUD_LAYOUTS, GlyphReader, HUDReader
+from lib.pipeline import Frame
+from lib.plan import Condition, FrameConditions, PlanExecutor, parse_plan
+
+DATASET_DIR = Path(__file__).parent.parent.absolute() / "dataset"
+
+class Always:
+    """Conditions which hold until `fail` is set, counting how often they are checked."""
+    def __init__(self):
+        self.fail = None
+        self.checks = 0
+
+    def check(self, img, conditions):
+        self.checks += 1
+        return self.fail
+
+class TestPlan:
+    def test_parse_plan(self):
+        plan = parse_plan("""<plan>
+right 640 410 if visible:blue_buff
+key Q if ready:q
+wait 5
+- click 655 420 if hp>0.3, enemy
+key escape
+jump 1 2
+""")
+        assert [step.command for step in plan.steps] == [Click(640, 410, "right"), KeyPress("q"), None, Click(655, 420)]
+        assert plan.steps[0].conditions == (Condition("visible", "blue_buff"),)
+        assert plan.steps[1].conditions == (Condition("ready", "Q"),)
+        # Waits are capped
+        assert plan.steps[2].wait == 2.0
+        assert plan.steps[3].conditions == (Condition("hp", None, ">", 0.3), Condition("enemy"))
+        assert plan.rejected == ["key escape", "jump 1 2"]
+
+    def test_map_to_screen(self):
+        plan = parse_plan("<plan>move 100 50\nkey w\nclick 10 20</plan>").map(lambda x, y: (x // 2, y // 2))
+        assert [step.command for step in plan.steps] == [Move(50, 25), KeyPress("w"), Click(5, 10)]
+
+    def test_hud_conditions(self):
+        hud = HUDReader(HUD_LAYOUTS["lol"], GlyphReader(DATASET_DIR / "templates" / "glyphs"))
+        conditions = FrameConditions(hud=hud)
+        img = Image.open(DATASET_DIR / "lol-kill.png_processed.jpg")
+        steps = parse_plan("<plan>key q if ready:q, hp>0.5, gold>=100\nkey r if ready:r\nkey e if visible:blue_buff</plan>").steps
+        assert conditions.check(img, steps[0].conditions) is None
+        assert conditions.check(img, steps[1].conditions) == Condition("ready", "R")
+        # No locator, so visibility cannot be measured and fails
+        assert conditions.check(img, steps[2].conditions) == Condition("visible", "blue_buff")
+
+    def test_executor_runs_steps(self):
+        backend = RecordingBackend()
+        conditions = Always()
+        frames = lambda: Frame(Image.new('RGB', (8, 8)), captured_at=time.monotonic())
+        plan = parse_plan("<plan>right 1 2 if enemy\nwait 0.1\nkey q if ready:q</plan>")
+        with Actuator(backend) as actuator:
+            result = PlanExecutor(actuator, frames, conditions).run(plan)
+        assert result.performed == 3 and result.aborted is None
+        assert result.elapsed >= 0.1
+        assert conditions.checks == 2
+        assert [e for _, e, _ in backend.events] == ["move", "press", "release", "key_down", "key_up"]
+
+    def test_executor_aborts_on_failed_condition(self):
+        backend = RecordingBackend()
+        conditions = Always()
+        frames = lambda: Frame(Image.new('RGB', (8, 8)), captured_at=time.monotonic())
+        plan = parse_plan("<plan>key q\nkey w if ready:w\nkey e</plan>")
+        conditions.fail = Condition("ready", "W")
+        with Actuator(backend) as actuator:
+            result = PlanExecutor(actuator, frames, conditions).run(plan)
+        assert result.performed == 1
+        assert "ready:W" in result.aborted
+        assert [a for _, _, a in backend.events] == [("q",), ("q",)]
+
+    def test_executor_waits_for_fresh_frame(self):
+        stale = Frame(Image.new('RGB', (8, 8)), captured_at=0.0)
+        plan = parse_plan("<plan>key q if enemy</plan>")
+        with Actuator(RecordingBackend()) as actuator:
+            start = time.monotonic()
+            result = PlanExecutor(actuator, lambda: stale, Always(), frame_timeout=0.1).run(plan)
+            # The old frame is checked once the timeout expires
+            assert time.monotonic() - start >= 0.1
+            assert result.performed == 1
+            result = PlanExecutor(actuator, lambda: None, Always(), frame_timeout=0.0).run(plan)
+            assert result.performed == 0 and result.aborted
@@ -0,0 +1,53 @@
+# Third-party imports
+from PIL import Image, ImageDraw
+
+# Local imports
+from lib.capture import ReplaySource
+from lib.recorder import SessionReader, SessionRecorder
+
+def make_frame(i, size=(160, 90)):
+    img = Image.new('RGB', size, (30, 60, 30))
+    ImageDraw.Draw(img).rectangle([i * 5, 10, i * 5 + 20, 30], fill=(200, 40, 40))
+    return img
+
+class TestSessionRecorder:
+    def test_round_trip_across_chunks(self, tmp_path):
+        frames = [make_frame(i) for i in range(7)] + [make_frame(0, size=(80, 45))]
+        with SessionRecorder(tmp_path, chunk_frames=3, max_pending=16) as recorder:
+            for i, frame in enumerate(frames):
+                recorder.record(frame, {"seq": i, "response": f"<x>{i}</x>"})
+            recorder.event({"type": "action", "seq": 0})
+
+        reader = SessionReader(tmp_path)
+        assert len(reader) == len(frames)
+        assert reader.events[0]["type"] == "action"
+        for i in (6, 0, 7, 3):
+            img, meta = reader[i]
+            assert meta["seq"] == i
+            assert meta["response"] == f"<x>{i}</x>"
+            assert img.tobytes() == frames[i].tobytes()
+
+    def test_chunks_are_bounded_in_bytes(self, tmp_path):
+        frames = [make_frame(i) for i in range(5)]
+        # Room for two 160x90 RGB frames per chunk
+        with SessionRecorder(tmp_path, chunk_frames=32, chunk_bytes=2 * 160 * 90 * 3) as recorder:
+            for i, frame in enumerate(frames):
+                recorder.record(frame, {"seq": i})
+        reader = SessionReader(tmp_path)
+        assert [entry["slot"] for entry in reader.frames] == [0, 1, 0, 1, 0]
+        assert all(reader[i][0].tobytes() == frames[i].tobytes() for i in range(5))
+
+    def test_appends_to_existing_session(self, tmp_path):
+        for i in range(2):
+            with SessionRecorder(tmp_path) as recorder:
+                recorder.record(make_frame(i), {"seq": i})
+        reader = SessionReader(tmp_path)
+        assert [reader[i][1]["seq"] for i in range(len(reader))] == [0, 1]
+
+    def test_replay_source_reads_recordings(self, tmp_path):
+        monitor = {"left": 100, "top": 50, "width": 160, "height": 90}
+        with SessionRecorder(tmp_path) as recorder:
+            recorder.record(make_frame(1), {"monitor": monitor})
+        frame = ReplaySource(tmp_path).grab()
+        assert frame.monitor == monitor
+        assert frame.image.tobytes() == make_frame(1).tobytes()
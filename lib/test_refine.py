@@ -0,0 +1,63 @@
+# Third-party imports
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+# Local imports
+from lib.refine import CoarseToFine, crop_box, scale_box
+
+TARGET = (1234, 567)
+
+def make_frame(size=(1600, 1000)):
+    img = Image.new('RGB', size, (30, 60, 40))
+    x, y = TARGET
+    ImageDraw.Draw(img).ellipse([x - 12, y - 12, x + 12, y + 12], fill=(255, 0, 0))
+    return img
+
+async def fake_request(prompt, image, parser=None, profile=None, encoder=None, encoded=None):
+    """Answers like the model would, from the red target in whatever image is sent."""
+    sent = encoder.encode(image)
+    encoded.append(sent)
+    pixels = np.asarray(image)
+    ys, xs = np.nonzero((pixels[..., 0] > 200) & (pixels[..., 1] < 80))
+    sx, sy = sent.size[0] / image.size[0], sent.size[1] / image.size[1]
+    if profile.tags == ("x", "y"):
+        return "", (round(xs.mean() * sx), round(ys.mean() * sy))
+    # A rough box, offset as a coarse answer would be
+    return "", (round((xs.min() - 30) * sx), round((ys.min() - 10) * sy), round((xs.max() + 20) * sx), round((ys.max() + 40) * sy))
+
+class TestCoarseToFine:
+    def test_box_mapping(self):
+        assert scale_box((10, 20, 5, 40), (100, 100), (200, 50)) == (10, 10, 20, 20)
+
+    def test_crop_is_grown_and_kept_inside(self):
+        assert crop_box((100, 100, 140, 120), (1000, 800), margin=0.5, min_size=(0, 0)) == (80, 90, 160, 130)
+        assert crop_box((100, 100, 140, 120), (1000, 800), min_size=(256, 256)) == (0, 0, 256, 256)
+        assert crop_box((980, 790, 1000, 800), (1000, 800), min_size=(256, 256)) == (744, 544, 1000, 800)
+        assert crop_box((0, 0, 10, 10), (100, 80), min_size=(256, 256)) == (0, 0, 100, 80)
+
+    @pytest.mark.asyncio
+    async def test_refined_point_is_exact(self):
+        localizer = CoarseToFine(fake_request)
+        result = await localizer.locate(make_frame(), "the red dot")
+        assert result.refined
+        assert abs(result.point[0] - TARGET[0]) <= 1 and abs(result.point[1] - TARGET[1]) <= 1
+        # The coarse frame is small, the crop is sent at full resolution
+        coarse, fine = result.images
+        assert coarse.tokens <= 400 and fine.size == fine.original_size
+        assert result.tokens < 1600 * 1000 / 750
+
+    @pytest.mark.asyncio
+    async def test_confident_box_skips_refinement(self):
+        localizer = CoarseToFine(fake_request, confident_size=200)
+        result = await localizer.locate(make_frame(), "the red dot")
+        assert not result.refined and len(result.images) == 1
+        assert abs(result.point[0] - TARGET[0]) < 30 and abs(result.point[1] - TARGET[1]) < 30
+
+    @pytest.mark.asyncio
+    async def test_not_found(self):
+        async def nothing(prompt, image, encoder=None, encoded=None, **kwargs):
+            encoded.append(encoder.encode(image))
+            return "", (0, 0, 0, 0)
+
+        assert await CoarseToFine(nothing).locate(make_frame(), "the red dot") is None
@@ -0,0 +1,36 @@
+# Third-party imports
+import pytest
+
+# Local imports
+from lib.regions import REGIONS, Region, region_monitor, to_screen
+
+# A secondary 1920x1080 monitor, to the right of a 1512 point wide primary one
+MONITOR = {"left": 1512, "top": 0, "width": 1920, "height": 1080}
+
+class TestRegions:
+    def test_region_monitor(self):
+        assert region_monitor("full", MONITOR) == MONITOR
+        # Regions are offset by the monitor's position
+        assert region_monitor("playfield", MONITOR) == {"left": 1512, "top": 54, "width": 1920, "height": 810}
+        assert region_monitor("minimap", MONITOR) == {"left": 1512 + 1613, "top": 778, "width": 307, "height": 302}
+        with pytest.raises(KeyError, match="Unknown capture region 'scoreboard'"):
+            region_monitor("scoreboard", MONITOR)
+
+    def test_regions_stay_on_the_monitor(self):
+        for region in REGIONS.values():
+            captured = region.to_monitor(MONITOR)
+            assert captured["left"] + captured["width"] <= MONITOR["left"] + MONITOR["width"]
+            assert captured["top"] + captured["height"] <= MONITOR["top"] + MONITOR["height"]
+        # Tiny regions are never empty
+        assert Region(0.5, 0.5, 0.0001, 0.0001).to_monitor(MONITOR)["width"] == 1
+
+    def test_to_screen(self):
+        captured = region_monitor("playfield", MONITOR)
+        # An image matching the captured region 1:1 is only offset
+        assert to_screen(0, 0, captured) == (1512, 54)
+        assert to_screen(960, 405, captured) == (2472, 459)
+        # A downscaled image is scaled back to the captured region
+        assert to_screen(480, 202, captured, (960, 405)) == (2472, 458)
+        assert to_screen(960, 405, captured, (960, 405)) == (1512 + 1920, 54 + 810)
+        # As is a HiDPI image at backing pixel resolution
+        assert to_screen(1920, 810, captured, (3840, 1620)) == (2472, 459)
@@ -7,9 +7,13 @@ import os
 from pathlib import Path
 from difflib import SequenceMatcher
 
+# Third-party imports
+from PIL import Image
+
 # Local imports
+from lib import llm
 from lib.llm import gpt, claude, bedrock_claude
-from lib.scan import Scanner, xml_to_json
+from lib.scan import OCR_PROMPT_PREFIX, OCR_PROMPT_SUFFIX, Scanner, xml_to_json
 from lib.xero_codes import JSON_CODES, XML_CODES
 
 # Get the absolute path to the core directory
@@ -225,4 +229,47 @@ class TestAsteriskScan:
             assert parsed_result["details"]["invoiceDetails"]["totals"]["totalAmount"], "Total amount should not be empty"
             
         except Exception as e:
-            pytest.fail(f"Capital PDF extension test failed: {str(e)}")
\ No newline at end of file
+            pytest.fail(f"Capital PDF extension test failed: {str(e)}")
+
+class RecordingSession:
+    """Stands in for the shared aiohttp session, recording the request bodies sent."""
+    def __init__(self):
+        self.requests = []
+
+    def post(self, url, headers=None, json=None):
+        self.requests.append(json)
+        return self
+
+    async def __aenter__(self):
+        self.status = 200
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    async def json(self):
+        return {
+            "content": [{"type": "text", "text": "<invoice></invoice>"}],
+            "usage": {"input_tokens": 12, "output_tokens": 3, "cache_read_input_tokens": 2048},
+        }
+
+class TestPromptCache:
+    @pytest.mark.asyncio
+    async def test_static_prefix_is_cached(self, tmp_path, monkeypatch):
+        session = RecordingSession()
+        monkeypatch.setattr(llm.model_client, "session", lambda: session)
+        Image.new('RGB', (64, 64), (255, 255, 255)).save(tmp_path / "receipt.png")
+        scanner = Scanner(base_dir=tmp_path)
+
+        for client_name in ("Client A", "Client B"):
+            await scanner.scan(fi="receipt.png", clientName=client_name)
+        assert scanner.last_usage["cache_read_input_tokens"] == 2048
+
+        for body, client_name in zip(session.requests, ("Client A", "Client B")):
+            prefix, suffix, image = body["messages"][0]["content"]
+            # The prefix is its own block, identical across clients, with the cache breakpoint
+            assert prefix == {"type": "text", "text": OCR_PROMPT_PREFIX, "cache_control": {"type": "ephemeral"}}
+            # Only the suffix, after the breakpoint, changes per client
+            assert suffix == {"type": "text", "text": OCR_PROMPT_SUFFIX(client_name)}
+            assert client_name in suffix["text"] and client_name not in prefix["text"]
+            assert image["type"] == "image"
@@ -0,0 +1,155 @@
+# Standard library imports
+import asyncio
+import json
+
+# Third-party imports
+import pytest
+from aiohttp import web
+
+# Local imports
+from lib.client import model_client
+from lib.coords import PROFILES
+from lib.stream import AnthropicAPIError, bounded_tail, stream_message
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+def text_delta(text):
+    return sse("content_block_delta", {"type": "content_block_delta", "delta": {"type": "text_delta", "text": text}})
+
+async def serve(handler):
+    app = web.Application()
+    app.router.add_post("/v1/messages", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/v1/messages"
+
+def streaming(events):
+    async def handler(request):
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for event in events:
+            await response.write(event)
+        return response
+    return handler
+
+class TestStreamMessage:
+    @pytest.mark.asyncio
+    async def test_coords_are_returned_as_they_arrive(self):
+        profile = PROFILES["instant"]
+        parser = profile.parser()
+        parser.feed(profile.prefill)
+        runner, url = await serve(streaming([
+            text_delta("310</x><"), text_delta("y>420</y></coords>"), text_delta(" trailing"),
+            sse("message_stop", {"type": "message_stop"}),
+        ]))
+        try:
+            text, coords = await stream_message({"max_tokens": 24}, parser=parser, prefill=profile.prefill, url=url)
+            assert coords == (310, 420)
+            assert text == "<coords><x>310</x><y>420</y></coords>"
+        finally:
+            await model_client.close()
+            await runner.cleanup()
+
+    @pytest.mark.asyncio
+    async def test_connection_is_reused_after_early_coords(self):
+        peers = []
+
+        async def handler(request):
+            peers.append(request.transport.get_extra_info("peername"))
+            response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+            await response.prepare(request)
+            await response.write(text_delta("310</x><y>420</y></coords>"))
+            # The tail after the answer, which the caller does not wait for
+            await asyncio.sleep(0.05)
+            await response.write(text_delta(" trailing text"))
+            await response.write(sse("message_stop", {"type": "message_stop"}))
+            return response
+
+        runner, url = await serve(handler)
+        profile = PROFILES["instant"]
+        try:
+            for _ in range(2):
+                parser = profile.parser()
+                parser.feed(profile.prefill)
+                loop = asyncio.get_running_loop()
+                start = loop.time()
+                _, coords = await stream_message({"max_tokens": 24}, parser=parser, prefill=profile.prefill, url=url)
+                assert coords == (310, 420)
+                assert loop.time() - start < 0.05
+                await model_client.drained()
+            # Both streamed calls were served by the same keep-alive connection
+            assert len(peers) == 2 and peers[0] == peers[1]
+        finally:
+            await model_client.close()
+            await runner.cleanup()
+
+    @pytest.mark.asyncio
+    async def test_unbounded_stream_is_closed_after_early_coords(self):
+        peers = []
+
+        async def handler(request):
+            peers.append(request.transport.get_extra_info("peername"))
+            response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+            await response.prepare(request)
+            await response.write(text_delta("310</x><y>420</y></coords>"))
+            # Generation would go on up to max_tokens
+            for _ in range(20):
+                await asyncio.sleep(0.05)
+                await response.write(text_delta(" more"))
+            return response
+
+        runner, url = await serve(handler)
+        profile = PROFILES["instant"]
+        body = {"max_tokens": 4096}
+        assert not bounded_tail(body)
+        assert bounded_tail({"max_tokens": 4096, "stop_sequences": ["</coords>"]}) and bounded_tail({"max_tokens": 24})
+        try:
+            for _ in range(2):
+                parser = profile.parser()
+                parser.feed(profile.prefill)
+                _, coords = await stream_message(body, parser=parser, prefill=profile.prefill, url=url)
+                assert coords == (310, 420)
+                # Nothing is left reading the tail
+                assert not model_client._draining
+            # The first connection was closed, so the second call opened a new one
+            assert len(peers) == 2 and peers[0] != peers[1]
+        finally:
+            await model_client.close()
+            await runner.cleanup()
+
+    @pytest.mark.asyncio
+    async def test_error_event(self):
+        runner, url = await serve(streaming([
+            text_delta("<x>3"),
+            sse("error", {"type": "error", "error": {"type": "overloaded_error", "message": "Overloaded"}}),
+        ]))
+        try:
+            with pytest.raises(AnthropicAPIError) as error:
+                await stream_message({"max_tokens": 24}, url=url)
+            assert error.value.status_code == 500
+            assert "Overloaded" in error.value.detail
+        finally:
+            await model_client.close()
+            await runner.cleanup()
+
+    @pytest.mark.asyncio
+    async def test_error_response_and_empty_stream(self):
+        async def rejected(request):
+            return web.json_response({"error": {"message": "invalid x-api-key"}}, status=401)
+
+        runner, url = await serve(rejected)
+        empty, empty_url = await serve(streaming([sse("message_stop", {"type": "message_stop"})]))
+        try:
+            with pytest.raises(AnthropicAPIError) as error:
+                await stream_message({"max_tokens": 24}, url=url)
+            assert error.value.status_code == 401 and "invalid x-api-key" in str(error.value)
+            with pytest.raises(AnthropicAPIError, match="Unexpected response format"):
+                await stream_message({"max_tokens": 24}, url=empty_url)
+        finally:
+            await model_client.close()
+            await runner.cleanup()
+            await empty.cleanup()
@@ -0,0 +1,51 @@
+# Third-party imports
+from PIL import Image, ImageDraw
+
+# Local imports
+from lib.track import Tracker
+
+def make_frame(point, size=(640, 360)):
+    img = Image.new('RGB', size, (28, 52, 36))
+    draw = ImageDraw.Draw(img)
+    x, y = point
+    draw.ellipse([x - 20, y - 20, x + 20, y + 20], fill=(70, 120, 220))
+    draw.rectangle([x - 20, y - 30, x + 20, y - 25], fill=(200, 60, 50))
+    return img
+
+class TestTracker:
+    def test_follows_moving_target(self):
+        tracker = Tracker(search=16)
+        tracker.seed(make_frame((100, 200)), (100, 200), t=0.0)
+        for i in range(1, 20):
+            truth = (100 + 6 * i, 200 - 2 * i)
+            state = tracker.update(make_frame(truth), t=i / 30)
+            assert not state.lost and state.score > 0.9
+            assert abs(state.point[0] - truth[0]) <= 1 and abs(state.point[1] - truth[1]) <= 1
+        # 180 px/s right and 60 px/s up, extrapolated a tenth of a second ahead
+        assert abs(state.velocity[0] - 180) < 10 and abs(state.velocity[1] + 60) < 10
+        x, y = tracker.predict(t=19 / 30 + 0.1)
+        assert abs(x - 232) <= 2 and abs(y - 156) <= 2
+        assert tracker.stats() == {"seeds": 1, "updates": 19, "hits": 19, "losses": 0}
+
+    def test_reacquires_after_slow_model_call(self):
+        tracker = Tracker(search=16, max_speed=400)
+        tracker.seed(make_frame((100, 200)), (100, 200), t=0.0)
+        # Two seconds later the target has moved far beyond the base search window
+        state = tracker.update(make_frame((400, 150)), t=2.0)
+        assert state.point == (400, 150)
+
+    def test_lost_target(self):
+        tracker = Tracker(max_misses=2)
+        tracker.seed(make_frame((100, 200)), (100, 200), t=0.0)
+        empty = Image.new('RGB', (640, 360), (28, 52, 36))
+        states = [tracker.update(empty, t=i / 30) for i in range(1, 4)]
+        assert [s.lost for s in states] == [False, False, True]
+        assert states[0].point == (100, 200)
+        assert not tracker.active and tracker.losses == 1
+        assert tracker.update(empty) is None and tracker.predict() is None
+
+    def test_seed_near_edge(self):
+        tracker = Tracker()
+        tracker.seed(make_frame((10, 340)), (10, 340), t=0.0)
+        state = tracker.update(make_frame((14, 338)), t=0.05)
+        assert state.point == (14, 338)
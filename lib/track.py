@@ -0,0 +1,221 @@
+# Standard library imports
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+# Third-party imports
+import numpy as np
+from PIL import Image
+
+# Local imports
+from .locate import ncc
+
+@dataclass
+class TrackState:
+    """
+    The tracker's estimate of the target in one frame.
+
+    Attributes:
+        point (Tuple[int, int]): The target position in frame pixels. While the target is
+            not found this is the predicted position.
+        velocity (Tuple[float, float]): Smoothed velocity in pixels per second.
+        score (float): Normalized cross-correlation of the best match, from -1 to 1.
+        misses (int): Consecutive frames in which the target was not found.
+        lost (bool): Whether the tracker gave up on the target in this frame.
+    """
+    point: Tuple[int, int]
+    velocity: Tuple[float, float]
+    score: float
+    misses: int
+    lost: bool
+
+class Tracker:
+    def __init__(
+        self,
+        patch_size: Tuple[int, int] = (64, 64),
+        search: int = 32,
+        max_speed: float = 400.0,
+        threshold: float = 0.6,
+        max_misses: int = 3,
+        smoothing: float = 0.5,
+        adapt: float = 0.1,
+    ):
+        """
+        Follows a target between model updates by patch correlation on every captured frame.
+
+        Each model result seeds the tracker with a patch of the frame around the target.
+        On every later frame the position is predicted with a constant-velocity model,
+        and the patch is matched in a small window around the prediction with `ncc()`,
+        so a frame costs a few milliseconds. The window grows with the time since the
+        last match, covering targets which moved during a slow model call.
+
+        When the best match scores below `threshold` the tracker coasts on the predicted
+        position, and after `max_misses` such frames in a row it reports the target as
+        lost and becomes inactive, so the caller can ask the model again right away.
+
+        Note:
+            `seed()` and `update()` may be called from different threads.
+
+        Attributes:
+            patch_size (Tuple[int, int]): The (width, height) of the patch cut around the
+                target, which should include some of its outline.
+            search (int): Pixels searched around the prediction, on each side.
+            max_speed (float): Fastest expected target speed in pixels per second, used
+                to grow the search window with the time since the last match.
+            threshold (float): Minimum correlation to accept a match.
+            max_misses (int): Consecutive misses before the target is lost.
+            smoothing (float): Weight of the newest velocity measurement, from 0 to 1.
+            adapt (float): Weight of the newest match when updating the patch, so it follows
+                gradual changes in appearance. 0 keeps the seeded patch.
+            active (bool): Whether a target is being tracked.
+            seeds (int): The number of times the tracker was seeded.
+            updates (int): The number of frames tracked.
+            hits (int): The number of frames in which the target was found.
+            losses (int): The number of times the target was lost.
+
+        Methods:
+            seed(img: Image.Image, point: Tuple[float, float], t: Optional[float] = None):
+                Starts tracking the target at a point of a frame.
+            update(img: Image.Image, t: Optional[float] = None) -> Optional[TrackState]:
+                Finds the target in a new frame, returning None if nothing is tracked.
+            predict(t: Optional[float] = None) -> Optional[Tuple[int, int]]:
+                The extrapolated target position at a time.
+            age(t: Optional[float] = None) -> float:
+                Seconds since the tracker was seeded.
+            stats() -> Dict[str, int]:
+                Seed, update, hit and loss counts.
+        """
+        self.patch_size = patch_size
+        self.search = search
+        self.max_speed = max_speed
+        self.threshold = threshold
+        self.max_misses = max_misses
+        self.smoothing = smoothing
+        self.adapt = adapt
+        self.active = False
+        self.seeds = 0
+        self.updates = 0
+        self.hits = 0
+        self.losses = 0
+        self._template: Optional[np.ndarray] = None
+        # Position of the target within the template
+        self._offset = np.zeros(2)
+        self._position = np.zeros(2)
+        self._velocity = np.zeros(2)
+        self._seeded_at = 0.0
+        self._matched_at = 0.0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def seed(self, img: Image.Image, point: Tuple[float, float], t: Optional[float] = None):
+        """
+        Start tracking the target at a point of a frame, e.g. from `parse_coords()`.
+
+        Args:
+            img (Image.Image): The frame the point was found in.
+            point (Tuple[float, float]): The target position in frame pixels.
+            t (float, optional): `time.monotonic()` timestamp of the frame. Defaults to now.
+        """
+        t = time.monotonic() if t is None else t
+        w, h = self.patch_size
+        x1 = int(min(max(round(point[0] - w / 2), 0), max(img.size[0] - w, 0)))
+        y1 = int(min(max(round(point[1] - h / 2), 0), max(img.size[1] - h, 0)))
+        template = np.asarray(img.crop((x1, y1, x1 + w, y1 + h)).convert('L'), dtype=np.float32)
+        with self._lock:
+            self._template = template
+            self._offset = np.array([point[0] - x1, point[1] - y1], dtype=np.float64)
+            self._position = np.array(point, dtype=np.float64)
+            self._velocity = np.zeros(2)
+            self._seeded_at = self._matched_at = t
+            self._misses = 0
+            self.active = True
+            self.seeds += 1
+
+    def update(self, img: Image.Image, t: Optional[float] = None) -> Optional[TrackState]:
+        """
+        Find the target in a new frame.
+
+        Args:
+            img (Image.Image): The new frame, of the same size as the seeded frame.
+            t (float, optional): `time.monotonic()` timestamp of the frame. Defaults to now.
+
+        Returns:
+            Optional[TrackState]: The estimate in this frame, or None if no target is tracked.
+        """
+        t = time.monotonic() if t is None else t
+        with self._lock:
+            if not self.active:
+                return None
+            self.updates += 1
+            template = self._template
+            th, tw = template.shape
+            dt = max(t - self._matched_at, 0.0)
+            predicted = self._position + self._velocity * dt
+            # Window of template positions around the prediction, clamped to the frame
+            radius = self.search + self.max_speed * dt
+            left, top = predicted - self._offset
+            x1 = int(max(round(left - radius), 0))
+            y1 = int(max(round(top - radius), 0))
+            x2 = int(min(round(left + radius) + tw, img.size[0]))
+            y2 = int(min(round(top + radius) + th, img.size[1]))
+            score = -1.0
+            if x2 - x1 >= tw and y2 - y1 >= th:
+                window = np.asarray(img.crop((x1, y1, x2, y2)).convert('L'), dtype=np.float32)
+                scores = ncc(window, template)
+                dy, dx = np.unravel_index(int(np.argmax(scores)), scores.shape)
+                score = float(scores[dy, dx])
+            if score >= self.threshold:
+                position = np.array([x1 + dx, y1 + dy], dtype=np.float64) + self._offset
+                if dt > 0:
+                    measured = (position - self._position) / dt
+                    self._velocity = self.smoothing * measured + (1 - self.smoothing) * self._velocity
+                self._position = position
+                self._matched_at = t
+                self._misses = 0
+                self.hits += 1
+                if self.adapt:
+                    matched = window[dy:dy + th, dx:dx + tw]
+                    self._template = (1 - self.adapt) * template + self.adapt * matched
+                point = position
+            else:
+                self._misses += 1
+                point = predicted
+                if self._misses > self.max_misses:
+                    self.active = False
+                    self.losses += 1
+            return TrackState(
+                point=(round(point[0]), round(point[1])),
+                velocity=(float(self._velocity[0]), float(self._velocity[1])),
+                score=score,
+                misses=self._misses,
+                lost=not self.active,
+            )
+
+    def predict(self, t: Optional[float] = None) -> Optional[Tuple[int, int]]:
+        """
+        Extrapolate the target position, e.g. to the time input will be injected.
+
+        Args:
+            t (float, optional): `time.monotonic()` timestamp to predict for. Defaults to now.
+
+        Returns:
+            Optional[Tuple[int, int]]: The position in frame pixels, or None if no target is tracked.
+        """
+        t = time.monotonic() if t is None else t
+        with self._lock:
+            if not self.active:
+                return None
+            point = self._position + self._velocity * max(t - self._matched_at, 0.0)
+            return round(point[0]), round(point[1])
+
+    def age(self, t: Optional[float] = None) -> float:
+        return (time.monotonic() if t is None else t) - self._seeded_at
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "seeds": self.seeds,
+            "updates": self.updates,
+            "hits": self.hits,
+            "losses": self.losses,
+        }
@@ -1,6 +1,5 @@
 from pathlib import Path
 import time
-from mss import mss
 
 import matplotlib.pyplot as plt
 from PIL import Image
@@ -9,49 +8,38 @@ from ctypes import c_void_p
 # Standard library imports
 from matplotlib import patches
 import base64
+import functools
+import io
 import json
 import os
 import tempfile
 import xml.etree.ElementTree as ET
 from pathlib import Path
 import re
+import signal
 from PyQt6.QtWidgets import QApplication, QMainWindow, QWidget
-from PyQt6.QtCore import Qt, QPoint
+from PyQt6.QtCore import Qt, QPoint, QRect
 from PyQt6.QtGui import QPainter, QPen, QColor
 from PyQt6.QtGui import QGuiApplication
 from PyQt6.QtCore import QTimer
-import objc
-from Cocoa import (
-    NSWindow,
-    NSApplication,
-    NSFloatingWindowLevel,
-    NSMainMenuWindowLevel,
-    NSStatusWindowLevel,
-    NSModalPanelWindowLevel,
-    NSPopUpMenuWindowLevel,
-    NSScreenSaverWindowLevel
-)
-from Quartz import (
-    CGEventCreateMouseEvent,
-    CGEventPost,
-    CGEventGetLocation,  # Add this
-    CGEventCreate,       # Add this
-    kCGEventMouseMoved,
-    kCGEventLeftMouseDown,
-    kCGEventLeftMouseUp,
-    kCGEventRightMouseDown,
-    kCGEventRightMouseUp,
-    kCGHIDEventTap,
-    CGPoint,
-    kCGMouseButtonLeft,
-    kCGMouseButtonRight
-)
 import sys
+if sys.platform == "darwin":
+    import objc
+    from Cocoa import (
+        NSWindow,
+        NSApplication,
+        NSFloatingWindowLevel,
+        NSMainMenuWindowLevel,
+        NSStatusWindowLevel,
+        NSModalPanelWindowLevel,
+        NSPopUpMenuWindowLevel,
+        NSScreenSaverWindowLevel
+    )
 
 # Third-party imports
 import aiofiles
 import pillow_heif
-from PIL import Image, ImageEnhance, ImageGrab
+from PIL import Image, ImageEnhance
 
 # Register HEIF opener
 pillow_heif.register_heif_opener()
@@ -60,17 +48,18 @@ pillow_heif.register_heif_opener()
 from dotenv import load_dotenv
 load_dotenv()
 
-# LLMs
+# LLMs, sharing one keep-alive connection pool
+from lib.client import model_client
 from openai import OpenAI
 from anthropic import Anthropic
-gpt_client = OpenAI()
-claude_client = Anthropic(api_key=os.environ["ANTHROPIC_API_KEY"])
+gpt_client = OpenAI(http_client=model_client.sync_http_client())
+claude_client = Anthropic(api_key=os.environ["ANTHROPIC_API_KEY"], http_client=model_client.sync_http_client())
 
 # PDF to Image
 import pdf2image
 
 # Typing
-from typing import List
+from typing import Dict, List, Optional, Tuple, Union
 
 # Async
 import aiohttp
@@ -84,13 +73,37 @@ pillow_heif.register_heif_opener()
 # bedrock_client = AnthropicBedrock(
 #     aws_access_key=os.getenv("AWS_ACCESS_KEY_ID"),
 #     aws_secret_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-#     aws_region=os.getenv("AWS_REGION")
+#     aws_region=os.getenv("AWS_REGION"),
+#     http_client=model_client.sync_http_client()
 # )
 
 from pdf2image import convert_from_path
 
 import xml.etree.ElementTree as ET
 
+# Local imports
+from lib.actuator import Actuator, Click, Move, make_backend
+from lib.capture import make_source
+from lib.coords import MULTI_PROFILES, PROFILES, CoordsStreamParser, RequestProfile, answer_targets, to_point
+from lib.encoder import EncodedImage, ImageEncoder
+from lib.fingerprint import FrameGate, ResultCache
+from lib.hpbars import HPBarDetector, candidates_prompt
+from lib.hud import HUD_LAYOUTS, GlyphReader, HUDReader
+from lib.locate import Locator, TemplateLibrary
+from lib.metrics import metrics
+from lib.overlay import BackgroundLoop, Point, Rect, Shape, ShapeBuffer
+from lib.pipeline import Action, Frame, Pipeline
+from lib.plan import PLAN_PROFILE, FrameConditions, Plan, PlanExecutor, parse_plan
+from lib.recorder import SessionRecorder
+from lib.refine import CoarseToFine
+from lib.regions import to_screen
+from lib.stream import stream_message
+from lib.track import Tracker
+
+# Images are sized for the Anthropic API's own limits unless a request sets a budget
+IMAGE_ENCODER = ImageEncoder("anthropic")
+OPENAI_IMAGE_ENCODER = ImageEncoder("openai")
+
 async def pdf_to_images(pdf_path: str) -> List[str]:
     """
     Converts a PDF file to a list of image paths.
@@ -130,172 +143,198 @@ async def pdf_to_images(pdf_path: str) -> List[str]:
     
     return image_paths
 
-async def claude(txt: str, path: str = "", temperature: float = 0.7):
+async def claude(txt: str, path: Union[str, Path, Image.Image, bytes] = "", temperature: float = 0.7, save_path: Optional[str] = None, encoder: Optional[ImageEncoder] = None):
     """
     Sends a request to the Claude AI model with text and optional image input.
 
     This function prepares the content for a request to the Anthropic API, including
-    text and optional image data. It handles both PDF and image file inputs,
-    converting PDFs to images when necessary.
+    text and optional image data. It handles PDF and image file inputs, converting
+    PDFs to images when necessary, as well as in-memory PIL images and encoded
+    image buffers which never touch the disk.
 
     Args:
         txt (str): The text prompt to send to Claude.
-        path (str, optional): Path to an image or PDF file to include in the request. Defaults to "".
+        path (str | Path | Image.Image | bytes, optional): Path to an image or PDF file,
+            an in-memory PIL image or an encoded image buffer to include in the request.
+            Defaults to "".
         temperature (float, optional): The sampling temperature for the AI model. Defaults to 0.7.
+        save_path (str, optional): If given, the encoded image is also written here. Defaults to None.
+        encoder (ImageEncoder, optional): Image-token and byte budget for the images.
+            Defaults to None, meaning `IMAGE_ENCODER`.
 
     Returns:
         str: The response from the Claude AI model.
 
     Raises:
-        HTTPException: If there's an error with the Anthropic API request or response.
+        AnthropicAPIError: If there's an error with the Anthropic API request or response.
 
     Note:
         This function requires the ANTHROPIC_API_KEY environment variable to be set.
     """
-    path = str(path)
+    text, _ = await claude_stream(txt, path, temperature=temperature, save_path=save_path, encoder=encoder)
+    return text
+
+async def claude_stream(
+    txt: str,
+    path: Union[str, Path, Image.Image, bytes] = "",
+    temperature: float = 0.7,
+    save_path: Optional[str] = None,
+    parser: Optional[CoordsStreamParser] = None,
+    profile: Optional[RequestProfile] = None,
+    encoder: Optional[ImageEncoder] = None,
+    encoded: Optional[List[EncodedImage]] = None,
+) -> Tuple[str, Optional[Union[Tuple[int, ...], Dict[str, Tuple[int, ...]]]]]:
+    """
+    Streams a response from the Claude AI model, extracting coordinates as they arrive.
+
+    Tokens are fed into `parser` as they are streamed. As soon as it has seen a complete
+    set of coordinates, the rest of the stream is cancelled and the coordinates are
+    returned, so the action can fire after roughly the time to coordinates instead of
+    the time to generate the full response.
+
+    Args:
+        txt (str): The text prompt to send to Claude.
+        path (str | Path | Image.Image | bytes, optional): See `claude()`. Defaults to "".
+        temperature (float, optional): The sampling temperature for the AI model. Defaults to 0.7.
+        save_path (str, optional): If given, the encoded image is also written here. Defaults to None.
+        parser (CoordsStreamParser, optional): Incremental coordinate parser. Defaults to
+            None, in which case the full response is always read.
+        profile (RequestProfile, optional): Output token cap, assistant prefill and stop
+            sequences for the request. Defaults to None, meaning 4096 tokens, no prefill
+            and no stop sequences.
+        encoder (ImageEncoder, optional): Image-token and byte budget for the images.
+            Defaults to None, meaning `IMAGE_ENCODER`.
+        encoded (List[EncodedImage], optional): If given, every encoded image is appended,
+            with its size, quality and estimated tokens. Coordinates in the response are
+            in the pixel space of the encoded size.
+
+    Returns:
+        Tuple[str, Optional[Union[Tuple[int, ...], Dict[str, Tuple[int, ...]]]]]: The response
+        text received, starting with the profile's prefill (truncated if the stream was
+        cancelled early), and the coordinates found by the parser, if any. A
+        `MultiCoordsStreamParser` returns them keyed by target name.
+
+    Raises:
+        AnthropicAPIError: If there's an error with the Anthropic API request or response.
+    """
     content = [
         {
             "type": "text",
             "text": txt
         }
     ]
-    if path:
+    if isinstance(path, (Image.Image, bytes, bytearray, memoryview)):
+        # In-memory frames are processed and encoded without a disk round-trip
+        images = [path]
+    elif path:
+        path = str(path)
         if path.endswith(".pdf"):
             # Convert PDF to images
-            image_paths = await pdf_to_images(path)
+            images = await pdf_to_images(path)
         else:
             # For single image files
-            image_paths = [path]
-        for img_path in image_paths:
-            # Process the image
-            processed_img_path = await process_image(img_path, int(1024//1), int(768//1))
-            base64_image = await encode_image(processed_img_path)
+            images = [path]
+    else:
+        images = []
+    with metrics.time("encode"):
+        for image in images:
+            # Encode the image within the request's token and byte budget
+            image = await process_image(image, encoder, output_path=save_path)
+            if encoded is not None:
+                encoded.append(image)
             content.append({
                 "type": "image",
                 "source": {
                     "type": "base64",
-                    "media_type": "image/jpeg",
-                    "data": base64_image
+                    "media_type": image.media_type,
+                    "data": image.base64()
                 }
             })
 
-    async with aiohttp.ClientSession() as session:
-        try:
-            start_time = time.time()
-            async with session.post(
-                "https://api.anthropic.com/v1/messages",
-                headers={
-                    "Content-Type": "application/json",
-                    "X-API-Key": os.environ.get("ANTHROPIC_API_KEY"),
-                    "anthropic-version": "2023-06-01"  # Add the required header
-                },
-                json={
-                    "max_tokens": 4096,
-                    "messages": [{"role": "user", "content": content}],
-                    "model": "claude-3-5-sonnet-20241022",
-                    # "model": "claude-3-haiku-20240307",
-                    "temperature": temperature,
-                },
-            ) as response:
-                result = await response.json()
-                end_time = time.time()
-                total_time = end_time - start_time
-                
-                if response.status != 200:
-                    error_message = result.get('error', {}).get('message', 'Unknown error occurred')
-                    raise HTTPException(status_code=response.status, detail=f"Anthropic API error: {error_message}")
-                
-                if 'content' not in result or not result['content']:
-                    raise HTTPException(status_code=500, detail="Unexpected response format from Anthropic API")
-                
-                time_to_first_token = result.get('usage', {}).get('time_to_first_token', 0)
-                
-                print(f"Total request time: {total_time:.2f} seconds")
-                print(f"Time to first token: {time_to_first_token:.2f} seconds")
-                
-                return result["content"][0]["text"]
-        except aiohttp.ClientError as e:
-            raise HTTPException(status_code=500, detail=f"Error communicating with Anthropic API: {str(e)}")
-
-async def process_image(image_path: str, target_width: int, target_height: int) -> str:
+    messages = [{"role": "user", "content": content}]
+    request = {"max_tokens": 4096}
+    prefill = ""
+    if profile is not None:
+        prefill = profile.prefill
+        request["max_tokens"] = profile.max_tokens
+        if profile.stop_sequences:
+            request["stop_sequences"] = list(profile.stop_sequences)
+        if prefill:
+            # The model continues the assistant turn from the prefill
+            messages.append({"role": "assistant", "content": prefill})
+    if parser is not None and prefill:
+        parser.feed(prefill)
+
+    body = {
+        **request,
+        "messages": messages,
+        "model": "claude-3-5-sonnet-20241022",
+        # "model": "claude-3-haiku-20240307",
+        "temperature": temperature,
+    }
+    # Streamed so the true time to first token can be measured
+    return await stream_message(body, parser=parser, prefill=prefill)
+
+async def process_image(image: Union[str, Path, Image.Image, bytes], encoder: Optional[ImageEncoder] = None, output_path: Optional[str] = None) -> EncodedImage:
     """
-    Process an image file by resizing it to the specified target dimensions.
+    Encode an image for a model request within the encoder's token and byte budget.
 
-    This asynchronous function takes an image file path as input and processes the image
-    by resizing it to the given target width and height.
+    This asynchronous function takes an image file path, an in-memory PIL image or an
+    encoded image buffer and encodes it entirely in memory, see `ImageEncoder`.
 
     Args:
-        image_path (str): The file path of the input image.
-        target_width (int): The desired width of the output image.
-        target_height (int): The desired height of the output image.
+        image (str | Path | Image.Image | bytes): The input image or its file path.
+        encoder (ImageEncoder, optional): The encoder to use. Defaults to `IMAGE_ENCODER`.
+        output_path (str, optional): If given, the encoded image is also written to this path.
+            Defaults to None, in which case nothing is written to disk.
 
     Returns:
-        str: The file path of the processed image.
-
-    The function performs the following steps:
-    1. Opens the image file.
-    2. Resizes the image to the target dimensions.
-    3. Saves the processed image as a JPEG file.
+        EncodedImage: The encoded image, with its size, quality and estimated tokens.
 
     Note:
     - The function uses asyncio to run CPU-bound operations in a separate thread.
-    - The processed image is saved with a "_processed.jpg" suffix added to the original filename.
     """
     loop = asyncio.get_event_loop()
-    with await loop.run_in_executor(None, Image.open, image_path) as img:
-        # Convert RGBA to RGB if necessary
-        if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
-            # Create a white background
-            background = Image.new('RGB', img.size, (255, 255, 255))
-            # Paste the image on the background using alpha channel as mask
-            if img.mode == 'RGBA':
-                background.paste(img, mask=img.split()[3])
-            else:
-                background.paste(img)
-            img = background
-        
-        # Resize the image to the target dimensions
-        # img = await loop.run_in_executor(None, img.resize, (target_width, target_height), Image.LANCZOS)
-        
-        output_path = f"{image_path}_processed.jpg"
-        await loop.run_in_executor(None, img.save, output_path, "JPEG")
-    
-    return output_path
+    encoded = await loop.run_in_executor(None, (encoder or IMAGE_ENCODER).encode, image)
+    if output_path:
+        async with aiofiles.open(output_path, "wb") as f:
+            await f.write(encoded.data)
+    return encoded
 
-async def encode_image(image_path: str) -> str:
+async def encode_image(image: Union[str, Path, Image.Image, bytes]) -> str:
     """
-    Encode an image file to base64 string.
+    Encode an image to a base64 string.
 
-    This asynchronous function takes an image file path as input and encodes
-    the image data to a base64 string.
+    This asynchronous function takes encoded image bytes, an in-memory PIL image or an
+    image file path and encodes the image data to a base64 string.
 
     Args:
-        image_path (str): The file path of the input image.
+        image (str | Path | Image.Image | bytes): Encoded image bytes, a PIL image
+            (which is encoded with `IMAGE_ENCODER` first) or the file path of the input image.
 
     Returns:
         str: The base64 encoded string representation of the image.
 
-    The function performs the following steps:
-    1. Opens the image file asynchronously.
-    2. Reads the binary data of the image.
-    3. Encodes the binary data to a base64 string.
-    4. Decodes the base64 bytes to a UTF-8 string.
-
     Note:
-    - This function uses aiofiles for asynchronous file I/O operations.
+    - Only file paths are read from disk, using aiofiles for asynchronous file I/O.
     - The returned string is ready to be used in data URIs or for transmission.
     """
-    async with aiofiles.open(image_path, "rb") as image_file:
-        image_data = await image_file.read()
-    
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        image_data = bytes(image)
+    elif isinstance(image, Image.Image):
+        image_data = (await process_image(image)).data
+    else:
+        async with aiofiles.open(image, "rb") as image_file:
+            image_data = await image_file.read()
+
     return base64.b64encode(image_data).decode('utf-8')
 
-def gpt(txt, path="", temperature=0.7):
+async def gpt(txt, path="", temperature=0.7):
     """
     Send a text prompt to the GPT model and optionally include image data.
 
-    This function sends a text prompt to the GPT model and can include image data
-    if a file path is provided. It supports both PDF and image files.
+    This asynchronous function sends a text prompt to the GPT model and can include
+    image data if a file path is provided. It supports both PDF and image files.
 
     Args:
         txt (str): The text prompt to send to the model.
@@ -315,8 +354,9 @@ def gpt(txt, path="", temperature=0.7):
     5. Returns the model's response.
 
     Note:
-    - The function uses external functions like pdf_to_images, process_image, and encode_image.
-    - It assumes the existence of a gpt_client object for API communication.
+    - The function uses external functions like pdf_to_images and OPENAI_IMAGE_ENCODER.
+    - It assumes the existence of a gpt_client object for API communication. The
+      synchronous client call runs in a separate thread, so the event loop is not blocked.
     """
     model = "gpt-4o"
     content = [{"type": "text", "text": txt}]
@@ -324,26 +364,27 @@ def gpt(txt, path="", temperature=0.7):
     if path:
         if path.endswith(".pdf"):
             # Convert PDF to images
-            image_paths = pdf_to_images(path)
+            image_paths = await pdf_to_images(path)
         else:
             # For single image files
             image_paths = [path]
         for img_path in image_paths:
             # Process the image
-            processed_img_path = process_image(img_path, scaling=1.0, target_size=(1440, 900))
-            base64_image = encode_image(processed_img_path)
+            image = await process_image(img_path, OPENAI_IMAGE_ENCODER)
             content.append({
                 "type": "image_url",
                 "image_url": {
-                    "url": f"data:image/jpeg;base64,{base64_image}"
+                    "url": f"data:{image.media_type};base64,{image.base64()}"
                 }
             })
-    response = gpt_client.chat.completions.create(
+    loop = asyncio.get_event_loop()
+    response = await loop.run_in_executor(None, functools.partial(
+        gpt_client.chat.completions.create,
         messages=[ {"role": "user", "content": content} ],
         model=model,
         temperature=temperature,
         max_tokens=4_096
-    )
+    ))
     msg = response.choices[0].message.content
     return msg
 
@@ -466,7 +507,23 @@ def plot_rect_on_image(image_path, x1, y1, x2, y2):
     plt.show()
 
 class OverlayWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, fps: float = 30.0, ttl: Optional[float] = 1.0):
+        """
+        Transparent always-on-top window drawing predictions over the game.
+
+        Shapes can be added from any thread with `add_shape()` or `set_point()`. They are
+        handed over through a `ShapeBuffer` which a `QTimer` drains at `fps`, so the
+        window repaints at most `fps` times a second however fast predictions arrive,
+        and the decision loop never waits on Qt.
+
+        Attributes:
+            fps (float): Maximum repaint rate.
+            shapes (ShapeBuffer): Shapes waiting to be drawn and currently visible.
+
+        Note:
+            Qt must run on the main thread (on macOS in particular), so the asyncio loop
+            runs on a `BackgroundLoop` thread while the overlay is shown.
+        """
         super().__init__()
         self.setWindowFlags(
             Qt.WindowType.FramelessWindowHint |
@@ -481,33 +538,56 @@ class OverlayWindow(QMainWindow):
         screen = QApplication.primaryScreen().geometry()
         self.setGeometry(screen)
         
-        self.point = None
-        
+        self.shapes = ShapeBuffer(ttl=ttl)
+        self.fps = fps
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self._tick)
+        self.timer.start(max(1, round(1000 / fps)))
+
         # Force window level using AppKit
-        from AppKit import NSApplication, NSWindow
-        NSApplication.sharedApplication()
-        self.setProperty("_q_windowLevel", NSWindow.levelKey() + 2)
+        if sys.platform == "darwin":
+            from AppKit import NSApplication, NSWindow
+            NSApplication.sharedApplication()
+            self.setProperty("_q_windowLevel", NSWindow.levelKey() + 2)
 
     def set_point(self, x, y):
-        self.point = QPoint(x, y)
-        self.update()
-    
+        self.shapes.put(Point(x, y))
+
+    def add_shape(self, shape: Shape):
+        self.shapes.put(shape)
+
+    def _tick(self):
+        # Repaint once for everything which arrived since the last tick
+        if self.shapes.collect():
+            self.update()
+
     def paintEvent(self, event):
-        if self.point:
-            painter = QPainter(self)
-            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-            
+        shapes = self.shapes.shapes()
+        if not shapes:
+            return
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        origin = self.geometry().topLeft()
+        for shape in shapes:
+            pen = QPen(QColor(*shape.color))
+            if isinstance(shape, Rect):
+                pen.setWidth(2)
+                painter.setPen(pen)
+                painter.drawRect(QRect(QPoint(shape.x1, shape.y1) - origin, QPoint(shape.x2, shape.y2) - origin))
+                continue
+            point = QPoint(shape.x, shape.y) - origin
+
             # Draw red dot
-            pen = QPen(QColor(255, 0, 0))
             pen.setWidth(10)
             painter.setPen(pen)
-            painter.drawPoint(self.point)
-            
+            painter.drawPoint(point)
+
             # Draw circle around point
             pen.setWidth(2)
             painter.setPen(pen)
-            painter.drawEllipse(self.point, 20, 20)
-    
+            painter.drawEllipse(point, 20, 20)
+        painter.end()
+
     def keyPressEvent(self, event):
         if event.key() == Qt.Key.Key_Escape:
             self.close()
@@ -527,7 +607,8 @@ class OverlayWindow(QMainWindow):
 
     def showEvent(self, event):
         super().showEvent(event)
-        self.force_topmost()
+        if sys.platform == "darwin":
+            self.force_topmost()
 
 # async def take_screenshots():
 #     while True:
@@ -550,110 +631,515 @@ class OverlayWindow(QMainWindow):
 #         # Wait 1 second before next iteration
 #         await asyncio.sleep(1)
 
-def move_mouse_to(x: int, y: int, should_click: bool = False, right_click: bool = False):
+def move_mouse_to(x: int, y: int, should_click: bool = False, right_click: bool = False, actuator: Optional[Actuator] = None):
     """
     Moves the mouse cursor to specified coordinates and optionally clicks.
-    
+
+    The input is scheduled on the actuator's own thread and this returns immediately,
+    the button is released `Click.hold` seconds later without blocking the caller.
+
     Args:
         x (int): Target x coordinate
-        y (int): Target y coordinate 
+        y (int): Target y coordinate
         should_click (bool): Whether to perform a click after moving
         right_click (bool): If clicking, whether to right click instead of left click
+        actuator (Actuator, optional): The actuator to inject input with. Defaults to
+            one using the platform's input backend, created on first use.
     """
-    # Create CGPoint for target coordinates
-    point = CGPoint(x=x, y=y)
-    
-    # Get current mouse location
-    current = CGEventGetLocation(CGEventCreate(None))
-    
-    # Create mouse movement event
-    move_event = CGEventCreateMouseEvent(
-        None, 
-        kCGEventMouseMoved,
-        point,
-        kCGMouseButtonLeft
-    )
-    
-    # Post the movement event
-    CGEventPost(kCGHIDEventTap, move_event)
-    
+    global _actuator
+    if actuator is None:
+        if _actuator is None:
+            _actuator = Actuator(make_backend("auto"))
+        actuator = _actuator
     if should_click:
-        # Create mouse click events
-        if right_click:
-            down_event = CGEventCreateMouseEvent(
-                None,
-                kCGEventRightMouseDown,
-                point, 
-                kCGMouseButtonRight
-            )
-            up_event = CGEventCreateMouseEvent(
-                None,
-                kCGEventRightMouseUp,
-                point,
-                kCGMouseButtonRight
-            )
-        else:
-            down_event = CGEventCreateMouseEvent(
-                None,
-                kCGEventLeftMouseDown,
-                point,
-                kCGMouseButtonLeft
-            )
-            up_event = CGEventCreateMouseEvent(
-                None,
-                kCGEventLeftMouseUp,
-                point,
-                kCGMouseButtonLeft
-            )
-            
-        # Post the click events
-        CGEventPost(kCGHIDEventTap, down_event)
-        time.sleep(0.1)  # Small delay between down and up
-        CGEventPost(kCGHIDEventTap, up_event)
+        actuator.submit(Click(x, y, button="right" if right_click else "left"))
+    else:
+        actuator.submit(Move(x, y))
+
+_actuator: Optional[Actuator] = None
 
 # What should the Caitlyn do next here? Consider the current ability cooldowns, the health of Caitlyn and nearby enemies, etc.
 if __name__ == "__main__":
     # output_image = "invoice.pdf"
     output_image = "screen.png"
 
+    # Write each captured and processed frame to ./dataset (slow, for debugging only)
+    SAVE_FRAMES = False
+
+    # Skip the Claude call when the frame differs from the last sent frame by less
+    # than this mean grayscale difference (0-255), reusing the previous action
+    CHANGE_THRESHOLD = 4.0
+    REUSE_ACTION_ON_SKIP = True
+    SKIP_INTERVAL = 0.1
+
+    # Reuse the action computed for an earlier frame whose perceptual hash is within
+    # CACHE_RADIUS bits (of 64) and which is at most CACHE_TTL seconds old, even if
+    # other frames were sent in between. The region around the target must match as
+    # well, so a small target which moved is asked for again
+    CACHE_SIZE = 256
+    CACHE_TTL = 5.0
+    CACHE_RADIUS = 4
+
+    # Named region of the screen to capture and send, see lib/regions.py
+    CAPTURE_REGION = "full"
+
+    # Maximum number of overlapping Claude requests, and the delay between captures
+    MAX_IN_FLIGHT = 2
+    CAPTURE_INTERVAL = 0.05
+
+    # Drop actions computed from frames captured more than this many seconds ago.
+    # With STALE_POLICY="weight", actions up to twice as old are down-weighted instead:
+    # the cursor is still moved to them, but they are only clicked while their weight
+    # is at least CLICK_WEIGHT
+    MAX_ACTION_AGE = 3.0
+    STALE_POLICY = os.getenv("STALE_POLICY", "drop")
+    CLICK_WEIGHT = 0.5
+
+    # Width the monitor is downscaled to before sending. None sends frames at
+    # screen point resolution, which halves each dimension on Retina displays
+    TARGET_WIDTH = None
+
+    # Frame source: "mss_buffered" (live screen, grabbed on its own thread into
+    # CAPTURE_BUFFERS reused BGRA buffers and only converted for frames which are
+    # inferred on), "mss" (live screen, grabbed and converted on every capture),
+    # "replay" (a directory of frames or a video file) or "synthetic". Replay and
+    # synthetic sources also run headless on Linux. Without REPLAY_LOOP a replay is
+    # played once, and the run ends after its last frame
+    CAPTURE_SOURCE = os.getenv("CAPTURE_SOURCE", "mss_buffered")
+    CAPTURE_BUFFERS = 3
+    REPLAY_PATH = os.getenv("REPLAY_PATH", "./dataset")
+    REPLAY_LOOP = os.getenv("REPLAY_LOOP", "1") == "1"
+    CAPTURE_FPS = float(os.getenv("CAPTURE_FPS", "0")) or None
+
+    # Input backend: "auto" (Quartz on macOS, XTEST on Linux), "uinput", "null", or
+    # "recording", which prints input events instead of performing them
+    INPUT_BACKEND = os.getenv("INPUT_BACKEND", "auto" if sys.platform == "darwin" else "recording")
+
+    # Record every frame sent to Claude with its prompt, response, timings and action
+    # to this directory. Recordings can be replayed with CAPTURE_SOURCE=replay
+    RECORD_PATH = os.getenv("RECORD_PATH")
+
+    # Print per-stage latency percentiles every METRICS_INTERVAL seconds, and/or
+    # expose them to a local Prometheus scraper on METRICS_PORT
+    METRICS_INTERVAL = float(os.getenv("METRICS_INTERVAL", "30"))
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+    # Connections to open to the API before the first frame is sent
+    WARM_UP_CONNECTIONS = MAX_IN_FLIGHT
+
+    # Coordinate request profile: "default" uses the few-shot infill prompt with up to
+    # 4096 output tokens, "fast" prefills the answer with brief thinking and "instant"
+    # prefills the first coordinate with no thinking, see lib/coords.py
+    COORDS_PROFILE = os.getenv("COORDS_PROFILE", "fast")
+
+    # With the "multi" or "multi_rect" profiles all TARGETS are located by one request,
+    # sharing a single image upload. The first target is clicked, and the others are
+    # drawn on the overlay and recorded
+    TARGETS = {
+        "blue_buff": "Blue Buff, as denoted with the numbers above its HP bar. Click slightly underneath here to correctly click on the blue buff.",
+        "champion": "the champion in the centre of the screen",
+        "minions": "the nearest minion wave",
+    }
+
+    # Try to find the target locally by template matching first, and only ask Claude
+    # when the best match correlates less than LOCATE_THRESHOLD. Templates are cut
+    # from ./dataset images with `TemplateLibrary.cut()`, see lib/locate.py
+    TEMPLATE_PATH = "./dataset/templates"
+    LOCATE_TARGET = "blue_buff"
+    LOCATE_THRESHOLD = 0.8
+
+    # Image-token budget per frame (Anthropic bills roughly width * height / 750), and
+    # the image format. 0 sizes frames to the API's own limit of about 1600 tokens
+    IMAGE_TOKEN_BUDGET = int(os.getenv("IMAGE_TOKEN_BUDGET", "0")) or None
+    IMAGE_FORMAT = os.getenv("IMAGE_FORMAT", "jpeg")
+
+    # Draw predictions over the screen, repainting at most OVERLAY_FPS times a second.
+    # Qt then owns the main thread and the decision loop runs on a background thread
+    OVERLAY = os.getenv("OVERLAY", "0") == "1"
+    OVERLAY_FPS = 30
+
+    # "direct" sends the frame once within IMAGE_TOKEN_BUDGET. "coarse_to_fine" asks for
+    # a rough box on a frame downscaled to COARSE_TOKENS, then for the exact point on a
+    # full-resolution crop around it within FINE_TOKENS, see lib/refine.py. The refine
+    # pass is skipped if the box is at most CONFIDENT_SIZE pixels across
+    LOCALIZER = os.getenv("LOCALIZER", "direct")
+    COARSE_TOKENS = 400
+    FINE_TOKENS = 800
+    CONFIDENT_SIZE = 0
+
+    # Follow the target on every captured frame between model calls and keep the cursor
+    # on its predicted position. While the target is tracked the model is only asked
+    # again every TRACK_REFRESH seconds, or as soon as the tracker loses it, see
+    # lib/track.py. Lower CAPTURE_INTERVAL to track at a higher rate
+    TRACK = os.getenv("TRACK", "0") == "1"
+    TRACK_REFRESH = 2.0
+    TRACK_THRESHOLD = 0.6
+
+    # Find unit HP bars by colour and shape in a few tens of milliseconds, see
+    # lib/hpbars.py. "click" clicks the HPBAR_KIND unit with the least health without
+    # asking Claude, and "prompt" sends Claude the detected bars as a text candidate
+    # list instead of the frame, which falls back to the frame when there are none.
+    # Jungle monsters have red bars like enemies, so they are found as "enemy"
+    HPBARS = os.getenv("HPBARS", "off")
+    HPBAR_KIND = "enemy"
+    HPBAR_REGION = "playfield"
+
+    # Read HP, mana, gold and ability cooldowns from the HUD locally, see lib/hud.py, and
+    # send them as text next to a frame reduced to HUD_IMAGE_TOKENS, so Claude gets exact
+    # values instead of estimating them from pixels. HUD_LAYOUT must match the client's
+    # resolution and HUD scale, and digits are matched against templates in GLYPH_PATH
+    HUD = os.getenv("HUD", "0") == "1"
+    HUD_LAYOUT = os.getenv("HUD_LAYOUT", "lol")
+    GLYPH_PATH = "./dataset/templates/glyphs"
+    HUD_IMAGE_TOKENS = 800
+
+    # Ask Claude for a short plan of clicks, right-clicks, key presses and waits towards
+    # PLAN_GOAL instead of a single click, so one call drives several actions. Steps may
+    # carry conditions, e.g. "key q if ready:Q", which are checked on the latest frame
+    # just before the step runs, and the rest of the plan is dropped when one fails, see
+    # lib/plan.py. Conditions are measured with the HUD, template and HP bar readers
+    PLAN = os.getenv("PLAN", "0") == "1"
+    PLAN_GOAL = "clear the Blue Buff camp, using abilities when they are ready, and walk away if HP gets low"
+
     # Add near the start of main()
     Path("./dataset").mkdir(exist_ok=True)
 
-    # Initialize screen capture
-    sct = mss()
+    # Initialize screen capture, the backing scale factor is detected on the first grab
+    source_kwargs = {
+        "mss": {"region": CAPTURE_REGION, "target_width": TARGET_WIDTH},
+        "mss_buffered": {"region": CAPTURE_REGION, "target_width": TARGET_WIDTH, "buffers": CAPTURE_BUFFERS},
+        "replay": {"path": REPLAY_PATH, "loop": REPLAY_LOOP},
+    }
+    capture_fps = CAPTURE_FPS
+    if capture_fps is None and CAPTURE_SOURCE == "mss_buffered" and CAPTURE_INTERVAL:
+        # The capture thread grabs no faster than the pipeline consumes frames
+        capture_fps = 1 / CAPTURE_INTERVAL
+    source = make_source(CAPTURE_SOURCE, fps=capture_fps, **source_kwargs.get(CAPTURE_SOURCE, {}))
+
+    # Only send frames which have changed since the last request
+    gate = FrameGate(threshold=CHANGE_THRESHOLD)
+    cache = ResultCache(max_entries=CACHE_SIZE, ttl=CACHE_TTL, radius=CACHE_RADIUS)
+
+    recorder = SessionRecorder(RECORD_PATH) if RECORD_PATH else None
+
+    # Input is injected on the actuator's own thread, so clicks never block the loop
+    backend_kwargs = {"recording": {"verbose": True}}
+    actuator = Actuator(make_backend(INPUT_BACKEND, **backend_kwargs.get(INPUT_BACKEND, {})))
+
+    profiles = {"default": RequestProfile(prompt=prompt), **PROFILES, **MULTI_PROFILES}
+    profile = profiles[COORDS_PROFILE]
+    names = list(TARGETS) if COORDS_PROFILE in MULTI_PROFILES else None
+    locator = Locator(TemplateLibrary(TEMPLATE_PATH), threshold=LOCATE_THRESHOLD)
+    encoder = ImageEncoder("anthropic", max_tokens=IMAGE_TOKEN_BUDGET, format=IMAGE_FORMAT)
+    localizer = None
+    if LOCALIZER == "coarse_to_fine" and names is None:
+        localizer = CoarseToFine(
+            functools.partial(claude_stream, temperature=0.0),
+            coarse_tokens=COARSE_TOKENS,
+            fine_tokens=FINE_TOKENS,
+            confident_size=CONFIDENT_SIZE,
+        )
 
-    async def main():
-        while True:
-            # Take a screenshot
-            screenshot = ImageGrab.grab()
-
-            # # Capture the primary monitor
-            monitor = sct.monitors[1]  # Primary monitor
-            screenshot = sct.grab(monitor)
-
-            # # Convert to PIL Image
-            img = Image.frombytes('RGB', screenshot.size, screenshot.rgb)
-            
-            # # Save the screenshot
-            path = str(Path(f"./dataset/{output_image}"))
-            img.save(path)
+    tracker = Tracker(threshold=TRACK_THRESHOLD) if TRACK else None
+    detector = HPBarDetector(region=HPBAR_REGION) if HPBARS != "off" else None
+    hud_reader = HUDReader(HUD_LAYOUTS[HUD_LAYOUT], GlyphReader(GLYPH_PATH)) if HUD else None
+    if hud_reader is not None:
+        encoder = ImageEncoder("anthropic", max_tokens=HUD_IMAGE_TOKENS, format=IMAGE_FORMAT)
 
-            # path = str(Path(f"./dataset/{output_image}"))
-            # screenshot.save(path)
+    task = profile.prompt(TARGETS) if names else profile.prompt(TARGETS["blue_buff"])
 
-            try:
-                o = await claude(
-                    prompt("Blue Buff, as denoted with the numbers above its HP bar. Click slightly underneath here to correctly click on the blue buff."),
-                    path,
-                    temperature=0.0
-                )
-                print(o)
-                x, y = parse_coords(o)
-                if x is not None and y is not None:
-                    move_mouse_to(x, y, should_click=True, right_click=True)
-
-                # plot_rect_on_image(f"./dataset/{output_image}_page_1.jpg_processed.jpg", x1, y1, x2, y2)
-            except Exception as e:
-                print(f"Error: {e}")
+    # The most recently captured frame, read by the plan executor
+    latest_frame: Optional[Frame] = None
+
+    executor = None
+    if PLAN:
+        conditions = FrameConditions(
+            hud=hud_reader or HUDReader(HUD_LAYOUTS[HUD_LAYOUT], GlyphReader(GLYPH_PATH)),
+            locator=locator,
+            detector=detector or HPBarDetector(region=HPBAR_REGION),
+        )
+        # Plans read the frames captured for the pipeline instead of grabbing their own
+        executor = PlanExecutor(actuator, lambda: latest_frame, conditions)
+
+    def capture() -> Optional[Frame]:
+        global latest_frame
+        frame = source.grab()
+        if frame is None:
+            # The source is exhausted, which ends the pipeline once queued frames are done
+            print("Capture source exhausted, stopping")
+            return None
+        latest_frame = frame
+        if tracker is None or not tracker.active:
+            return frame
+        with metrics.time("track") as track:
+            state = tracker.update(frame.load(), frame.captured_at)
+        frame.timings["track"] = track.elapsed
+        if state.lost:
+            print(f"Tracker lost the target at {state.point}, asking Claude again")
+        elif state.misses == 0:
+            # Aim at where the target is now, not where it was in the frame
+            x, y = tracker.predict()
+            actuator.submit(Move(*to_screen(x, y, frame.monitor, frame.image.size)))
+        return frame
+
+    async def infer(frame: Frame):
+        # The tracker keeps aim fresh, so the model is only needed to refresh it
+        if tracker is not None and tracker.active and tracker.age() < TRACK_REFRESH:
+            await asyncio.sleep(SKIP_INTERVAL)
+            return None
+
+        # Skip the request if the screen hasn't meaningfully changed, deciding from a
+        # preview sampled from the raw buffer so skipped frames are never converted
+        preview = frame.preview()
+        fp = gate.fingerprint(preview)
+        if not gate.changed(fp):
+            await asyncio.sleep(SKIP_INTERVAL)
+            # The reused action keeps the capture time of the frame it was computed
+            # from, so the staleness guard drops it once it is too old
+            return gate.last_action if REUSE_ACTION_ON_SKIP else None
+
+        # Answer repeated game states without a request
+        h = cache.key(preview)
+        cached = cache.get(task, h, preview)
+        if cached is not None:
+            gate.accept(fp, Action(cached, frame.captured_at, frame.seq))
+            return cached
+
+        # Raw frames are converted on a worker thread, not the event loop streaming responses
+        img = await asyncio.get_running_loop().run_in_executor(None, frame.load)
+
+        # # Optionally save the screenshot, the frame is sent to Claude from memory
+        save_path = None
+        if SAVE_FRAMES:
+            path = str(Path(f"./dataset/{output_image}"))
+            img.save(path)
+            save_path = f"{path}_processed.jpg"
+
+        if executor is not None:
+            plan = await infer_plan(frame)
+            # Plans are never reused, replaying their inputs on every unchanged frame
+            gate.accept(fp, None)
+            return plan
+
+        # Known targets are matched locally in milliseconds, with no API call
+        loop = asyncio.get_running_loop()
+        with metrics.time("locate") as locate:
+            match = await loop.run_in_executor(None, locator.locate, img, LOCATE_TARGET)
+        frame.timings["locate"] = locate.elapsed
+        bars = []
+        if detector is not None and match is None:
+            with metrics.time("hpbars") as detect:
+                bars = await loop.run_in_executor(None, detector.detect, img)
+            frame.timings["hpbars"] = detect.elapsed
+        candidates = [bar for bar in bars if bar.kind == HPBAR_KIND]
+        hud = None
+        if hud_reader is not None and match is None:
+            with metrics.time("hud") as read:
+                hud = await loop.run_in_executor(None, hud_reader.read, img)
+            frame.timings["hud"] = read.elapsed
+        # Coordinates are in the pixel space of the image sent
+        sent_size = img.size
+        encoded: List[EncodedImage] = []
+        # Local results are a single point, not a streamed answer per target
+        local = match is not None or (HPBARS == "click" and bool(candidates))
+        if match is not None:
+            o, coords = f"Template match {match.name} ({match.score:.2f})", match.point
+        elif HPBARS == "click" and candidates:
+            bar = min(candidates, key=lambda bar: bar.fill)
+            o, coords = f"HP bar {bar.kind} at {bar.box[:2]} ({bar.fill:.0%})", bar.point
+        elif localizer is not None:
+            start = time.monotonic()
+            # A rough box from a downscaled frame, then the point from a full-resolution crop
+            result = await localizer.locate(img, TARGETS["blue_buff"])
+            frame.timings["request"] = time.monotonic() - start
+            o = "\n".join(result.responses) if result else ""
+            coords = result.point if result else None
+            if result:
+                encoded = result.images
+                print(f"Coarse-to-fine: box {result.box}, crop {result.crop}, {result.tokens} image tokens")
+        else:
+            start = time.monotonic()
+            request, image = task, img
+            if HPBARS == "prompt" and bars:
+                # A few dozen text tokens instead of the frame, answered in frame pixels
+                request, image = f"{task}\n\n{candidates_prompt(bars, img.size)}", ""
+            if hud is not None:
+                request = f"{request}\n\n{hud.describe()}"
+            # Stream the response, the action fires as soon as the coordinates arrive
+            o, coords = await claude_stream(
+                request,
+                image,
+                temperature=0.0,
+                save_path=save_path,
+                parser=profile.parser(names),
+                profile=profile,
+                encoder=encoder,
+                encoded=encoded,
+            )
+            frame.timings["request"] = time.monotonic() - start
+            if encoded:
+                sent_size = encoded[0].size
+                print(f"Image: {encoded[0].describe()}")
+        print(o)
+        targets = {}
+        with metrics.time("parse"):
+            if names is not None:
+                targets = answer_targets(coords, o, names, profile.tags, local=local)
+                coords = targets.get(names[0])
+                x, y = to_point(coords) if coords else (None, None)
+            else:
+                x, y = to_point(coords) if coords else parse_coords(o)
+        action = None
+        if x is not None and y is not None:
+            # Map coordinates in the downscaled, cropped frame back to screen points
+            action = to_screen(x, y, frame.monitor, sent_size)
+            if tracker is not None:
+                point = (x * img.size[0] / sent_size[0], y * img.size[1] / sent_size[1])
+                tracker.seed(img, point, frame.captured_at)
+        gate.accept(fp, Action(action, frame.captured_at, frame.seq) if action is not None else None)
+        if action is not None:
+            # Only reused while the region around the target is unchanged too
+            cache.put(task, h, action, img=preview, point=(x / sent_size[0], y / sent_size[1]))
+
+        if overlay is not None and action is not None:
+            overlay.set_point(*action)
+            if match is not None:
+                overlay.add_shape(Rect(
+                    *to_screen(*match.box[:2], frame.monitor, img.size),
+                    *to_screen(*match.box[2:], frame.monitor, img.size),
+                    key="match",
+                ))
+            for i, bar in enumerate(bars):
+                color = {"ally": (0, 120, 255), "enemy": (255, 0, 0)}.get(bar.kind, (255, 200, 0))
+                overlay.add_shape(Rect(
+                    *to_screen(*bar.box[:2], frame.monitor, img.size),
+                    *to_screen(*bar.box[2:], frame.monitor, img.size),
+                    key=f"hpbar{i}",
+                    color=color,
+                ))
+            for name, value in targets.items():
+                if len(value) == 4:
+                    overlay.add_shape(Rect(
+                        *to_screen(*value[:2], frame.monitor, sent_size),
+                        *to_screen(*value[2:], frame.monitor, sent_size),
+                        key=name,
+                    ))
+                else:
+                    overlay.add_shape(Point(*to_screen(*value, frame.monitor, sent_size), key=name, color=(255, 200, 0)))
+
+        if recorder:
+            recorder.record(img, {
+                "seq": frame.seq,
+                "monitor": frame.monitor,
+                "prompt": task,
+                "profile": COORDS_PROFILE,
+                "truth": frame.truth,
+                "response": o,
+                "coords": [x, y],
+                "targets": targets,
+                "hpbars": [[bar.kind, list(bar.box), round(bar.fill, 2)] for bar in bars],
+                "hud": hud.describe() if hud is not None else None,
+                "action": action,
+                "image": encoded[0].describe() if encoded else None,
+                "timings": dict(frame.timings),
+            })
+        return action
+
+    async def infer_plan(frame: Frame) -> Optional[Plan]:
+        img = await asyncio.get_running_loop().run_in_executor(None, frame.load)
+        request = PLAN_PROFILE.prompt(PLAN_GOAL)
+        if hud_reader is not None:
+            with metrics.time("hud") as read:
+                hud = await asyncio.get_running_loop().run_in_executor(None, hud_reader.read, img)
+            frame.timings["hud"] = read.elapsed
+            request = f"{request}\n\n{hud.describe()}"
+        encoded: List[EncodedImage] = []
+        start = time.monotonic()
+        o, _ = await claude_stream(request, img, temperature=0.0, profile=PLAN_PROFILE, encoder=encoder, encoded=encoded)
+        frame.timings["request"] = time.monotonic() - start
+        plan = parse_plan(o)
+        # Map the plan from the pixels of the image sent to screen points
+        sent_size = encoded[0].size if encoded else img.size
+        plan = plan.map(lambda x, y: to_screen(x, y, frame.monitor, sent_size))
+        print(f"Plan: {plan.describe() or 'empty'}")
+        if plan.rejected:
+            print(f"Rejected plan steps: {plan.rejected}")
+        if recorder:
+            recorder.record(img, {
+                "seq": frame.seq,
+                "monitor": frame.monitor,
+                "prompt": request,
+                "profile": "plan",
+                "response": o,
+                "plan": [step.text for step in plan.steps],
+                "rejected": plan.rejected,
+                "image": encoded[0].describe() if encoded else None,
+                "timings": dict(frame.timings),
+            })
+        return plan if plan.steps else None
+
+    def actuate(action: Action):
+        if isinstance(action.value, Plan):
+            with metrics.time("plan"):
+                result = executor.run(action.value)
+            print(f"Plan performed {result.performed}/{len(action.value.steps)} steps in {result.elapsed:.2f}s"
+                  + (f", aborted: {result.aborted}" if result.aborted else ""))
+            if recorder:
+                recorder.event({"type": "plan", "seq": action.seq, "performed": result.performed, "aborted": result.aborted, "age": action.age})
+            return
+        x, y = action.value
+        # A stale target may have moved, so low-weight actions only aim
+        click = action.weight >= CLICK_WEIGHT
+        if recorder:
+            recorder.event({"type": "action", "seq": action.seq, "action": action.value, "age": action.age, "weight": action.weight, "click": click})
+        move_mouse_to(x, y, should_click=click, right_click=True, actuator=actuator)
 
-    asyncio.run(main())
\ No newline at end of file
+    async def main():
+        pipeline = Pipeline(
+            capture,
+            infer,
+            actuate,
+            max_in_flight=MAX_IN_FLIGHT,
+            capture_interval=CAPTURE_INTERVAL,
+            max_action_age=MAX_ACTION_AGE,
+            stale_policy=STALE_POLICY,
+        )
+        await model_client.warm_up(WARM_UP_CONNECTIONS)
+        if METRICS_PORT:
+            metrics.serve(METRICS_PORT)
+        dump = asyncio.create_task(metrics.dump_every(METRICS_INTERVAL)) if METRICS_INTERVAL else None
+        try:
+            await pipeline.run()
+        finally:
+            if dump:
+                dump.cancel()
+            print(metrics.report())
+            source.close()
+            actuator.close()
+            if recorder:
+                recorder.close()
+            await model_client.close()
+            print(f"Pipeline stats: {pipeline.stats}")
+            print(f"Cache stats: {cache.stats()}")
+            if tracker is not None:
+                print(f"Tracker stats: {tracker.stats()}")
+
+    overlay: Optional[OverlayWindow] = None
+    if OVERLAY:
+        app = QApplication(sys.argv)
+        overlay = OverlayWindow(fps=OVERLAY_FPS)
+        overlay.show()
+        background = BackgroundLoop(main)
+        background.start()
+
+        # Quit Qt once the decision loop ends, and stop the loop once Qt quits
+        watcher = QTimer()
+        watcher.timeout.connect(lambda: background.done.is_set() and app.quit())
+        watcher.start(100)
+        signal.signal(signal.SIGINT, lambda *_: app.quit())
+        app.exec()
+        background.stop()
+        if background.exception is not None:
+            raise background.exception
+    else:
+        asyncio.run(main())